@@ -1,41 +1,73 @@
 from ml.preprocessing.prediction_data_preprocessing_pipeline import PredictionDataPreprocessingPipeline
+from ml.preprocessing.historical_data_preprocessing_pipeline import HistoricalDataPreprocessingPipeline
+from ml.scripts.preprocess_historical_data import run_pipeline
+from ml.scripts.forecast_demand import run_forecast, STAGES as FORECAST_STAGES
 from ml.modeling.predictor import Predictor
-from flask import Flask, request, jsonify
+from ml.modeling.model_backends import model_backends
+from ml.modeling.inference_batcher import inference_batcher
+from ml.modeling.forecast_store import forecast_store
+from ml.modeling.prediction_cache import prediction_cache
+from ml.preprocessing.feature_history_store import feature_history_store
+from ml.preprocessing.upload_ingestion_layer import UploadIngestionLayer, UnsupportedUploadFormat
+from ml.preprocessing.mapping_store import mapping_store
+from flask import Flask, Request, request, jsonify
 from logging_config import setup_logging, logging
 from app_config import app_config
-import subprocess
+from job_engine import job_engine, JobQueueFull
+from fork_server import fork_server
+from prediction_responses import RESPONSE_FORMATS, select_format, accepts_gzip, columnar_predictions, json_response, ndjson_response
+import tempfile
 import json
 import os
 import sys
-import pandas as pd
+
+class UploadRequest(Request):
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        """
+        Keep uploads in memory up to a larger size than Werkzeug's 500KB, so they're parsed without touching the disk.
+        """
+        return tempfile.SpooledTemporaryFile(max_size=app_config.UPLOAD_MEMORY_BYTES, mode='rb+')
 
 app = Flask(__name__)
+app.request_class = UploadRequest
 
-def run_in_background(script_name, *args):
+def warm_up():
     """
-    Helper function to run a script in the background with the given arguments.
+    Load the model and encoding mappings, so requests don't pay for it and forked workers share them.
     """
-    # Build the full script path
-    script_path = os.path.join(app_config.SCRIPTS, script_name)
-
-    # Get the project root directory
-    project_root = os.path.abspath(os.path.dirname(__file__))
-
-    # Copy the current environment and set the PYTHONPATH to the project root
-    env = os.environ.copy()
-    env['PYTHONPATH'] = project_root
+    Predictor().load_model()
+    mapping_store.preload(app_config.PRELOAD_MAPPINGS)
+    model_backends.log_import_report()
 
-    # Build the command to run the script with provided arguments
-    command = ['python', script_path] + list(args)
+def preprocess_historical_data(job, data_path, data_type, incremental=False):
+    """
+    Job running the historical data preprocessing pipeline, reporting each stage to the job.
+    The spooled upload at the data path is deleted once the job is done.
+    """
+    try:
+        # Fork from the warm server so the job doesn't start a new interpreter or share the app's memory
+        if app_config.JOB_EXECUTION == 'fork_server':
+            fork_server.run(run_pipeline, data_path, data_type, incremental, on_stage=job.record_stage)
+        else:
+            run_pipeline(job.record_stage, data_path, data_type, incremental)
+    finally:
+        os.remove(data_path)
 
-    # Execute the script asynchronously
-    subprocess.Popen(command, env=env, cwd=project_root)
+def forecast_demand(job):
+    """
+    Job running the batch forecast of all active products, reporting each stage to the job.
+    """
+    if app_config.JOB_EXECUTION == 'fork_server':
+        fork_server.run(run_forecast, on_stage=job.record_stage)
+    else:
+        run_forecast(job.record_stage)
 
 @app.route('/export-sales-data', methods=['POST'])
 def export_sales_data():
     """
     Flask route to handle the preprocessing of historical data.
-    Expects a CSV file and metadata ('type' and 'format') in the request.
+    Expects a CSV file and metadata ('type', 'format' and optionally 'incremental') in the request.
     """
     # Check if a file was uploaded in the request
     if 'file' not in request.files:
@@ -46,10 +78,6 @@ def export_sales_data():
     if file.filename == '':
         return jsonify({'error': 'No selected file'}), 400
 
-    # Save the file to a temporary location
-    file_path = os.path.join('/tmp', file.filename)
-    file.save(file_path)
-
     # Retrieve and parse the metadata from the form
     metadata = request.form.get('metadata')
 
@@ -68,10 +96,24 @@ def export_sales_data():
 
             if data_type in ['weekly', 'daily']:
 
-                # Run the historical data preprocessing pipeline script in the background
-                run_in_background('preprocess_historical_data.py', '--data_path', file_path, '--data_type', data_type)
-
-                return jsonify({"status": f"Preprocessing started for {data_type} data"}), 200
+                # Save the upload for the job, as the request's file is gone once it returns
+                file_path = UploadIngestionLayer(file).spool(app_config.UPLOAD_SPOOL_DIR)
+
+                # Queue the historical data preprocessing pipeline to run in the background
+                try:
+                    job = job_engine.submit(
+                        f'preprocess_{data_type}_data',
+                        preprocess_historical_data,
+                        file_path,
+                        data_type,
+                        bool(metadata.get('incremental', False)),  # Add the upload's new rows to the processed data instead of replacing it
+                        total_stages=len(HistoricalDataPreprocessingPipeline.STAGES)
+                    )
+                except JobQueueFull as e:
+                    os.remove(file_path)
+                    return jsonify({"error": f"Too many preprocessing jobs, retry later ({str(e)})"}), 503, {'Retry-After': '60'}
+
+                return jsonify({"status": f"Preprocessing started for {data_type} data", "job_id": job.id}), 200
             else:
                 return jsonify({"status": "Invalid data format, must be 'weekly' or 'daily'"}), 400
         else:
@@ -80,25 +122,85 @@ def export_sales_data():
     except Exception as e:
         return jsonify({"error": f"Error processing data: {str(e)}"}), 500
 
-@app.route('/predict-demand', methods=['POST'])
-def predict_demand():
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
     """
-    Flask route to make predictions.
-    Expects a CSV file containing historical data and metadata ('prediction_dates') in the request.
+    Flask route to get the status of a background job, with the progress and timings of its stages.
     """
-    # Check if a file was uploaded in the request
-    if 'file' not in request.files:
-        return jsonify({'error': 'No file uploaded'}), 400
+    status = job_engine.status(job_id)
+    if status is None:
+        return jsonify({'error': 'Job not found'}), 404
 
-    # Retrieve the uploaded file from the request
-    file = request.files['file']
-    if file.filename == '':
-        return jsonify({'error': 'No selected file'}), 400
+    return jsonify(status), 200
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """
+    Flask route to get the serving metrics of this process, e.g. how full the inference batches are and how many predictions are cached.
+    """
+    return jsonify({'inference_batcher': inference_batcher.metrics(), 'prediction_cache': prediction_cache.metrics()}), 200
+
+@app.route('/forecasts', methods=['GET'])
+def forecasts():
+    """
+    Flask route to read the precomputed forecasts of products, without running the model.
+    Expects the 'product_ids' (comma-separated or repeated) in the query string, optionally a 'start_date' and 'end_date' (included),
+    and a 'response_format' of 'records' (default) or 'columnar'.
+    """
+    product_ids = [product_id for value in request.args.getlist('product_ids') for product_id in value.split(',') if product_id]
+    if not product_ids:
+        return jsonify({'error': 'No product_ids provided'}), 400
 
-    # Save the file to a temporary location
-    file_path = os.path.join('/tmp', file.filename)
-    file.save(file_path)
+    response_format = request.args.get('response_format', 'records')
+    if response_format not in ['records', 'columnar']:
+        return jsonify({'error': "Invalid response_format, must be one of ['records', 'columnar']"}), 400
 
+    run = forecast_store.current_run()
+    if run is None:
+        return jsonify({'error': 'No forecasts available yet, run the batch forecast first'}), 404
+
+    try:
+        forecasts_df, missing_product_ids = forecast_store.lookup(product_ids, request.args.get('start_date'), request.args.get('end_date'))
+    except ValueError as e:
+        return jsonify({'error': f"Invalid date: {str(e)}"}), 400
+
+    # Send forecasts back, in the same formats as the live predictions
+    if response_format == 'columnar':
+        predictions = columnar_predictions(forecasts_df)
+    else:
+        predictions = forecasts_df.to_json(orient='records')
+
+    return json_response({
+        "status": "Success, forecasts found",
+        "format": response_format,
+        "generated_at": run['generated_at'],
+        "missing_product_ids": missing_product_ids,
+        "predictions": predictions
+    }, 200, accepts_gzip(request))
+
+@app.route('/forecasts/refresh', methods=['POST'])
+def refresh_forecasts():
+    """
+    Flask route to start the batch forecast of all active products in the background, e.g. nightly from a scheduler.
+    """
+    try:
+        job = job_engine.submit('forecast_demand', forecast_demand, total_stages=len(FORECAST_STAGES))
+    except JobQueueFull as e:
+        return jsonify({"error": f"Too many jobs, retry later ({str(e)})"}), 503, {'Retry-After': '60'}
+
+    return jsonify({"status": "Batch forecast started", "job_id": job.id}), 200
+
+@app.route('/predict-demand', methods=['POST'])
+def predict_demand():
+    """
+    Flask route to make predictions.
+    Expects a file containing historical data and metadata ('prediction_dates') in the request.
+    The file is CSV by default, or Arrow IPC or Parquet when sent with their content type or extension.
+    Predictions are sent as 'records' by default, 'columnar' or streamed as 'ndjson' if set in the metadata's 'response_format',
+    and gzip-encoded if the client accepts it.
+    Clients can instead send the 'product_ids' to predict in the metadata, with a CSV file of their new observations only (optional),
+    and the rest of the history is taken from the feature history kept on the server.
+    """
     # Retrieve and parse the metadata from the form
     metadata = request.form.get('metadata')
 
@@ -110,6 +212,18 @@ def predict_demand():
     except json.JSONDecodeError:
         return jsonify({'error': 'Invalid metadata format, must be valid JSON'}), 400
 
+    # The file is optional when predicting from the server's feature history
+    product_ids = metadata.get('product_ids')
+
+    # Check if a file was uploaded in the request
+    if 'file' not in request.files and not product_ids:
+        return jsonify({'error': 'No file uploaded'}), 400
+
+    # Retrieve the uploaded file from the request
+    file = request.files.get('file')
+    if file is not None and file.filename == '':
+        return jsonify({'error': 'No selected file'}), 400
+
     try:
         # Make sure it's the right data
         if metadata.get('type') == 'prediction':
@@ -117,8 +231,36 @@ def predict_demand():
             if not metadata.get('prediction_dates'):
                 return jsonify({'error': 'Missing prediction_dates in metadata'}), 400
 
-            # Get the historical data from the file
-            historical_data = pd.read_csv(file_path)
+            # Check the requested response format
+            response_format = select_format(request, metadata)
+            if response_format not in RESPONSE_FORMATS:
+                return jsonify({'error': f"Invalid response_format, must be one of {RESPONSE_FORMATS}"}), 400
+            compress = accepts_gzip(request)
+
+            # Get the observations from the file, if any, in the format it was sent
+            try:
+                observations = UploadIngestionLayer(file).process() if file is not None else None
+            except UnsupportedUploadFormat as e:
+                return jsonify({'error': str(e)}), 415
+            except (IOError, ValueError) as e:
+                return jsonify({'error': f"Invalid file: {str(e)}"}), 400
+
+            if product_ids:
+                try:
+                    # Add the new observations, then rebuild the history of the requested products
+                    if observations is not None:
+                        feature_history_store.record_observations(observations)
+                    historical_data = feature_history_store.history(product_ids)
+                except KeyError as e:
+                    return jsonify({'error': f"Missing feature history: {str(e)}"}), 400
+            else:
+                historical_data = observations
+
+                # Keep the history so later requests only need to send new observations
+                try:
+                    feature_history_store.record_observations(historical_data)
+                except Exception as e:
+                    logging.warning(f"Feature history not updated | Error: {e}")
 
             try:
                 # Preprocess the data
@@ -134,6 +276,12 @@ def predict_demand():
                 # Prepare data for prediction by removing unneeded columns
                 prediction_data = preprocessed_data.drop(columns=['source_product_id', 'date'])
 
+                # Stream the predictions back while the batches are predicted
+                if response_format == 'ndjson':
+                    batches = Predictor().iter_live_predictions(prediction_data, source_product_ids, dates)
+
+                    return ndjson_response(batches, compress)
+
                 # Run the predictor
                 predictions_df = Predictor().run_live_predictions(
                     prediction_data,
@@ -141,11 +289,17 @@ def predict_demand():
                     dates
                 )
 
-                # Send predictions back
-                return jsonify({
+                # Send predictions back, with each product ID and date once if columnar
+                if response_format == 'columnar':
+                    predictions = columnar_predictions(predictions_df)
+                else:
+                    predictions = predictions_df.to_json(orient='records')
+
+                return json_response({
                     "status": "Success, demand predicted",
-                    "predictions": predictions_df.to_json(orient='records')
-                }), 200
+                    "format": response_format,
+                    "predictions": predictions
+                }, 200, compress)
 
             except Exception as e:
                 logging.error(f"an exception occurred during prediction. Error: {e}")
@@ -159,7 +313,15 @@ def predict_demand():
         return jsonify({'error': str(e)}), 500
 
 if __name__ == "__main__":
+    # Local development server only, production is served by gunicorn (see gunicorn.conf.py)
     setup_logging()
 
+    # Warm the caches so the first prediction request doesn't pay for loading the model
+    warm_up()
+
+    # Start the fork server so the first background job doesn't wait for its imports
+    if app_config.JOB_EXECUTION == 'fork_server':
+        fork_server.start()
+
     # Run the Flask application
     app.run(host="0.0.0.0", port=5002, debug=True)
@@ -7,4 +7,23 @@ class AppConfig:
     MAIN_MODEL = 'ml/models/xgboost_demand_forecast_model_20240928_134943.pkl'
     SECOND_MODEL = 'ml/models/lightgbm_demand_forecast_model_20240928_134943.pkl'
 
+    # Encoding mappings loaded at start-up
+    PRELOAD_MAPPINGS = ['product_id', 'category']
+
+    # Uploads
+    UPLOAD_MEMORY_BYTES = 64 * 1024 * 1024  # Uploads are kept in memory up to this size, beyond it in an auto-deleted temporary file
+    UPLOAD_SPOOL_DIR = None  # Directory of the uploads saved for background jobs, the system's temporary directory if None
+
+    # Background jobs
+    JOB_WORKERS = 2  # Jobs running at the same time in each worker process
+    JOB_QUEUE_SIZE = 8  # Jobs waiting in all the worker processes before new ones are rejected
+    JOB_HISTORY = 100  # Finished jobs kept for status requests
+    JOB_STORE = 'ml/data/jobs/jobs.sqlite'  # Status of the jobs, shared by the worker processes
+    JOB_EXECUTION = 'fork_server'  # 'fork_server' to run jobs in a child process forked from a warm server, 'thread' to run them in the worker thread
+    FORK_SERVER_PRELOAD = [  # Modules imported once by the fork server instead of by every job
+        'ml.scripts.preprocess_historical_data',
+        'ml.scripts.build_model',
+        'ml.scripts.forecast_demand',
+    ]
+
 app_config = AppConfig()
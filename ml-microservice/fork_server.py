@@ -0,0 +1,82 @@
+from app_config import app_config
+import multiprocessing
+import threading
+import logging
+import time
+import os
+
+def run_in_child(connection, func, args):
+    """
+    Run a function in the forked child, sending its stage events and any error back to the parent.
+    """
+    def on_stage(stage, status, seconds=None):
+        connection.send(('stage', stage, status, seconds))
+
+    try:
+        func(on_stage, *args)
+    except BaseException as e:
+        connection.send(('error', f"{type(e).__name__}: {e}"))
+        raise
+    finally:
+        connection.close()
+
+class ForkServer:
+
+    def __init__(self, preload=None):
+        """
+        Initialise a long-lived server process with the ML modules imported, forking a child for every job.
+        """
+        self.preload = preload or app_config.FORK_SERVER_PRELOAD
+        self.context = multiprocessing.get_context('forkserver')
+        self.context.set_forkserver_preload(self.preload)
+        self.lock = threading.Lock()
+        self.started = False
+
+    def start(self):
+        """
+        Start the server and wait until it has imported the preloaded modules, so the first job doesn't pay for it.
+        """
+        with self.lock:
+            if self.started:
+                return
+
+            start = time.perf_counter()
+            process = self.context.Process(target=os.getpid)
+            process.start()
+            process.join()
+            self.started = True
+
+            logging.info(f"Fork server started in {time.perf_counter() - start:.2f}s with {self.preload} preloaded")
+
+    def run(self, func, *args, on_stage=None):
+        """
+        Run `func(on_stage, *args)` in a child forked from the server, relaying its stage events until it exits.
+        The function must be importable by the child, i.e. defined at the top level of a module.
+        """
+        self.start()
+
+        receiver, sender = self.context.Pipe(duplex=False)
+        process = self.context.Process(target=run_in_child, args=(sender, func, args))
+        process.start()
+        sender.close()
+
+        # Relay the child's events until it closes its end of the pipe
+        error = None
+        while True:
+            try:
+                event = receiver.recv()
+            except EOFError:
+                break
+
+            if event[0] == 'stage' and on_stage:
+                on_stage(*event[1:])
+            elif event[0] == 'error':
+                error = event[1]
+
+        receiver.close()
+        process.join()
+
+        if process.exitcode != 0:
+            raise RuntimeError(error or f"Job process exited with code {process.exitcode}")
+
+fork_server = ForkServer()
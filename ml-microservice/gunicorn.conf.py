@@ -0,0 +1,32 @@
+import os
+
+# Serve the app from wsgi.py, loaded once in the master and shared with the forked workers
+wsgi_app = 'wsgi:app'
+preload_app = True
+
+bind = os.environ.get('ML_BIND', '0.0.0.0:5002')
+
+# Pre-forked worker processes, each serving requests with a pool of threads.
+# Background jobs run in the worker that accepted them, with their status and the queue limit shared
+# through the job store (app_config.JOB_STORE), so any worker answers /jobs/<id>
+workers = int(os.environ.get('ML_WORKERS', 2))
+worker_class = 'gthread'
+threads = int(os.environ.get('ML_THREADS', 4))
+
+# Predictions for large uploads can take a while
+timeout = int(os.environ.get('ML_TIMEOUT', 120))
+graceful_timeout = 30
+
+accesslog = '-'
+errorlog = '-'
+
+def post_worker_init(worker):
+    """
+    Start the fork server in each worker once it's forked, so the first background job doesn't wait for its imports.
+    Started in the master instead, the workers would not be its parent and couldn't wait on it.
+    """
+    from app_config import app_config
+    from fork_server import fork_server
+
+    if app_config.JOB_EXECUTION == 'fork_server':
+        fork_server.start()
@@ -0,0 +1,302 @@
+from app_config import app_config
+from collections import OrderedDict
+from contextlib import closing
+from datetime import datetime
+import threading
+import logging
+import sqlite3
+import queue
+import json
+import time
+import uuid
+import os
+
+class JobQueueFull(Exception):
+    """
+    Raised when a job is submitted while the queue is full.
+    """
+
+class Job:
+
+    def __init__(self, name, func, args=(), total_stages=None):
+        """
+        Initialise a job running a function, tracking its status and the progress of its stages.
+        """
+        self.id = uuid.uuid4().hex
+        self.name = name
+        self.func = func
+        self.args = args
+        self.total_stages = total_stages
+        self.status = 'queued'
+        self.stages = OrderedDict()  # Stage name -> status and duration
+        self.error = None
+        self.submitted_at = datetime.now()
+        self.started_at = None
+        self.finished_at = None
+        self.lock = threading.Lock()
+        self.store = None  # Store the status is shared through, once submitted
+
+    def save(self):
+        """
+        Save the job's status to its store, for the other worker processes to read.
+        """
+        if self.store is None:
+            return
+
+        try:
+            self.store.save(self)
+        except Exception as e:
+            logging.error(f"Error saving the status of job {self.id} | Error: {e}")
+
+    def record_stage(self, stage, status, seconds=None):
+        """
+        Record a stage's status, and its duration once completed.
+        """
+        with self.lock:
+            self.stages[stage] = {'status': status, 'seconds': None if seconds is None else round(seconds, 3)}
+
+        self.save()
+
+    def run(self):
+        """
+        Run the job's function, passing the job so it can report its stages.
+        """
+        self.status = 'running'
+        self.started_at = datetime.now()
+        self.save()
+
+        try:
+            self.func(self, *self.args)
+            self.status = 'completed'
+        except Exception as e:
+            self.status = 'failed'
+            self.error = str(e)
+
+            # The stage still running is the one that failed
+            with self.lock:
+                for details in self.stages.values():
+                    if details['status'] == 'running':
+                        details['status'] = 'failed'
+
+            logging.error(f"Job {self.id} ({self.name}) failed | Error: {e}")
+        finally:
+            self.finished_at = datetime.now()
+            self.save()
+
+    def to_dict(self):
+        """
+        Summarise the job's status, stages and timings.
+        """
+        with self.lock:
+            stages = [{'name': stage, **details} for stage, details in self.stages.items()]
+
+        completed = sum(stage['status'] == 'completed' for stage in stages)
+        end = self.finished_at or datetime.now()
+
+        return {
+            'id': self.id,
+            'name': self.name,
+            'status': self.status,
+            'stages': stages,
+            'progress': {'completed': completed, 'total': self.total_stages},
+            'error': self.error,
+            'submitted_at': self.submitted_at.isoformat(),
+            'started_at': self.started_at and self.started_at.isoformat(),
+            'finished_at': self.finished_at and self.finished_at.isoformat(),
+            'seconds': self.started_at and round((end - self.started_at).total_seconds(), 3),
+        }
+
+class JobStore:
+
+    FINISHED = ('completed', 'failed')
+
+    def __init__(self, path=None):
+        """
+        Initialise a SQLite store of the jobs' status shared by the app's worker processes,
+        so any worker answers a job's status, and the queue limit applies to the jobs queued in all of them.
+        Jobs still run in the worker that accepted them.
+        """
+        self.path = path or app_config.JOB_STORE
+
+    def connect(self):
+        """
+        Open a connection to the store, creating it if needed. Connections are not shared between threads or processes.
+        """
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+
+        connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('CREATE TABLE IF NOT EXISTS jobs (id TEXT PRIMARY KEY, status TEXT NOT NULL, pid INTEGER NOT NULL, details TEXT NOT NULL)')
+
+        return connection
+
+    def process_alive(self, pid):
+        """
+        Check whether the worker process running a job still exists.
+        """
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            pass
+
+        return True
+
+    def save(self, job):
+        """
+        Save a job's status, replacing the one saved before.
+        """
+        with closing(self.connect()) as connection:
+            connection.execute(
+                'INSERT INTO jobs (id, status, pid, details) VALUES (?, ?, ?, ?) '
+                'ON CONFLICT(id) DO UPDATE SET status = excluded.status, pid = excluded.pid, details = excluded.details',
+                (job.id, job.status, os.getpid(), json.dumps(job.to_dict())),
+            )
+
+    def add(self, job, max_queued, max_history):
+        """
+        Save a new job, raising JobQueueFull instead if as many jobs are already queued in all the workers.
+        The oldest finished jobs beyond the history limit are dropped.
+        """
+        with closing(self.connect()) as connection:
+            # Count and add in one transaction, so workers submitting at the same time don't both take the last place
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                pids = [pid for pid, in connection.execute("SELECT pid FROM jobs WHERE status = 'queued'")]
+                if sum(self.process_alive(pid) for pid in pids) >= max_queued:
+                    raise JobQueueFull(f"Job queue is full ({max_queued} jobs waiting)")
+
+                connection.execute('INSERT INTO jobs (id, status, pid, details) VALUES (?, ?, ?, ?)',
+                                   (job.id, job.status, os.getpid(), json.dumps(job.to_dict())))
+                connection.execute(
+                    'DELETE FROM jobs WHERE status IN (?, ?) AND rowid NOT IN '
+                    '(SELECT rowid FROM jobs WHERE status IN (?, ?) ORDER BY rowid DESC LIMIT ?)',
+                    (*self.FINISHED, *self.FINISHED, max_history),
+                )
+                connection.execute('COMMIT')
+            except BaseException:
+                connection.execute('ROLLBACK')
+                raise
+
+    def remove(self, job_id):
+        """
+        Delete a job, e.g. one accepted but not queued after all.
+        """
+        with closing(self.connect()) as connection:
+            connection.execute('DELETE FROM jobs WHERE id = ?', (job_id,))
+
+    def load(self, job_id):
+        """
+        Load a job's status, None if it's unknown. Jobs left unfinished by a worker that exited are reported as failed.
+        """
+        if not os.path.exists(self.path):
+            return None
+
+        with closing(self.connect()) as connection:
+            row = connection.execute('SELECT status, pid, details FROM jobs WHERE id = ?', (job_id,)).fetchone()
+
+        if row is None:
+            return None
+
+        status, pid, details = row
+        details = json.loads(details)
+        if status not in self.FINISHED and not self.process_alive(pid):
+            details.update(status='failed', error='The worker process running the job exited')
+
+        return details
+
+class JobEngine:
+
+    def __init__(self, max_workers=None, max_queued=None, max_history=None, store=None):
+        """
+        Initialise a pool of worker threads taking jobs from a bounded first-in, first-out queue.
+        The jobs' status is shared with the other worker processes through the store.
+        """
+        self.max_workers = max_workers or app_config.JOB_WORKERS
+        self.queue = queue.Queue(maxsize=max_queued or app_config.JOB_QUEUE_SIZE)
+        self.max_history = max_history or app_config.JOB_HISTORY
+        self.store = store or JobStore()
+        self.jobs = OrderedDict()  # Job ID -> job, oldest first
+        self.workers = []
+        self.lock = threading.Lock()
+
+    def start(self):
+        """
+        Start the worker threads if they're not running, e.g. in a process forked after the engine was created.
+        """
+        with self.lock:
+            self.workers = [worker for worker in self.workers if worker.is_alive()]
+
+            for _ in range(self.max_workers - len(self.workers)):
+                worker = threading.Thread(target=self.work, name='job-worker', daemon=True)
+                worker.start()
+                self.workers.append(worker)
+
+    def work(self):
+        """
+        Run queued jobs one at a time, for as long as the process lives.
+        """
+        while True:
+            job = self.queue.get()
+
+            try:
+                logging.info(f"Job {job.id} ({job.name}) started")
+                start = time.perf_counter()
+                job.run()
+                logging.info(f"Job {job.id} ({job.name}) {job.status} in {time.perf_counter() - start:.2f}s")
+            finally:
+                self.queue.task_done()
+
+    def submit(self, name, func, *args, total_stages=None):
+        """
+        Queue a job calling `func(job, *args)`, raising JobQueueFull instead of waiting if there's no room in any worker process.
+        """
+        job = Job(name, func, args, total_stages)
+        job.store = self.store
+
+        self.start()
+
+        # Take a place in the queue shared by the workers first, then in this worker's
+        self.store.add(job, self.queue.maxsize, self.max_history)
+        try:
+            self.queue.put_nowait(job)
+        except queue.Full:
+            self.store.remove(job.id)
+            raise JobQueueFull(f"Job queue is full ({self.queue.maxsize} jobs waiting)")
+
+        with self.lock:
+            self.jobs[job.id] = job
+            self.forget_finished_jobs()
+
+        logging.info(f"Job {job.id} ({name}) queued")
+
+        return job
+
+    def forget_finished_jobs(self):
+        """
+        Drop the oldest finished jobs beyond the history limit.
+        """
+        finished = [job_id for job_id, job in self.jobs.items() if job.status in ('completed', 'failed')]
+
+        for job_id in finished[:max(len(finished) - self.max_history, 0)]:
+            del self.jobs[job_id]
+
+    def get(self, job_id):
+        """
+        Return a job of this worker process by its ID, None if it's unknown.
+        """
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def status(self, job_id):
+        """
+        Summarise a job's status, whichever worker process runs it, None if it's unknown.
+        """
+        job = self.get(job_id)
+        if job is not None:
+            return job.to_dict()
+
+        return self.store.load(job_id)
+
+job_engine = JobEngine()
@@ -0,0 +1,48 @@
+from fork_server import ForkServer
+import subprocess
+import argparse
+import logging
+import time
+import sys
+import os
+
+def ready(on_stage):
+    """
+    Job doing no work, so only the start latency is measured.
+    """
+
+def time_new_interpreter(modules):
+    """
+    Time starting a new interpreter that imports the modules, as the jobs used to.
+    """
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-c', ';'.join(f'import {module}' for module in modules)], check=True, env={**os.environ, 'PYTHONPATH': os.getcwd()})
+
+    return time.perf_counter() - start
+
+def time_fork_server(server):
+    """
+    Time forking a job from the warm fork server.
+    """
+    start = time.perf_counter()
+    server.run(ready)
+
+    return time.perf_counter() - start
+
+def main(args):
+    server = ForkServer()
+    server.start()
+
+    interpreter_seconds = min(time_new_interpreter(server.preload) for _ in range(args.repeat))
+    fork_seconds = min(time_fork_server(server) for _ in range(args.repeat))
+
+    logging.info(f"New interpreter: {interpreter_seconds * 1000:.1f}ms per job start")
+    logging.info(f"Fork server: {fork_seconds * 1000:.1f}ms per job start ({interpreter_seconds / fork_seconds:.0f}x faster)")
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    parser = argparse.ArgumentParser(description='Compare job start latency of a new interpreter and the fork server')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs of each, the fastest one is reported')
+
+    main(parser.parse_args())
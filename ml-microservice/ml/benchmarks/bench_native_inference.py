@@ -0,0 +1,57 @@
+from ml.config import config
+from ml.modeling.model_backends import model_backends
+from ml.modeling.native_inference import NativeInference
+import pandas as pd
+import numpy as np
+import argparse
+import logging
+import time
+
+def generate_features(feature_names, n_rows, seed=42):
+    """
+    Generate preprocessed feature rows, as the prediction pipeline hands them to the model.
+    """
+    rng = np.random.default_rng(seed)
+
+    return pd.DataFrame({feature: rng.integers(0, 50, n_rows) if 'encoded' in feature or 'lag' in feature else rng.random(n_rows) * 20 for feature in feature_names})
+
+def time_per_row(predict, data, repeat):
+    """
+    Run a prediction path on the data, returning its predictions and the fastest microseconds per row.
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        predictions = predict(data)
+        best = min(best, time.perf_counter() - start)
+
+    return predictions, best / len(data) * 1e6
+
+def main(args):
+    for model_path in [config.XGB_MODEL, config.LGB_MODEL]:
+        model = model_backends.load(model_path)
+        native = NativeInference(model, threads=args.threads)
+
+        for n_rows in args.rows:
+            data = generate_features(native.feature_names, n_rows)
+
+            before, before_latency = time_per_row(model.predict, data, args.repeat)
+            after, after_latency = time_per_row(native.predict, data, args.repeat)
+
+            # The native path must produce the same predictions
+            np.testing.assert_array_equal(after, before)
+
+            logging.info(f"{native.backend} {n_rows:>7} rows: wrapper {before_latency:.2f}us/row, native {after_latency:.2f}us/row ({before_latency / after_latency:.1f}x)")
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    # Get the arguments
+    parser = argparse.ArgumentParser(description='Benchmark the native booster prediction path against the scikit-learn wrapper')
+    parser.add_argument('--rows', type=int, nargs='+', default=[35, 700, 175000], help='Rows per prediction call')
+    parser.add_argument('--threads', type=int, default=None, help='Threads for the native path, all the CPUs if not provided')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs of each path, the fastest one is reported')
+
+    args = parser.parse_args()
+
+    main(args)
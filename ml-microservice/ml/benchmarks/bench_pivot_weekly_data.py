@@ -0,0 +1,94 @@
+from ml.preprocessing.feature_engineering_layer import FeatureEngineeringLayer
+import pandas as pd
+import numpy as np
+import argparse
+import logging
+import time
+
+DAY_COLUMNS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+
+def row_by_row_pivot(df):
+    """
+    Previous implementation of the pivot, walking the weekly records one by one, kept as the baseline.
+    """
+    daily_rows = []
+    for _, row in df.iterrows():
+        per_item_value = round(row['value'] / row['quantity'], 2) if row['quantity'] > 0 else 0
+
+        for day in DAY_COLUMNS:
+            daily_rows.append({
+                'product_id': row['product_id'],
+                'original_product_id': row['original_product_id'],
+                'product_name': row['product_name'],
+                'category': row['category'],
+                'product_id_encoded': row['product_id_encoded'],
+                'category_encoded': row['category_encoded'],
+                'quantity': row[day],
+                'per_item_value': per_item_value,
+                'in_stock': row['in_stock'],
+                'year': row['year'],
+                'week': row['week'],
+                'weekday': day
+            })
+
+    return pd.DataFrame(daily_rows)
+
+def generate_weekly_data(n_products, n_weeks, seed=42):
+    """
+    Generate cleaned weekly records for a number of products and weeks.
+    """
+    rng = np.random.default_rng(seed)
+    n_rows = n_products * n_weeks
+
+    df = pd.DataFrame({
+        'product_id': np.repeat([f'{i:08x}' for i in range(n_products)], n_weeks),
+        'original_product_id': np.repeat([str(i) for i in range(n_products)], n_weeks),
+        'product_name': np.repeat([f'Product {i}' for i in range(n_products)], n_weeks),
+        'category': np.repeat([f'category_{i % 20}' for i in range(n_products)], n_weeks),
+        'product_id_encoded': np.repeat(np.arange(n_products), n_weeks),
+        'category_encoded': np.repeat(np.arange(n_products) % 20, n_weeks),
+        'in_stock': rng.integers(0, 2, n_rows),
+        'year': 2020 + np.tile(np.arange(n_weeks) // 52, n_products),
+        'week': np.tile(np.arange(n_weeks) % 52 + 1, n_products),
+    })
+    for day in DAY_COLUMNS:
+        df[day] = rng.integers(0, 10, n_rows)
+    df['quantity'] = df[DAY_COLUMNS].sum(axis=1)
+    df['value'] = np.round(df['quantity'] * rng.uniform(0.5, 20, n_rows), 2)
+
+    return df
+
+def time_pivot(pivot, df):
+    """
+    Run a pivot implementation, returning its output and the weekly rows processed per second.
+    """
+    start = time.perf_counter()
+    result = pivot(df)
+    elapsed = time.perf_counter() - start
+
+    return result, len(df) / elapsed
+
+def main(args):
+    df = generate_weekly_data(args.products, args.weeks)
+    logging.info(f"Pivoting {len(df)} weekly records...")
+
+    before, before_rate = time_pivot(row_by_row_pivot, df)
+    after, after_rate = time_pivot(FeatureEngineeringLayer(df).pivot_weekly_data, df)
+
+    # The vectorised pivot must produce the same records
+    pd.testing.assert_frame_equal(after, before)
+
+    logging.info(f"Row by row: {before_rate:,.0f} rows/sec")
+    logging.info(f"Vectorised: {after_rate:,.0f} rows/sec ({after_rate / before_rate:.1f}x)")
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    # Get the arguments
+    parser = argparse.ArgumentParser(description='Benchmark the weekly to daily pivot')
+    parser.add_argument('--products', type=int, default=1000, help='Number of products')
+    parser.add_argument('--weeks', type=int, default=104, help='Number of weeks per product')
+
+    args = parser.parse_args()
+
+    main(args)
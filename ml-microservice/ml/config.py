@@ -4,11 +4,38 @@ class Config:
     HISTORICAL_DATA_RAW = './ml/data/historical/raw'
     HISTORICAL_DATA_PROCESSED = './ml/data/historical/processed'
     HISTORICAL_DATA_BACKUP = './ml/data/historical/backup'
+    PROCESSED_DATASET = f'{HISTORICAL_DATA_PROCESSED}/processed_data'  # Parquet dataset, partitioned by month
+    RAW_FILE_MANIFEST = f'{HISTORICAL_DATA_PROCESSED}/raw_file_manifest.json'  # Raw files already preprocessed, by content hash
     MAPPINGS = './ml/data/mappings'
+    FEATURE_HISTORY = './ml/data/history/feature_history.npz'
+    FORECASTS = './ml/data/forecasts'
+    STAGE_CACHE = './ml/data/cache/stages'  # Checkpoints of the preprocessing stages
 
     # ML related info
     TARGET = 'quantity'
 
+    TIME_SERIES_PERIODS = [1, 7, 14, 30, 90, 365]  # Days of lags and rolling averages
+    FEATURE_HISTORY_DAYS = 365  # Days of sales kept per product for prediction requests
+    FEATURE_HISTORY_FLUSH_SECONDS = 5  # Most seconds new observations wait before the feature history is saved, outside the requests
+    PROCESSED_DATA_COMPRESSION = 'zstd'  # Parquet compression of the processed data
+    BACKUP_KEEP_LAST = 7  # Latest backups of the processed data kept
+    BACKUP_KEEP_DAILY = 14  # Days whose latest backup is kept
+    BACKUP_KEEP_WEEKLY = 8  # Weeks whose latest backup is kept
+    STAGE_CHECKPOINTS = True  # Checkpoint the historical preprocessing stages, so runs resumed with the same input reuse them
+    STAGE_CACHE_MAX_BYTES = 1024 * 1024 * 1024  # Disk used by the checkpoints, the least recently used ones deleted beyond it
+    INGESTION_WORKERS = None  # Threads reading the raw files of a directory, all the CPUs if None
+    PREDICTION_BATCH_ROWS = 50_000  # Rows predicted at a time when streaming predictions
+    INFERENCE_BATCHING = True  # Predict the live requests arriving together in a single call
+    INFERENCE_BATCH_MAX_LATENCY = 0.005  # Seconds the first request of a batch waits for others
+    INFERENCE_BATCH_MAX_ROWS = 200_000  # Rows at which a batch is predicted without waiting further
+    NATIVE_INFERENCE = True  # Predict XGBoost and LightGBM models with their native booster on NumPy arrays
+    INFERENCE_THREADS = None  # Threads per prediction, all the CPUs if None
+    PREDICTION_CACHE = True  # Reuse the predictions of rows with the same features and model version
+    PREDICTION_CACHE_MAX_BYTES = 64 * 1024 * 1024  # Memory of the cached predictions, measured as they're stored
+    PREDICTION_CACHE_TTL_SECONDS = 2 * 24 * 60 * 60  # Long enough for consecutive daily runs to reuse them
+    FORECAST_HORIZON_DAYS = 35  # Days forecast by the batch forecast
+    FORECAST_ACTIVE_DAYS = 90  # Products with sales in these last days of the feature history are forecast
+
     LEAST_FEATURES = [
         'product_id_encoded', 'category_encoded', 'quantity_lag_1',
         'quantity_lag_7', 'quantity_rolling_avg_7', 'quantity_rolling_avg_30',
@@ -32,7 +59,11 @@ class Config:
     LGB_MODEL = f'{MODELS}/lightgbm_model_20240928_134943.pkl'
     LSTM_MODEL = f'{MODELS}/lstm_model_20241006_160216.keras'
 
-    MAIN_MODEL = XGB_MODEL  # To practically set the one used
+    MAIN_MODEL = XGB_MODEL  # To practically set the one used, or its .npz export (ml/scripts/export_tree_ensemble.py) to serve without XGBoost or LightGBM
+
+    # Loaded models kept in memory between requests
+    MODEL_CACHE_MAX_BYTES = 512 * 1024 * 1024
+    MODEL_CACHE_IDLE_SECONDS = 60 * 60
 
     # Scripts
     SCRIPTS = './scripts'
@@ -0,0 +1,181 @@
+from ml.config import config
+from datetime import datetime
+import pandas as pd
+import numpy as np
+import threading
+import logging
+import shutil
+import os
+
+class ForecastStore:
+
+    MISSING = -1  # Value of the products and days without a forecast
+
+    def __init__(self, directory=None, keep_runs=2):
+        """
+        Initialise a store of precomputed forecasts, a products x days matrix memory-mapped from disk,
+        so a forecast is looked up by product and date without running the model.
+        Each batch run is written to its own directory, and the 'CURRENT' file names the one served.
+        """
+        self.directory = directory or config.FORECASTS
+        self.keep_runs = keep_runs  # Runs kept on disk, the older ones are deleted
+        self.lock = threading.Lock()
+        self.version = None  # Version of the 'CURRENT' file the store was loaded from
+        self.run = None  # Run served, replaced as a whole so lookups never see parts of two runs
+
+    def current_path(self):
+        """
+        Get the path of the file naming the run served.
+        """
+        return os.path.join(self.directory, 'CURRENT')
+
+    def file_version(self):
+        """
+        Identify the run served by the modification time and size of the 'CURRENT' file.
+        """
+        try:
+            stat = os.stat(self.current_path())
+        except OSError:
+            return None
+
+        return stat.st_mtime_ns, stat.st_size
+
+    def refresh(self):
+        """
+        Load the run served if it changed since it was last read, e.g. after the nightly batch forecast.
+        """
+        version = self.file_version()
+        if version == self.version:
+            return
+
+        with self.lock:
+            if version == self.version:
+                return
+
+            if version is None:
+                self.run, self.version = None, None
+                return
+
+            try:
+                with open(self.current_path()) as file:
+                    run_id = file.read().strip()
+                run_path = os.path.join(self.directory, run_id)
+
+                with np.load(os.path.join(run_path, 'index.npz'), allow_pickle=False) as index:
+                    run = {
+                        'run_id': run_id,
+                        'rows': {source_id: row for row, source_id in enumerate(index['source_product_ids'].tolist())},  # Client product ID -> row
+                        'start_date': index['start_date'][0],  # First day forecast
+                        'generated_at': str(index['generated_at']),
+                        'model_path': str(index['model_path']),
+                    }
+
+                # Products x days, its pages read on lookup and shared by the processes serving the same run
+                run['values'] = np.load(os.path.join(run_path, 'values.npy'), mmap_mode='r')
+
+                self.run, self.version = run, version
+
+                logging.info(f"Forecasts loaded from run {run_id} ({len(run['rows'])} products, {run['values'].shape[1]} days)")
+            except Exception as e:
+                logging.error(f"Error loading forecasts from {self.directory}: {e}")
+
+    def current_run(self):
+        """
+        Get the details of the run served, None if no forecasts have been published.
+        """
+        self.refresh()
+
+        run = self.run
+        if run is None:
+            return None
+
+        return {'run_id': run['run_id'], 'generated_at': run['generated_at'], 'model_path': run['model_path'],
+                'start_date': str(run['start_date']), 'days': run['values'].shape[1], 'products': len(run['rows'])}
+
+    def lookup(self, source_product_ids, start_date=None, end_date=None):
+        """
+        Look up the forecasts of products between two dates (included), the whole horizon by default.
+        Returns the forecasts with 'product_id', 'date' and 'value' columns, and the product IDs without forecasts.
+        """
+        self.refresh()
+
+        run = self.run
+        if run is None:
+            return pd.DataFrame(columns=['product_id', 'date', 'value']), list(source_product_ids)
+        rows, values, first_date = run['rows'], run['values'], run['start_date']
+
+        found_ids = [str(source_id) for source_id in source_product_ids if str(source_id) in rows]
+        missing_ids = [source_id for source_id in source_product_ids if str(source_id) not in rows]
+
+        # Days of the horizon between the dates
+        first_day = 0 if start_date is None else max(int((np.datetime64(start_date, 'D') - first_date) / np.timedelta64(1, 'D')), 0)
+        last_day = values.shape[1] - 1 if end_date is None else max(min(int((np.datetime64(end_date, 'D') - first_date) / np.timedelta64(1, 'D')), values.shape[1] - 1), -1)
+
+        # No forecasts for dates outside the horizon
+        if first_day > last_day:
+            return pd.DataFrame(columns=['product_id', 'date', 'value']), missing_ids
+
+        days = np.arange(first_day, last_day + 1)
+
+        forecasts = values[np.array([rows[source_id] for source_id in found_ids], dtype=np.intp)][:, first_day:last_day + 1]
+        product_rows, day_columns = np.nonzero(forecasts != self.MISSING)
+
+        forecasts_df = pd.DataFrame({
+            'product_id': np.array(found_ids, dtype=object)[product_rows],
+            'date': np.datetime_as_string(first_date + days[day_columns].astype('timedelta64[D]'), unit='D').astype(object),
+            'value': forecasts[product_rows, day_columns].astype(int),
+        })
+
+        return forecasts_df, missing_ids
+
+    def publish(self, predictions_df, model_path=None):
+        """
+        Save the forecasts of a batch run, with 'product_id', 'date' and 'value' columns, and serve them in place of the previous run.
+        """
+        product_codes, source_product_ids = pd.factorize(predictions_df['product_id'].astype(str))
+        dates = pd.to_datetime(predictions_df['date']).to_numpy().astype('datetime64[D]')
+        start_date = dates.min()
+        day_columns = ((dates - start_date) / np.timedelta64(1, 'D')).astype(int)
+
+        # Products x days, missing where a product has no forecast for a day
+        values = np.full((len(source_product_ids), day_columns.max() + 1), self.MISSING, dtype=np.int32)
+        values[product_codes, day_columns] = predictions_df['value'].to_numpy(dtype=np.int32)
+
+        # Write the run to its own directory, then point the 'CURRENT' file at it in one step
+        generated_at = datetime.now()
+        run_id = generated_at.strftime('%Y%m%d_%H%M%S_%f')
+        run_path = os.path.join(self.directory, run_id)
+        os.makedirs(run_path)
+
+        np.save(os.path.join(run_path, 'values.npy'), values)
+        np.savez(
+            os.path.join(run_path, 'index.npz'),
+            source_product_ids=source_product_ids.to_numpy(dtype=str),
+            start_date=np.array([start_date], dtype='datetime64[D]'),
+            generated_at=np.array(generated_at.isoformat(timespec='seconds')),
+            model_path=np.array(model_path or ''),
+        )
+
+        temp_path = f'{self.current_path()}.{os.getpid()}.tmp'
+        with open(temp_path, 'w') as file:
+            file.write(run_id)
+        os.replace(temp_path, self.current_path())
+
+        logging.info(f"Forecasts published as run {run_id} ({values.shape[0]} products, {values.shape[1]} days)")
+
+        self.prune(run_id)
+
+        return run_id
+
+    def prune(self, current_run_id):
+        """
+        Delete the oldest runs beyond the ones kept, never the one served.
+        Processes still mapping a deleted run keep reading it until they refresh.
+        """
+        runs = sorted(name for name in os.listdir(self.directory) if os.path.isdir(os.path.join(self.directory, name)))
+
+        for run_id in runs[:-self.keep_runs]:
+            if run_id != current_run_id:
+                shutil.rmtree(os.path.join(self.directory, run_id), ignore_errors=True)
+
+forecast_store = ForecastStore()
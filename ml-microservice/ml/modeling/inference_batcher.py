@@ -0,0 +1,141 @@
+from ml.config import config
+from ml.modeling.native_inference import native_inference
+import pandas as pd
+import numpy as np
+import threading
+import logging
+import time
+
+class PendingBatch:
+
+    def __init__(self):
+        """
+        Initialise a batch collecting the feature matrices of concurrent requests.
+        """
+        self.frames = []
+        self.rows = 0
+        self.done = threading.Event()
+        self.predictions = None
+        self.error = None
+
+    def add(self, data):
+        """
+        Add a request's feature matrix, returning its position in the batch.
+        """
+        self.frames.append(data)
+        self.rows += len(data)
+
+        return len(self.frames) - 1
+
+class InferenceBatcher:
+
+    def __init__(self, max_latency=None, max_batch_rows=None):
+        """
+        Initialise a batcher running a single predict call for the feature matrices of concurrent requests.
+        A batch is predicted once its first request has waited the max latency, or once it reaches the max rows.
+        """
+        self.max_latency = config.INFERENCE_BATCH_MAX_LATENCY if max_latency is None else max_latency
+        self.max_batch_rows = max_batch_rows or config.INFERENCE_BATCH_MAX_ROWS
+        self.pending = {}  # (model, columns) -> batch collecting requests
+        self.condition = threading.Condition()
+        self.reset_metrics()
+
+    def reset_metrics(self):
+        """
+        Reset the counts of batches, requests and rows predicted.
+        """
+        with self.condition:
+            self.batches = 0
+            self.requests = 0
+            self.rows = 0
+            self.max_requests_per_batch = 0
+            self.fill_ratios = np.zeros(10, dtype=int)  # Batches by tenths of the max rows filled
+
+    def predict(self, model, data):
+        """
+        Predict a feature matrix with the model, batched with the matrices of other requests for the same model and features.
+        """
+        key = (id(model), tuple(data.columns))
+
+        with self.condition:
+            batch = self.pending.get(key)
+            leader = batch is None
+            if leader:
+                batch = PendingBatch()
+                self.pending[key] = batch
+
+            position = batch.add(data)
+
+            if batch.rows >= self.max_batch_rows:
+                self.condition.notify_all()
+
+            # The first request waits for others to join, then predicts the batch for all of them
+            if leader:
+                deadline = time.monotonic() + self.max_latency
+                while batch.rows < self.max_batch_rows:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.condition.wait(remaining)
+
+                # Later requests start a new batch
+                del self.pending[key]
+
+        if leader:
+            self.run_batch(model, batch)
+        else:
+            batch.done.wait()
+
+        if batch.error is not None:
+            raise batch.error
+
+        return batch.predictions[position]
+
+    def run_batch(self, model, batch):
+        """
+        Predict a batch in one call and split the predictions back by request.
+        """
+        try:
+            combined = batch.frames[0] if len(batch.frames) == 1 else pd.concat(batch.frames, ignore_index=True)
+            predictions = np.asarray(native_inference.predict(model, combined))
+
+            offsets = np.cumsum([len(frame) for frame in batch.frames])[:-1]
+            batch.predictions = np.split(predictions, offsets)
+        except Exception as e:
+            batch.error = e
+        finally:
+            self.record_batch(batch)
+            batch.done.set()
+
+    def record_batch(self, batch):
+        """
+        Count a predicted batch in the metrics.
+        """
+        with self.condition:
+            self.batches += 1
+            self.requests += len(batch.frames)
+            self.rows += batch.rows
+            self.max_requests_per_batch = max(self.max_requests_per_batch, len(batch.frames))
+            self.fill_ratios[min(int(batch.rows / self.max_batch_rows * 10), 9)] += 1
+
+        logging.info(f"Inference batch of {len(batch.frames)} requests predicted ({batch.rows} rows)")
+
+    def metrics(self):
+        """
+        Summarise how full the batches are.
+        """
+        with self.condition:
+            return {
+                'batches': self.batches,
+                'requests': self.requests,
+                'rows': self.rows,
+                'requests_per_batch': self.requests / self.batches if self.batches else 0,
+                'max_requests_per_batch': self.max_requests_per_batch,
+                'rows_per_batch': self.rows / self.batches if self.batches else 0,
+                'fill_ratio': self.rows / (self.batches * self.max_batch_rows) if self.batches else 0,
+                'fill_ratio_histogram': {f'{tenth * 10}-{tenth * 10 + 10}%': int(count) for tenth, count in enumerate(self.fill_ratios)},
+                'max_latency': self.max_latency,
+                'max_batch_rows': self.max_batch_rows,
+            }
+
+inference_batcher = InferenceBatcher()
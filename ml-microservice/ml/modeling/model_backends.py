@@ -0,0 +1,134 @@
+import importlib
+import logging
+import time
+import os
+
+def load_joblib_model(path):
+    """
+    Load a pickled model, e.g. a scikit-learn compatible XGBoost or LightGBM regressor.
+    """
+    import joblib
+
+    return joblib.load(path)
+
+def load_xgboost_model(path):
+    """
+    Load an XGBoost model, pickled or saved in its native format.
+    """
+    if path.endswith('.pkl'):
+        return load_joblib_model(path)
+
+    import xgboost as xgb
+
+    model = xgb.XGBRegressor()
+    model.load_model(path)
+
+    return model
+
+def load_lightgbm_model(path):
+    """
+    Load a LightGBM model, pickled or saved in its native text format.
+    """
+    if path.endswith('.pkl'):
+        return load_joblib_model(path)
+
+    import lightgbm as lgb
+
+    return lgb.Booster(model_file=path)
+
+def load_tree_ensemble_model(path):
+    """
+    Load a tree ensemble exported from an XGBoost or LightGBM model, predicted with NumPy alone.
+    """
+    from ml.modeling.tree_ensemble import TreeEnsemble
+
+    return TreeEnsemble.load(path)
+
+def load_keras_model(path):
+    """
+    Load a Keras model.
+    """
+    from tensorflow.keras.models import load_model
+
+    return load_model(path)
+
+class ModelBackendRegistry:
+
+    def __init__(self):
+        self.backends = {}  # Backend name -> modules, loader and file extensions
+        self.import_times = {}  # Backend name -> seconds spent importing its modules
+
+    def register(self, name, loader, modules=(), extensions=()):
+        """
+        Register a backend with the modules it needs imported before its models are loaded.
+        """
+        self.backends[name] = {
+            'loader': loader,
+            'modules': list(modules),
+            'extensions': list(extensions),
+        }
+
+    def backend_for(self, path):
+        """
+        Find the backend for a model file, by its extension or, for pickles, by the model type prefixing the filename.
+        """
+        filename = os.path.basename(path)
+        extension = os.path.splitext(filename)[1]
+
+        # Pickles are saved as '{model_type}_model_{version}.pkl' by the trainer
+        if extension == '.pkl':
+            model_type = filename.split('_model_')[0]
+            if model_type in self.backends:
+                return model_type
+
+        for name, backend in self.backends.items():
+            if extension in backend['extensions']:
+                return name
+
+        return 'joblib'
+
+    def import_backend(self, name):
+        """
+        Import the modules of a backend the first time it's used, timing the import.
+        """
+        if name in self.import_times:
+            return
+
+        start = time.perf_counter()
+        for module in self.backends[name]['modules']:
+            importlib.import_module(module)
+        self.import_times[name] = time.perf_counter() - start
+
+        logging.info(f"Model backend '{name}' imported in {self.import_times[name]:.3f}s")
+
+    def load(self, path):
+        """
+        Load a model with the backend that matches its file.
+        """
+        name = self.backend_for(path)
+        self.import_backend(name)
+
+        return self.backends[name]['loader'](path)
+
+    def import_report(self):
+        """
+        Report the import cost of each backend, None for the ones not imported yet.
+        """
+        return {name: self.import_times.get(name) for name in self.backends}
+
+    def log_import_report(self):
+        """
+        Log the import cost of each backend.
+        """
+        for name, seconds in self.import_report().items():
+            if seconds is None:
+                logging.info(f"Model backend '{name}': not imported")
+            else:
+                logging.info(f"Model backend '{name}': imported in {seconds:.3f}s")
+
+model_backends = ModelBackendRegistry()
+model_backends.register('joblib', load_joblib_model, modules=['joblib'])
+model_backends.register('xgboost', load_xgboost_model, modules=['joblib', 'xgboost'], extensions=['.json', '.ubj'])
+model_backends.register('lightgbm', load_lightgbm_model, modules=['joblib', 'lightgbm'], extensions=['.txt'])
+model_backends.register('tree_ensemble', load_tree_ensemble_model, modules=['numpy'], extensions=['.npz'])
+model_backends.register('keras', load_keras_model, modules=['tensorflow'], extensions=['.keras', '.h5'])
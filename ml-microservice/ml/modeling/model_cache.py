@@ -0,0 +1,136 @@
+from ml.config import config
+from collections import OrderedDict
+import threading
+import logging
+import time
+import os
+
+class ModelCache:
+
+    def __init__(self, max_bytes=None, idle_seconds=None):
+        """
+        Initialise a process-wide cache of loaded models, keyed by artifact path and version.
+        """
+        self.max_bytes = max_bytes or config.MODEL_CACHE_MAX_BYTES
+        self.idle_seconds = idle_seconds or config.MODEL_CACHE_IDLE_SECONDS
+        self.entries = OrderedDict()  # (path, version) -> entry, least recently used first
+        self.loading = {}  # (path, version) -> lock held while the artifact is loaded, so it's loaded once
+        self.lock = threading.RLock()
+
+    def artifact_version(self, path):
+        """
+        Identify the version of a model artifact on disk by its modification time and size.
+        """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+
+        return stat.st_mtime_ns, stat.st_size
+
+    def get(self, path, loader):
+        """
+        Return the model stored at a path, loading it with the given loader only if it's not cached or it changed on disk.
+        """
+        version = self.artifact_version(path)
+
+        # Artifacts that can't be versioned are not cached
+        if version is None:
+            return loader(path)
+
+        key = (os.path.abspath(path), version)
+
+        with self.lock:
+            self.evict_idle()
+
+            # Serve the warm model if the artifact has not changed
+            model = self.lookup(key)
+            if model is not None:
+                return model
+
+            load_lock = self.loading.setdefault(key, threading.Lock())
+
+        # Load outside the cache's lock, so other models are served meanwhile, and only once for threads wanting the same one
+        with load_lock:
+            with self.lock:
+                model = self.lookup(key)
+                if model is not None:
+                    return model
+
+            try:
+                model = loader(path)
+            finally:
+                with self.lock:
+                    self.loading.pop(key, None)
+
+            # Drop any stale versions of the same artifact
+            with self.lock:
+                self.discard(key[0])
+                self.entries[key] = {
+                    'model': model,
+                    'size': version[1],
+                    'last_used': time.monotonic(),
+                }
+                logging.info(f"Model cached: {path}")
+
+                self.enforce_budget()
+
+        return model
+
+    def lookup(self, key):
+        """
+        Return a cached model, marking it as recently used, None if it's not cached.
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+
+            entry['last_used'] = time.monotonic()
+            self.entries.move_to_end(key)
+
+            return entry['model']
+
+    def discard(self, path):
+        """
+        Remove every cached version of the artifact at a path.
+        """
+        with self.lock:
+            for key in [key for key in self.entries if key[0] == os.path.abspath(path)]:
+                del self.entries[key]
+
+    def evict_idle(self):
+        """
+        Remove models that have not been used within the idle period.
+        """
+        now = time.monotonic()
+
+        with self.lock:
+            for key in [key for key, entry in self.entries.items() if now - entry['last_used'] > self.idle_seconds]:
+                del self.entries[key]
+                logging.info(f"Idle model evicted: {key[0]}")
+
+    def enforce_budget(self):
+        """
+        Remove the least recently used models until the cache fits in the memory budget, always keeping the latest one.
+        """
+        with self.lock:
+            while len(self.entries) > 1 and self.size() > self.max_bytes:
+                key, _ = self.entries.popitem(last=False)
+                logging.info(f"Model evicted to fit the memory budget: {key[0]}")
+
+    def size(self):
+        """
+        Estimate the memory used by the cached models from their artifact sizes.
+        """
+        with self.lock:
+            return sum(entry['size'] for entry in self.entries.values())
+
+    def clear(self):
+        """
+        Remove all cached models.
+        """
+        with self.lock:
+            self.entries.clear()
+
+model_cache = ModelCache()
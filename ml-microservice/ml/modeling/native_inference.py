@@ -0,0 +1,96 @@
+from ml.config import config
+import numpy as np
+import threading
+import weakref
+import logging
+import os
+
+class NativeInference:
+
+    def __init__(self, model, threads=None):
+        """
+        Initialise a fast prediction path calling the native booster of an XGBoost or LightGBM scikit-learn model on a NumPy array,
+        skipping the wrapper's DataFrame conversion and validation.
+        """
+        self.threads = threads or config.INFERENCE_THREADS or os.cpu_count()
+        self.backend = type(model).__module__.split('.')[0]
+
+        if self.backend == 'xgboost':
+            self.booster = model.get_booster()
+            self.feature_names = self.booster.feature_names
+            self.dtype = np.float32  # XGBoost compares float32 values internally
+            self.booster.set_param({'nthread': self.threads})
+
+            # Same trees as the wrapper's predict, which stops at the best iteration if trained with early stopping
+            best_iteration = model.best_iteration if hasattr(model, 'best_iteration') else None
+            self.iteration_range = (0, best_iteration + 1) if best_iteration is not None else (0, 0)
+        elif self.backend == 'lightgbm':
+            self.booster = model.booster_
+            self.feature_names = self.booster.feature_name()
+            self.dtype = np.float64  # LightGBM compares float64 values, float32 would shift some split decisions
+        else:
+            raise ValueError(f"No native inference for {type(model).__name__} models")
+
+    def prepare(self, data):
+        """
+        Lay out the features as a C-contiguous array, in the order the model was trained on.
+        """
+        if hasattr(data, 'columns') and self.feature_names:
+            data = data[self.feature_names]
+
+        return np.ascontiguousarray(data, dtype=self.dtype)
+
+    def predict(self, data):
+        """
+        Predict with the native booster, using the configured number of threads.
+        """
+        features = self.prepare(data)
+
+        if self.backend == 'xgboost':
+            return self.booster.inplace_predict(features, iteration_range=self.iteration_range, validate_features=False)
+
+        return self.booster.predict(features, num_threads=self.threads)
+
+class NativeInferenceRegistry:
+
+    def __init__(self):
+        """
+        Initialise the fast prediction paths of the loaded models, dropped along with their models.
+        """
+        self.paths = weakref.WeakKeyDictionary()  # Model -> fast path, None if the model has none
+        self.lock = threading.Lock()
+
+    def path_for(self, model):
+        """
+        Get the fast prediction path of a model, None if it's not an XGBoost or LightGBM model.
+        """
+        with self.lock:
+            try:
+                return self.paths[model]
+            except (KeyError, TypeError):
+                pass
+
+            try:
+                path = NativeInference(model)
+            except Exception as e:
+                logging.info(f"Native inference not available for {type(model).__name__}: {e}")
+                path = None
+
+            try:
+                self.paths[model] = path
+            except TypeError:
+                pass  # Models that can't be weakly referenced aren't remembered
+
+            return path
+
+    def predict(self, model, data):
+        """
+        Predict with the model's fast path if it has one, its own predict method otherwise.
+        """
+        path = self.path_for(model) if config.NATIVE_INFERENCE else None
+        if path is None:
+            return model.predict(data)
+
+        return path.predict(data)
+
+native_inference = NativeInferenceRegistry()
@@ -0,0 +1,161 @@
+from ml.config import config
+from collections import OrderedDict
+import pandas as pd
+import numpy as np
+import threading
+import logging
+import time
+import sys
+
+class PredictionCache:
+
+    def __init__(self, max_bytes=None, ttl_seconds=None):
+        """
+        Initialise a process-wide cache of row predictions, keyed by the model version and a 64-bit hash of the feature row,
+        so rows scored with identical features by consecutive runs are not predicted again.
+        """
+        self.max_bytes = max_bytes or config.PREDICTION_CACHE_MAX_BYTES
+        self.ttl_seconds = ttl_seconds or config.PREDICTION_CACHE_TTL_SECONDS
+        self.entries = OrderedDict()  # (model version, row hash) -> prediction and expiry time, least recently used first
+        self.entry_bytes = 0  # Memory of the entries' keys and values, measured as they're stored
+        self.lock = threading.Lock()
+        self.reset_metrics()
+
+    def reset_metrics(self):
+        """
+        Reset the counts of hits, misses and evictions.
+        """
+        with self.lock:
+            self.hits = 0
+            self.misses = 0
+            self.expired = 0
+            self.evicted = 0
+
+    def measure(self, key, entry):
+        """
+        Measure the memory of an entry: its key and value tuples, the row hash and the prediction.
+        The model version and expiry time are shared by many entries, so they're not counted.
+        """
+        return sys.getsizeof(key) + sys.getsizeof(key[1]) + sys.getsizeof(entry) + sys.getsizeof(entry[0])
+
+    def size(self):
+        """
+        Get the memory of the cache: the entries measured as they're stored, and the dictionary holding them.
+        """
+        return self.entry_bytes + sys.getsizeof(self.entries)
+
+    def remove(self, key):
+        """
+        Remove an entry, no longer counting its memory.
+        """
+        self.entry_bytes -= self.measure(key, self.entries.pop(key))
+
+    def hash_rows(self, data):
+        """
+        Hash each feature row, the same values in the same columns and types giving the same hash.
+        """
+        return pd.util.hash_pandas_object(data, index=False).to_numpy()
+
+    def lookup(self, model_version, row_hashes):
+        """
+        Look up the predictions of hashed rows, returning them with a mask of the rows found.
+        """
+        predictions = np.zeros(len(row_hashes), dtype=np.float64)
+        found = np.zeros(len(row_hashes), dtype=bool)
+        now = time.monotonic()
+
+        with self.lock:
+            for position, row_hash in enumerate(row_hashes.tolist()):
+                key = (model_version, row_hash)
+                entry = self.entries.get(key)
+                if entry is None:
+                    continue
+
+                # Expired entries are dropped when found
+                if entry[1] < now:
+                    self.remove(key)
+                    self.expired += 1
+                    continue
+
+                self.entries.move_to_end(key)
+                predictions[position] = entry[0]
+                found[position] = True
+
+            self.hits += int(found.sum())
+            self.misses += len(row_hashes) - int(found.sum())
+
+        return predictions, found
+
+    def store(self, model_version, row_hashes, predictions):
+        """
+        Store the predictions of hashed rows, evicting the least recently used ones beyond the memory budget.
+        """
+        expires_at = time.monotonic() + self.ttl_seconds
+
+        with self.lock:
+            for row_hash, prediction in zip(row_hashes.tolist(), predictions.tolist()):
+                key = (model_version, row_hash)
+                if key in self.entries:
+                    self.remove(key)
+
+                entry = (prediction, expires_at)
+                self.entries[key] = entry
+                self.entry_bytes += self.measure(key, entry)
+
+            # Always keep the latest entry
+            while len(self.entries) > 1 and self.size() > self.max_bytes:
+                self.remove(next(iter(self.entries)))
+                self.evicted += 1
+
+    def predict(self, model_version, data, predict):
+        """
+        Predict a feature matrix, calling `predict(rows)` only for the rows not cached for the model version.
+        """
+        row_hashes = self.hash_rows(data)
+        predictions, found = self.lookup(model_version, row_hashes)
+
+        if found.all():
+            return predictions
+
+        # Predict the rows that missed, in their order
+        missed = np.flatnonzero(~found)
+        missed_predictions = np.asarray(predict(data.iloc[missed] if len(missed) < len(data) else data), dtype=np.float64)
+
+        # Models predicting more than a value per row are not cached
+        if missed_predictions.size != len(missed):
+            logging.warning(f"Predictions not cached, expected one per row but got shape {missed_predictions.shape}")
+            return predict(data) if len(missed) < len(data) else missed_predictions
+
+        predictions[missed] = missed_predictions.reshape(-1)
+        self.store(model_version, row_hashes[missed], predictions[missed])
+
+        return predictions
+
+    def metrics(self):
+        """
+        Summarise how much inference the cache saves.
+        """
+        with self.lock:
+            lookups = self.hits + self.misses
+
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else 0,
+                'entries': len(self.entries),
+                'bytes': self.size(),
+                'max_bytes': self.max_bytes,
+                'expired': self.expired,
+                'evicted': self.evicted,
+                'ttl_seconds': self.ttl_seconds,
+            }
+
+    def clear(self):
+        """
+        Remove all cached predictions.
+        """
+        with self.lock:
+            self.entries.clear()
+            self.entry_bytes = 0
+
+prediction_cache = PredictionCache()
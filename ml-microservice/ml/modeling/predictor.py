@@ -1,8 +1,11 @@
 from ml.config import config
-from tensorflow.keras.models import load_model
+from ml.modeling.model_cache import model_cache
+from ml.modeling.model_backends import model_backends
+from ml.modeling.inference_batcher import inference_batcher
+from ml.modeling.native_inference import native_inference
+from ml.modeling.prediction_cache import prediction_cache
 import pandas as pd
 import numpy as np
-import joblib
 import logging
 import os
 
@@ -14,22 +17,43 @@ class Predictor:
 
     def load_model(self):
         """
-        Load the saved model, Keras or scikit-learn based.
+        Load the saved model, Keras or scikit-learn based, reusing the cached one if the file has not changed.
         """
         try:
-            self.model = joblib.load(self.model_path)
+            self.model = model_cache.get(self.model_path, model_backends.load)
 
             logging.info(f"Model loaded")
         except Exception as e:
             logging.error(f"Error loading the model: {str(e)}")
             raise RuntimeError(f"Failed to load model. Error: {str(e)}")
 
-    def make_predictions(self, data):
+    def model_version(self):
         """
-        Make predictions using the loaded model.
+        Identify the loaded model by its artifact's path and version, None if the artifact can't be versioned.
         """
+        version = model_cache.artifact_version(self.model_path)
+        if version is None:
+            return None
+
+        return os.path.abspath(self.model_path), version
+
+    def make_predictions(self, data, batched=False, cached=False):
+        """
+        Make predictions using the loaded model, in a single call with other concurrent requests if batched.
+        If cached, only the rows not predicted before with the same features and model version are sent to the model.
+        """
+        def predict(rows):
+            if batched and config.INFERENCE_BATCHING:
+                return inference_batcher.predict(self.model, rows)
+
+            return native_inference.predict(self.model, rows)
+
         try:
-            predictions = self.model.predict(data)
+            model_version = self.model_version() if cached and config.PREDICTION_CACHE else None
+            if model_version is not None:
+                predictions = prediction_cache.predict(model_version, data, predict)
+            else:
+                predictions = predict(data)
 
             logging.info(f"Predictions made")
 
@@ -42,16 +66,19 @@ class Predictor:
         """
         Transform predictions to a structure and format readily-usable for demand forecast.
         """
+        # Format each distinct date once, as there are far fewer dates than predictions (missing dates pick the trailing NaN)
+        date_codes, unique_dates = pd.factorize(np.asarray(dates))
+        if not pd.api.types.is_datetime64_any_dtype(unique_dates):
+            unique_dates = pd.to_datetime(unique_dates)
+        formatted_dates = np.append(pd.DatetimeIndex(unique_dates).strftime('%Y-%m-%d').to_numpy(dtype=object), np.nan)[date_codes]
+
         # Create a DataFrame
         predictions_df = pd.DataFrame({
             'product_id': source_product_ids,
-            'date': dates,
+            'date': formatted_dates,
             'value': predictions
         })
 
-        # Format the date
-        predictions_df['date'] = pd.to_datetime(predictions_df['date']).dt.strftime('%Y-%m-%d')
-
         # Round to nearest integer and convert negatives to 0
         predictions_df['value'] = predictions_df['value'].round(0).clip(lower=0).astype(int)
 
@@ -88,14 +115,39 @@ class Predictor:
         # Load the model
         self.load_model()
 
-        # Make predictions
-        predictions = self.make_predictions(data)
+        # Make predictions, batched with other live requests and reusing the cached ones
+        predictions = self.make_predictions(data, batched=True, cached=True)
 
         # Prepare results and return them
         predictions_df = self.transform_predictions(predictions, source_product_ids, dates)
 
         return predictions_df
 
+    def iter_live_predictions(self, data, source_product_ids, dates, batch_rows=None):
+        """
+        Make live predictions a batch of rows at a time, returning an iterator of each batch's results.
+        The data is checked and the model loaded straight away, so errors are raised before any batch is predicted.
+        """
+        logging.info("Running live predictions in batches...")
+
+        # Check the data for any issues
+        self.sanity_check(data)
+
+        # Load the model
+        self.load_model()
+
+        return self.predict_batches(data, pd.Series(source_product_ids), pd.Series(dates), batch_rows or config.PREDICTION_BATCH_ROWS)
+
+    def predict_batches(self, data, source_product_ids, dates, batch_rows):
+        """
+        Predict and transform the data a batch of rows at a time, yielding each batch's results as soon as it's predicted.
+        """
+        for start in range(0, len(data), batch_rows):
+            end = start + batch_rows
+            predictions = self.make_predictions(data.iloc[start:end], batched=True, cached=True)
+
+            yield self.transform_predictions(predictions, source_product_ids.iloc[start:end].to_numpy(), dates.iloc[start:end])
+
     def run_predictions_for_evaluation(self, X_test):
         """
         Make predictions for evaluation purposes.
@@ -0,0 +1,244 @@
+import numpy as np
+import json
+
+class TreeEnsemble:
+
+    # Missing value handling of a split, as LightGBM defines it
+    MISSING_NONE = 0  # Missing values are compared as 0
+    MISSING_ZERO = 1  # Zeros and missing values follow the default direction
+    MISSING_NAN = 2  # Missing values follow the default direction
+
+    ZERO_THRESHOLD = 1e-35  # Values LightGBM treats as zero
+
+    BLOCK_ROWS = 4096  # Rows walked through all trees at once, bounding the memory used
+
+    def __init__(self, feature, threshold, left, right, default_left, missing_type, value, roots,
+                 feature_names, base_score=0.0, comparison='<', dtype='float32', max_depth=0):
+        """
+        Initialise a tree ensemble from flat node arrays, every tree's nodes next to each other.
+        Leaves point to themselves, so walking past a leaf keeps the row on it.
+        """
+        self.dtype = np.dtype(dtype)
+        self.feature = np.asarray(feature, dtype=np.int32)
+        self.threshold = np.asarray(threshold, dtype=self.dtype)
+        self.left = np.asarray(left, dtype=np.int32)
+        self.right = np.asarray(right, dtype=np.int32)
+        self.default_left = np.asarray(default_left, dtype=bool)
+        self.missing_type = np.asarray(missing_type, dtype=np.int8)
+        self.value = np.asarray(value, dtype=self.dtype)
+        self.roots = np.asarray(roots, dtype=np.int32)
+        self.feature_names = list(feature_names)
+        self.base_score = self.dtype.type(base_score)
+        self.comparison = comparison  # '<' (XGBoost) or '<=' (LightGBM) to go left
+        self.max_depth = int(max_depth)
+
+    def prepare(self, data):
+        """
+        Lay out the features as an array in the order the model was trained on.
+        """
+        if hasattr(data, 'columns'):
+            data = data[self.feature_names]
+
+        return np.asarray(data, dtype=self.dtype)
+
+    def leaf_values(self, X):
+        """
+        Walk a block of rows through every tree at once, returning the value of the leaf each row lands on in each tree.
+        """
+        rows = np.arange(len(X))[:, None]
+        nodes = np.broadcast_to(self.roots, (len(X), len(self.roots)))
+
+        for _ in range(self.max_depth):
+            x = X[rows, self.feature[nodes]]
+            threshold = self.threshold[nodes]
+            missing_type = self.missing_type[nodes]
+            is_nan = np.isnan(x)
+
+            # Compare, with missing values as 0 where the split has no missing direction
+            x = np.where(is_nan & (missing_type == self.MISSING_NONE), 0, x)
+            go_left = x < threshold if self.comparison == '<' else x <= threshold
+
+            # Missing values, and zeros for some LightGBM splits, follow the default direction
+            is_missing = (is_nan & (missing_type != self.MISSING_NONE)) | ((missing_type == self.MISSING_ZERO) & (np.abs(x) <= self.ZERO_THRESHOLD))
+            go_left = np.where(is_missing, self.default_left[nodes], go_left)
+
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+
+        return self.value[nodes]
+
+    def predict(self, data):
+        """
+        Predict a batch of rows, adding up the trees in order like the boosting libraries do.
+        """
+        X = self.prepare(data)
+        predictions = np.empty(len(X), dtype=self.dtype)
+
+        for start in range(0, len(X), self.BLOCK_ROWS):
+            leaf_values = self.leaf_values(X[start:start + self.BLOCK_ROWS])
+
+            # Sequential sums, as NumPy's pairwise sums would round differently
+            total = np.full(len(leaf_values), self.base_score, dtype=self.dtype)
+            for tree in range(leaf_values.shape[1]):
+                total += leaf_values[:, tree]
+
+            predictions[start:start + self.BLOCK_ROWS] = total
+
+        return predictions
+
+    def save(self, path):
+        """
+        Save the ensemble's arrays to an .npz file.
+        """
+        np.savez(
+            path,
+            feature=self.feature, threshold=self.threshold, left=self.left, right=self.right,
+            default_left=self.default_left, missing_type=self.missing_type, value=self.value, roots=self.roots,
+            metadata=np.array(json.dumps({
+                'feature_names': self.feature_names,
+                'base_score': float(self.base_score),
+                'comparison': self.comparison,
+                'dtype': self.dtype.name,
+                'max_depth': self.max_depth,
+            })),
+        )
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load an ensemble saved to an .npz file.
+        """
+        with np.load(path, allow_pickle=False) as saved:
+            arrays = {name: saved[name] for name in saved.files if name != 'metadata'}
+            metadata = json.loads(str(saved['metadata']))
+
+        return cls(**arrays, **metadata)
+
+class TreeEnsembleBuilder:
+
+    def __init__(self):
+        """
+        Initialise the flat node arrays of an ensemble being exported, filled a tree at a time.
+        """
+        self.nodes = {name: [] for name in ['feature', 'threshold', 'left', 'right', 'default_left', 'missing_type', 'value']}
+        self.roots = []
+        self.max_depth = 0
+
+    def add_node(self, feature=0, threshold=0.0, default_left=False, missing_type=TreeEnsemble.MISSING_NAN, value=0.0):
+        """
+        Add a node, a leaf until its children are set, returning its index.
+        """
+        index = len(self.nodes['feature'])
+
+        self.nodes['feature'].append(feature)
+        self.nodes['threshold'].append(threshold)
+        self.nodes['left'].append(index)
+        self.nodes['right'].append(index)
+        self.nodes['default_left'].append(default_left)
+        self.nodes['missing_type'].append(missing_type)
+        self.nodes['value'].append(value)
+
+        return index
+
+    def set_children(self, index, left, right):
+        """
+        Make a node a split between two children.
+        """
+        self.nodes['left'][index] = left
+        self.nodes['right'][index] = right
+
+    def build(self, feature_names, **kwargs):
+        """
+        Build the ensemble from the nodes added.
+        """
+        return TreeEnsemble(**self.nodes, roots=self.roots, feature_names=feature_names, max_depth=self.max_depth, **kwargs)
+
+def export_xgboost(model):
+    """
+    Export an XGBoost regressor, from the exact float32 values of its JSON model.
+    """
+    booster = model.get_booster()
+    learner = json.loads(booster.save_raw('json'))['learner']
+
+    if learner['objective']['name'] != 'reg:squarederror':
+        raise ValueError(f"Unsupported XGBoost objective: {learner['objective']['name']}")
+
+    # Only the trees the wrapper predicts with, up to the best iteration if trained with early stopping
+    trees = learner['gradient_booster']['model']['trees']
+    if hasattr(model, 'best_iteration'):
+        trees = trees[:model.best_iteration + 1]
+
+    builder = TreeEnsembleBuilder()
+    for tree in trees:
+        offset = len(builder.nodes['feature'])
+        builder.roots.append(offset)
+
+        for node, left in enumerate(tree['left_children']):
+            if left == -1:
+                # Leaves keep their value in the split condition
+                builder.add_node(value=tree['split_conditions'][node])
+            else:
+                index = builder.add_node(tree['split_indices'][node], tree['split_conditions'][node], bool(tree['default_left'][node]))
+                builder.set_children(index, offset + left, offset + tree['right_children'][node])
+
+        builder.max_depth = max(builder.max_depth, tree_depth(tree['left_children'], tree['right_children']))
+
+    return builder.build(booster.feature_names, base_score=float(learner['learner_model_param']['base_score']), comparison='<', dtype='float32')
+
+def export_lightgbm(model):
+    """
+    Export a LightGBM regressor, from the full precision values of its model dump.
+    """
+    dump = model.booster_.dump_model()
+
+    if dump['objective'].split(' ')[0] != 'regression' or dump['average_output']:
+        raise ValueError(f"Unsupported LightGBM objective: {dump['objective']}")
+
+    missing_types = {'None': TreeEnsemble.MISSING_NONE, 'Zero': TreeEnsemble.MISSING_ZERO, 'NaN': TreeEnsemble.MISSING_NAN}
+
+    builder = TreeEnsembleBuilder()
+
+    def add_subtree(node, depth):
+        """
+        Add a node and its descendants, returning the node's index.
+        """
+        builder.max_depth = max(builder.max_depth, depth)
+
+        if 'leaf_value' in node:
+            return builder.add_node(value=node['leaf_value'])
+
+        if node['decision_type'] != '<=':
+            raise ValueError(f"Unsupported LightGBM split: {node['decision_type']}")
+
+        index = builder.add_node(node['split_feature'], node['threshold'], node['default_left'], missing_types[node['missing_type']])
+        builder.set_children(index, add_subtree(node['left_child'], depth + 1), add_subtree(node['right_child'], depth + 1))
+
+        return index
+
+    for tree in dump['tree_info']:
+        builder.roots.append(add_subtree(tree['tree_structure'], 0))
+
+    return builder.build(dump['feature_names'], comparison='<=', dtype='float64')
+
+def tree_depth(left_children, right_children):
+    """
+    Get the depth of a tree given as arrays of children, -1 for leaves.
+    """
+    depth, level = 0, [0]
+    while True:
+        level = [child for node in level for child in (left_children[node], right_children[node]) if child != -1]
+        if not level:
+            return depth
+        depth += 1
+
+def export_model(model):
+    """
+    Export an XGBoost or LightGBM scikit-learn regressor to a tree ensemble.
+    """
+    backend = type(model).__module__.split('.')[0]
+
+    if backend == 'xgboost':
+        return export_xgboost(model)
+    elif backend == 'lightgbm':
+        return export_lightgbm(model)
+
+    raise ValueError(f"Unsupported model type: {type(model).__name__}")
@@ -0,0 +1,232 @@
+from ml.config import config
+from datetime import datetime
+import hashlib
+import logging
+import shutil
+import os
+
+class BackupStore:
+
+    NAME_FORMAT = '%Y%m%d_%H%M%S'  # Snapshots are named by the time they're taken
+    CHUNK_BYTES = 1 << 20  # Bytes of a file hashed at a time
+
+    def __init__(self, directory=None, keep_last=None, keep_daily=None, keep_weekly=None):
+        """
+        Initialise a store of snapshots of the processed data, deduplicated by content.
+        Each file is stored once in 'objects', named by the SHA-256 of its content, and every snapshot in 'snapshots'
+        is a tree of hard links to the objects, so files unchanged since an earlier backup take no space and are not copied.
+        Files are never changed in place, only replaced, so the data and the snapshots can share them.
+        """
+        self.directory = directory or config.HISTORICAL_DATA_BACKUP
+        self.keep_last = config.BACKUP_KEEP_LAST if keep_last is None else keep_last
+        self.keep_daily = config.BACKUP_KEEP_DAILY if keep_daily is None else keep_daily
+        self.keep_weekly = config.BACKUP_KEEP_WEEKLY if keep_weekly is None else keep_weekly
+        self.objects_path = os.path.join(self.directory, 'objects')
+        self.snapshots_path = os.path.join(self.directory, 'snapshots')
+
+    def hash_file(self, file_path):
+        """
+        Hash a file's content, reading it in chunks.
+        """
+        digest = hashlib.sha256()
+
+        with open(file_path, 'rb') as file:
+            for chunk in iter(lambda: file.read(self.CHUNK_BYTES), b''):
+                digest.update(chunk)
+
+        return digest.hexdigest()
+
+    def link(self, source_path, target_path):
+        """
+        Hard link a file, copying it if it's on another device.
+        """
+        try:
+            os.link(source_path, target_path)
+        except OSError:
+            shutil.copy2(source_path, target_path)
+
+    def object_path(self, file_hash):
+        """
+        Get the path of the object with a content hash, spread over subdirectories by its first characters.
+        """
+        return os.path.join(self.objects_path, file_hash[:2], file_hash)
+
+    def stored_inodes(self):
+        """
+        Map the inodes of the stored objects to their hashes, so files already linked to an object are not hashed again.
+        """
+        inodes = {}
+
+        for root, _, files in os.walk(self.objects_path):
+            for file_hash in files:
+                if file_hash.endswith('.tmp'):
+                    continue
+
+                stat = os.stat(os.path.join(root, file_hash))
+                inodes[(stat.st_dev, stat.st_ino)] = file_hash
+
+        return inodes
+
+    def store_file(self, file_path, inodes):
+        """
+        Store a file as an object if its content is not stored yet, linking it rather than copying it where possible.
+        Returns the object's path.
+        """
+        stat = os.stat(file_path)
+        file_hash = inodes.get((stat.st_dev, stat.st_ino)) or self.hash_file(file_path)
+        object_path = self.object_path(file_hash)
+
+        if not os.path.exists(object_path):
+            os.makedirs(os.path.dirname(object_path), exist_ok=True)
+            temp_path = f'{object_path}.{os.getpid()}.tmp'
+            self.link(file_path, temp_path)
+            os.replace(temp_path, object_path)
+
+        return object_path
+
+    def snapshot(self, paths, name=None):
+        """
+        Take a snapshot of files and directories, e.g. the processed dataset and the raw file manifest, each kept under its name.
+        Paths that don't exist are skipped. A snapshot with the same name is replaced.
+        Returns the snapshot's name.
+        """
+        name = name or datetime.now().strftime(self.NAME_FORMAT)
+        snapshot_path = os.path.join(self.snapshots_path, name)
+        temp_path = f'{snapshot_path}.{os.getpid()}.tmp'
+        shutil.rmtree(temp_path, ignore_errors=True)
+        os.makedirs(temp_path)
+
+        inodes = self.stored_inodes()
+        stored_files = 0
+
+        for path in paths:
+            if not os.path.exists(path):
+                continue
+
+            # Single files and every file of a directory, at the same place in the snapshot
+            base_path = os.path.dirname(os.path.normpath(path))
+            if os.path.isdir(path):
+                files = [os.path.join(root, file_name) for root, _, file_names in os.walk(path) for file_name in file_names]
+                os.makedirs(os.path.join(temp_path, os.path.relpath(path, base_path)))
+            else:
+                files = [path]
+
+            for file_path in files:
+                link_path = os.path.join(temp_path, os.path.relpath(file_path, base_path))
+                os.makedirs(os.path.dirname(link_path), exist_ok=True)
+                os.link(self.store_file(file_path, inodes), link_path)
+                stored_files += 1
+
+        shutil.rmtree(snapshot_path, ignore_errors=True)
+        os.rename(temp_path, snapshot_path)
+
+        logging.info(f"Snapshot {name} taken at {snapshot_path} ({stored_files} files)")
+
+        return name
+
+    def snapshots(self):
+        """
+        List the snapshots' names, oldest first.
+        """
+        try:
+            return sorted(name for name in os.listdir(self.snapshots_path)
+                          if os.path.isdir(os.path.join(self.snapshots_path, name)) and not name.endswith('.tmp'))
+        except FileNotFoundError:
+            return []
+
+    def retained(self, names):
+        """
+        Get the snapshots the retention policy keeps: the last ones, and the latest of each of the last days and weeks with snapshots.
+        Snapshots not named by their time are always kept.
+        """
+        dated = []
+        keep = set()
+
+        for name in names:
+            try:
+                dated.append((datetime.strptime(name, self.NAME_FORMAT), name))
+            except ValueError:
+                keep.add(name)
+
+        dated.sort(reverse=True)
+        keep.update(name for _, name in dated[:self.keep_last])
+
+        # Latest snapshot of each period, for the number of periods kept
+        for period, count in [(lambda time: time.date(), self.keep_daily), (lambda time: time.isocalendar()[:2], self.keep_weekly)]:
+            periods = set()
+            for time, name in dated:
+                if len(periods) >= count:
+                    break
+                if period(time) not in periods:
+                    periods.add(period(time))
+                    keep.add(name)
+
+        return keep
+
+    def prune(self):
+        """
+        Delete the snapshots the retention policy doesn't keep, then the objects no longer linked from anywhere.
+        Returns the names of the snapshots deleted.
+        """
+        names = self.snapshots()
+        keep = self.retained(names)
+        deleted = [name for name in names if name not in keep]
+
+        for name in deleted:
+            shutil.rmtree(os.path.join(self.snapshots_path, name), ignore_errors=True)
+
+        # Objects are only linked from the store itself once no snapshot or data uses them
+        deleted_objects = 0
+        for root, _, files in os.walk(self.objects_path):
+            for file_hash in files:
+                object_path = os.path.join(root, file_hash)
+                if os.stat(object_path).st_nlink == 1:
+                    os.remove(object_path)
+                    deleted_objects += 1
+
+        logging.info(f"Backups pruned, {len(deleted)} snapshots and {deleted_objects} files deleted")
+
+        return deleted
+
+    def restore(self, name=None, directory=None):
+        """
+        Restore the files and directories of a snapshot, the latest by default, into a directory, the processed data's by default.
+        Each one replaces the current one in one step, linking the snapshot's files instead of copying them.
+        Returns the snapshot's name.
+        """
+        names = self.snapshots()
+        name = name or (names[-1] if names else None)
+        if name not in names:
+            raise FileNotFoundError(f"No snapshot {name} in {self.snapshots_path}")
+
+        directory = directory or config.HISTORICAL_DATA_PROCESSED
+        snapshot_path = os.path.join(self.snapshots_path, name)
+        os.makedirs(directory, exist_ok=True)
+
+        for entry in os.listdir(snapshot_path):
+            entry_path = os.path.join(snapshot_path, entry)
+            target_path = os.path.join(directory, entry)
+            temp_path = f'{target_path}.{os.getpid()}.tmp'
+            old_path = f'{target_path}.{os.getpid()}.old'
+
+            # Link the snapshot's files next to the target first, then swap them in
+            if os.path.isdir(entry_path):
+                shutil.rmtree(temp_path, ignore_errors=True)
+                shutil.copytree(entry_path, temp_path, copy_function=self.link)
+            else:
+                self.link(entry_path, temp_path)
+
+            if os.path.exists(target_path):
+                os.rename(target_path, old_path)
+            os.rename(temp_path, target_path)
+
+            if os.path.isdir(old_path):
+                shutil.rmtree(old_path, ignore_errors=True)
+            elif os.path.exists(old_path):
+                os.remove(old_path)
+
+        logging.info(f"Snapshot {name} restored into {directory}")
+
+        return name
+
+backup_store = BackupStore()
@@ -1,13 +1,14 @@
+from ml.preprocessing.product_id_registry import product_id_registry
 import logging
 import pandas as pd
 import numpy as np
-import hashlib
 from datetime import datetime, timedelta
 
 class CleaningLayer:
 
-    def __init__(self, data):
+    def __init__(self, data, id_registry=None):
         self.data = data
+        self.id_registry = id_registry or product_id_registry
 
     def validate_columns(self, df, required_columns):
         """
@@ -57,7 +58,7 @@ class CleaningLayer:
         """
         unique_string = f"{name}_{category}"
 
-        return hashlib.md5(unique_string.encode()).hexdigest()[:8]  # Return an 8-character hash
+        return self.id_registry.generate_unique_id(unique_string)
 
     def handle_product_ids(self, df):
         """
@@ -66,8 +67,8 @@ class CleaningLayer:
         # Keep the original product IDs by transferring them to a new column
         df = df.rename(columns={'product_id': 'original_product_id'})
 
-        # Generate new unique IDs in the 'product_id' column
-        df['product_id'] = df.apply(lambda row: self.generate_unique_id(row['product_name'], row['category']), axis=1)
+        # Generate new unique IDs in the 'product_id' column, reusing the ones already generated
+        df['product_id'] = self.id_registry.get_ids(df['product_name'], df['category'])
 
         logging.info("Product IDs handled")
 
@@ -139,8 +140,10 @@ class CleaningLayer:
         if isinstance(columns, str):
             columns = [columns]
 
-        # Convert to numeric, forcing errors to NaN
-        df[columns] = df[columns].apply(pd.to_numeric, errors='coerce')
+        # Convert to numeric, forcing errors to NaN, unless already read as numbers
+        text_columns = [column for column in columns if not pd.api.types.is_numeric_dtype(df[column])]
+        if text_columns:
+            df[text_columns] = df[text_columns].apply(pd.to_numeric, errors='coerce')
 
         # Convert to positive integers, filling NaNs with 0
         df[columns] = df[columns].fillna(0).abs().astype(int)
@@ -166,8 +169,9 @@ class CleaningLayer:
         """
         Clean the price indicating column by ensuring positive decimals.
         """
-        # Coerce to numeric, forcing errors to NaN
-        df[column] = pd.to_numeric(df[column], errors='coerce')
+        # Coerce to numeric, forcing errors to NaN, unless already read as numbers
+        if not pd.api.types.is_numeric_dtype(df[column]):
+            df[column] = pd.to_numeric(df[column], errors='coerce')
 
         # Get the absolute value, filling NaNs with 0
         df[column] = np.abs(df[column].fillna(0))
@@ -180,8 +184,9 @@ class CleaningLayer:
         """
         Standardise the 'in_stock' column values to binary format (0 or 1).
         """
-        # Coerce the 'in_stock' column to numeric, forcing errors to NaN
-        df['in_stock'] = pd.to_numeric(df['in_stock'], errors='coerce')
+        # Coerce the 'in_stock' column to numeric, forcing errors to NaN, unless already read as numbers
+        if not pd.api.types.is_numeric_dtype(df['in_stock']):
+            df['in_stock'] = pd.to_numeric(df['in_stock'], errors='coerce')
 
         # Convert > 0 values to 1 and everything else to 0 (including NaNs)
         df['in_stock'] = np.where(df['in_stock'] > 0, 1, 0)
@@ -5,46 +5,28 @@ import numpy as np
 from sklearn.preprocessing import LabelEncoder
 from datetime import datetime, timedelta
 from ml.config import config
+from ml.preprocessing.feature_plan import FeaturePlan
+from ml.preprocessing.mapping_store import mapping_store
 
 class FeatureEngineeringLayer:
 
-    def __init__(self, data):
+    def __init__(self, data, plan=None, mappings=None):
         self.data = data
+        self.plan = plan or FeaturePlan()
+        self.mappings = mappings or mapping_store  # Mappings cached for the whole process
         self.label_encoder = LabelEncoder()
 
     def load_mapping(self, feature):
         """
-        Load the mapping for a specific feature from a CSV file, if it exists.
-        """
-        # Save to a file with the name of the feature
-        mapping_path = os.path.join(config.MAPPINGS, f'{feature}_map.csv')
-
-        # Check if the file exists
-        if os.path.exists(mapping_path):
-            try:
-                # Try loading the CSV into a DataFrame and converting it to a dictionary
-                mapping = pd.read_csv(mapping_path).set_index(feature).to_dict()[f'{feature}_encoded']
-                logging.info(f"Mapping loaded for {feature}")
-                return mapping
-            except Exception as e:
-                logging.error(f"Error loading mapping for {feature}: {e}")
-                return {}
-        else:
-            logging.warning(f"Mapping file not found for {feature}: {mapping_path}")
-            return {}
+        Load the mapping for a specific feature from a CSV file, if it exists, reusing the cached one if the file has not changed.
+        """
+        return self.mappings.get(feature)
 
     def save_mapping(self, feature, mapping):
         """
-        Save the updated mapping for a specific feature to a CSV file.
+        Save the updated mapping for a specific feature to a CSV file, returning it merged with the one saved meanwhile.
         """
-        # Save to a file with the name of the feature
-        mapping_path = os.path.join(self.mapping_dir, f'{feature}_map.csv')
-
-        # Convert mapping dictionary to DataFrame and save to CSV
-        mapping_df = pd.DataFrame(list(mapping.items()), columns=[feature, f'{feature}_encoded'])
-        mapping_df.to_csv(mapping_path, index=False)
-
-        logging.info(f"Mapping saved for {feature}")
+        return self.mappings.save(feature, mapping)
 
     def encode_categorical_feature(self, df, feature):
         """
@@ -73,11 +55,11 @@ class FeatureEngineeringLayer:
             # Update the mapping with the new encodings
             mapping.update(new_encodings)
 
-            # Apply the new encodings to the DataFrame
-            df.loc[df[f'{feature}_encoded'].isna(), f'{feature}_encoded'] = df[feature].map(new_encodings)
+            # Save the updated mapping, other processes may have encoded some of the values or taken the codes meanwhile
+            mapping = self.save_mapping(feature, mapping)
 
-            # Save the updated mapping
-            self.save_mapping(feature, mapping)
+            # Apply the new encodings to the DataFrame
+            df.loc[df[f'{feature}_encoded'].isna(), f'{feature}_encoded'] = df[feature].map(mapping)
 
         # Ensure all encoded values are integers
         df[f'{feature}_encoded'] = df[f'{feature}_encoded'].astype(int)
@@ -86,52 +68,53 @@ class FeatureEngineeringLayer:
 
         return df
 
+    def calculate_per_item_value(self, df):
+        """
+        Calculate the per item value of each weekly record, rounded to 2 decimals, or 0 if nothing was sold.
+        """
+        value = df['value'].to_numpy(dtype=float)
+        quantity = df['quantity'].to_numpy(dtype=float)
+
+        # Divide only where items were sold
+        per_item_value = np.zeros(len(df))
+        np.divide(value, quantity, out=per_item_value, where=quantity > 0)
+        rounded = np.round(per_item_value, 2)
+
+        # NumPy rounds the scaled value, so redo the rare ties with Python's exact decimal rounding
+        scaled = per_item_value * 100
+        ties = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+        rounded[ties] = [round(item_value, 2) for item_value in per_item_value[ties].tolist()]
+
+        return rounded
+
     def pivot_weekly_data(self, df):
         """
         Pivot the weekly data into daily records.
         """
         # Define the columns representing the weekdays
         day_columns = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+        days_in_week = len(day_columns)
 
         try:
-            # Iterate through the weeks
-            daily_rows = []
-            for _, row in df.iterrows():
-                # Extract shared values from the row
-                year = row['year']
-                week = row['week']
-                product_id = row['product_id']
-                original_product_id = row['original_product_id']
-                product_name = row['product_name']
-                category = row['category']
-                product_id_encoded = row['product_id_encoded']
-                category_encoded = row['category_encoded']
-                in_stock = row['in_stock']
-
-                # Calculate per item value for the entire week
-                per_item_value = round(row['value'] / row['quantity'], 2) if row['quantity'] > 0 else 0
-
-                # Iterate over each day of the week and create a daily record
-                for day in day_columns:
-                    daily_quantity = row[day]
-
-                    daily_rows.append({
-                        'product_id': product_id,
-                        'original_product_id': original_product_id,
-                        'product_name': product_name,
-                        'category': category,
-                        'product_id_encoded': product_id_encoded,
-                        'category_encoded': category_encoded,
-                        'quantity': daily_quantity,
-                        'per_item_value': per_item_value,
-                        'in_stock': in_stock,
-                        'year': year,
-                        'week': week,
-                        'weekday': day
-                    })
-
-            # Convert the list of daily records into a DataFrame
-            df = pd.DataFrame(daily_rows)
+            # Repeat the shared values of each week once per day
+            daily_data = {
+                column: np.repeat(df[column].to_numpy(), days_in_week)
+                for column in ['product_id', 'original_product_id', 'product_name', 'category', 'product_id_encoded', 'category_encoded']
+            }
+
+            # Lay the daily quantities out week by week, Monday to Sunday
+            daily_data['quantity'] = df[day_columns].to_numpy().ravel()
+
+            # Calculate per item value for the entire week
+            daily_data['per_item_value'] = np.repeat(self.calculate_per_item_value(df), days_in_week)
+
+            for column in ['in_stock', 'year', 'week']:
+                daily_data[column] = np.repeat(df[column].to_numpy(), days_in_week)
+
+            daily_data['weekday'] = np.tile(day_columns, len(df)).astype(object)
+
+            # Convert the daily records into a DataFrame
+            df = pd.DataFrame(daily_data)
 
         except Exception as e:
             logging.error(f"An error occurred while pivoting weekly data: {e}")
@@ -180,7 +163,9 @@ class FeatureEngineeringLayer:
         """
         if 'week' not in df.columns:
             df['date'] = pd.to_datetime(df['date'], errors='coerce')
-            df['week'] = df['date'].dt.isocalendar().week
+
+            if self.plan.needs('week'):
+                df['week'] = df['date'].dt.isocalendar().week
 
         # Map day names to offset indices (0 = Monday - 6 = Sunday)
         day_map = {'monday': 0, 'tuesday': 1, 'wednesday': 2, 'thursday': 3, 'friday': 4, 'saturday': 5, 'sunday': 6}
@@ -192,7 +177,8 @@ class FeatureEngineeringLayer:
         df['weekday'] = df['weekday'].str.lower().map(day_map)
 
         # Cyclic encoding for weekday
-        df = self.apply_cyclic_encoding(df, 'weekday', 7)
+        if self.plan.needs('weekday_sin', 'weekday_cos'):
+            df = self.apply_cyclic_encoding(df, 'weekday', 7)
 
         return df
 
@@ -201,11 +187,15 @@ class FeatureEngineeringLayer:
         Create the month-related features.
         """
         # Extract day of the month and month directly from the date
-        df['day_of_month'] = df['date'].dt.day
-        df['month'] = df['date'].dt.month
+        if self.plan.needs('day_of_month'):
+            df['day_of_month'] = df['date'].dt.day
+
+        if self.plan.needs('month', 'month_sin', 'month_cos'):
+            df['month'] = df['date'].dt.month
 
         # Cyclic encoding for month
-        df = self.apply_cyclic_encoding(df, 'month', 12)
+        if self.plan.needs('month_sin', 'month_cos'):
+            df = self.apply_cyclic_encoding(df, 'month', 12)
 
         return df
 
@@ -213,7 +203,7 @@ class FeatureEngineeringLayer:
         """
         Create the year feature.
         """
-        if 'year' not in df.columns:
+        if 'year' not in df.columns and self.plan.needs('year'):
             df['year'] = df['date'].dt.year
 
         return df
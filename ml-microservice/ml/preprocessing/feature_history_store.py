@@ -0,0 +1,244 @@
+from ml.config import config
+from ml.preprocessing.cleaning_layer import CleaningLayer
+from ml.preprocessing.file_lock import file_lock
+import pandas as pd
+import numpy as np
+import threading
+import logging
+import atexit
+import os
+
+class FeatureHistoryStore:
+
+    def __init__(self, path=None, days=None, id_registry=None, flush_seconds=None):
+        """
+        Initialise a compact store of each product's recent daily sales, so prediction requests only need to send new observations.
+        Observations are applied in memory at once and saved in the background at most every flush_seconds,
+        merged under a file lock with what other processes saved in the meantime.
+        """
+        self.path = path or config.FEATURE_HISTORY
+        self.days = days or config.FEATURE_HISTORY_DAYS
+        self.id_registry = id_registry
+        self.flush_seconds = config.FEATURE_HISTORY_FLUSH_SECONDS if flush_seconds is None else flush_seconds
+        self.lock = threading.RLock()
+        self.version = None  # Version of the file the store was loaded from
+        self.pending = []  # Observations not saved yet
+        self.flush_timer = None
+        self.reset()
+
+        # Save the pending observations when the process exits
+        atexit.register(self.flush)
+
+    def reset(self):
+        """
+        Empty the store.
+        """
+        self.products = pd.DataFrame(columns=['product_name', 'category', 'per_item_value', 'in_stock'], index=pd.Index([], name='product_id'))
+        self.source_ids = {}  # Client product ID -> product ID
+        self.start_date = None  # First day kept
+        self.quantities = np.empty((0, self.days), dtype=np.float32)  # Products x days, NaN if not observed
+
+    def file_version(self):
+        """
+        Identify the version of the saved store by its modification time and size.
+        """
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+
+        return stat.st_mtime_ns, stat.st_size
+
+    def refresh(self):
+        """
+        Load the store from disk if the file changed since it was last read, e.g. by a background preprocessing job.
+        """
+        with self.lock:
+            version = self.file_version()
+            if version is None or version == self.version:
+                return
+
+            try:
+                with np.load(self.path, allow_pickle=False) as saved:
+                    self.products = pd.DataFrame({
+                        'product_name': saved['product_names'].astype(object),
+                        'category': saved['categories'].astype(object),
+                        'per_item_value': saved['per_item_values'],
+                        'in_stock': saved['in_stock'],
+                    }, index=pd.Index(saved['product_ids'].astype(object), name='product_id'))
+                    self.source_ids = dict(zip(saved['source_ids'].tolist(), saved['source_product_ids'].tolist()))
+                    self.start_date = saved['start_date'][0] if len(saved['start_date']) else None
+                    self.quantities = saved['quantities']
+                    self.days = self.quantities.shape[1]
+
+                self.version = version
+                logging.info(f"Feature history loaded for {len(self.products)} products")
+
+                # Apply again the observations not saved yet on top of the ones loaded
+                for df in self.pending:
+                    self.apply(df)
+            except Exception as e:
+                logging.error(f"Error loading feature history from {self.path}: {e}")
+
+    def save(self):
+        """
+        Save the store to disk, replacing the previous file in one step. Called by flush, under the file lock.
+        """
+        with self.lock:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+
+            temp_path = f'{self.path}.{os.getpid()}.tmp.npz'
+            np.savez_compressed(
+                temp_path,
+                product_ids=self.products.index.to_numpy(dtype=str),
+                product_names=self.products['product_name'].to_numpy(dtype=str),
+                categories=self.products['category'].to_numpy(dtype=str),
+                per_item_values=self.products['per_item_value'].to_numpy(dtype=float),
+                in_stock=self.products['in_stock'].to_numpy(dtype=int),
+                source_ids=np.array(list(self.source_ids.keys()), dtype=str),
+                source_product_ids=np.array(list(self.source_ids.values()), dtype=str),
+                start_date=np.array([] if self.start_date is None else [self.start_date], dtype='datetime64[D]'),
+                quantities=self.quantities,
+            )
+            os.replace(temp_path, self.path)
+
+            self.version = self.file_version()
+            logging.info(f"Feature history saved at {self.path}")
+
+    def shift_window(self, end_date):
+        """
+        Move the window of days kept so it ends at a new last day, dropping the oldest days.
+        """
+        start_date = end_date - np.timedelta64(self.days - 1, 'D')
+        if self.start_date is not None and start_date <= self.start_date:
+            return
+
+        quantities = np.full(self.quantities.shape, np.nan, dtype=np.float32)
+
+        # Keep the days that overlap with the new window
+        if self.start_date is not None:
+            offset = int((start_date - self.start_date) / np.timedelta64(1, 'D'))
+            if offset < self.days:
+                quantities[:, :self.days - offset] = self.quantities[:, offset:]
+
+        self.start_date = start_date
+        self.quantities = quantities
+
+    def flush(self):
+        """
+        Save the pending observations, merged with the saved store under a file lock so no process overwrites another's.
+        """
+        with self.lock:
+            if self.flush_timer is not None:
+                self.flush_timer.cancel()
+                self.flush_timer = None
+
+            if not self.pending:
+                return
+
+            try:
+                with file_lock(f'{self.path}.lock'):
+                    # Load what other processes saved since, the pending observations applied on top
+                    self.refresh()
+                    self.save()
+            except Exception as e:
+                logging.error(f"Error saving feature history at {self.path}: {e}")
+                return
+
+            logging.info(f"Feature history saved with {sum(len(df) for df in self.pending)} new observations")
+            self.pending = []
+
+    def apply(self, df):
+        """
+        Apply daily observations to the store in memory.
+        """
+        dates = pd.to_datetime(df['date']).to_numpy().astype('datetime64[D]')
+        self.shift_window(dates.max())
+
+        # Remember the client's product IDs, so their products can be looked up and forecast
+        if 'source_product_id' in df.columns:
+            known = df['source_product_id'].notna().to_numpy()
+            self.source_ids.update(zip(df['source_product_id'][known].astype(str), df['product_id'][known]))
+
+        # Keep the latest details of each product, adding the new ones
+        latest = df.assign(date=dates).sort_values('date').drop_duplicates('product_id', keep='last').set_index('product_id')
+        latest = latest[['product_name', 'category', 'per_item_value', 'in_stock']]
+        new_products = latest.index.difference(self.products.index)
+        self.products = pd.concat([self.products, latest.loc[new_products]]) if len(self.products) else latest.loc[new_products]
+        self.products.update(latest)
+        self.quantities = np.vstack([self.quantities, np.full((len(new_products), self.days), np.nan, dtype=np.float32)])
+
+        # Scatter the quantities into their product and day, ignoring days older than the window
+        rows = self.products.index.get_indexer(df['product_id'])
+        columns = ((dates - self.start_date) / np.timedelta64(1, 'D')).astype(int)
+        in_window = columns >= 0
+        self.quantities[rows[in_window], columns[in_window]] = pd.to_numeric(df['quantity'], errors='coerce').to_numpy(dtype=float)[in_window]
+
+    def update(self, df):
+        """
+        Add daily observations, with 'product_id', 'product_name', 'category', 'per_item_value', 'in_stock', 'date' and 'quantity' columns,
+        and the client's product IDs in an optional 'source_product_id' column.
+        They're saved by the next flush, scheduled in the background unless flush_seconds is 0.
+        """
+        if df.empty:
+            return
+
+        with self.lock:
+            self.refresh()
+            self.apply(df)
+            self.pending.append(df)
+
+            if not self.flush_seconds:
+                self.flush()
+            elif self.flush_timer is None:
+                self.flush_timer = threading.Timer(self.flush_seconds, self.flush)
+                self.flush_timer.daemon = True
+                self.flush_timer.start()
+
+        logging.info(f"Feature history updated with {len(df)} observations")
+
+    def record_observations(self, observations):
+        """
+        Add observations sent with a prediction request, remembering the client's product IDs.
+        """
+        if observations.empty:
+            return
+
+        # Identify the products the same way the cleaning does
+        cleaning = CleaningLayer(observations[['source_product_id', 'product_name', 'category', 'per_item_value', 'in_stock', 'date', 'quantity']].copy(), self.id_registry)
+        df = cleaning.standardise_category_column(cleaning.data)
+        df['product_id'] = cleaning.id_registry.get_ids(df['product_name'], df['category'])
+
+        self.update(df)
+
+    def history(self, source_product_ids):
+        """
+        Build the sales history of the requested products, in the same format as a full prediction upload.
+        """
+        with self.lock:
+            self.refresh()
+
+            source_product_ids = [str(source_id) for source_id in source_product_ids]
+            unknown_ids = [source_id for source_id in source_product_ids if source_id not in self.source_ids]
+            if unknown_ids:
+                raise KeyError(f"No feature history for products: {unknown_ids}")
+
+            product_ids = [self.source_ids[source_id] for source_id in source_product_ids]
+            rows = self.products.index.get_indexer(product_ids)
+
+            # Only the observed days are returned
+            quantities = self.quantities[rows]
+            product_rows, columns = np.nonzero(~np.isnan(quantities))
+            products = self.products.iloc[rows[product_rows]]
+
+        return pd.DataFrame({
+            'source_product_id': np.array(source_product_ids, dtype=object)[product_rows],
+            'product_name': products['product_name'].to_numpy(),
+            'category': products['category'].to_numpy(),
+            'per_item_value': products['per_item_value'].to_numpy(),
+            'in_stock': products['in_stock'].to_numpy(),
+            'date': np.datetime_as_string(self.start_date + columns.astype('timedelta64[D]'), unit='D').astype(object),
+            'quantity': quantities[product_rows, columns].astype(float),
+        })
+
+feature_history_store = FeatureHistoryStore()
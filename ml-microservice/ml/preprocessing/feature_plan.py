@@ -0,0 +1,65 @@
+from ml.config import config
+
+class FeaturePlan:
+
+    # Calendar features that are only derived for the model, never needed by other steps
+    CALENDAR_FEATURES = ['week', 'weekday_sin', 'weekday_cos', 'day_of_month', 'month', 'month_sin', 'month_cos', 'year']
+
+    def __init__(self, features=None, column='quantity', periods=None):
+        """
+        Plan which optional features to compute for a target feature list, all of them if no list is given.
+        """
+        self.features = None if features is None else set(features)
+        self.column = column
+        self.periods = periods or config.TIME_SERIES_PERIODS
+
+    def needs(self, *columns):
+        """
+        Check if any of the columns is required by the target features.
+        """
+        if self.features is None:
+            return True
+
+        return any(column in self.features for column in columns)
+
+    def time_series_features(self):
+        """
+        List the lag and rolling average features that can be created for the planned periods.
+        """
+        features = []
+        for period in self.periods:
+            features.append(f'{self.column}_lag_{period}')
+            if period != 1:
+                features.append(f'{self.column}_rolling_avg_{period}')
+
+        return features
+
+    def optional_features(self):
+        """
+        List every feature the pipelines can skip.
+        """
+        return self.CALENDAR_FEATURES + self.time_series_features()
+
+    def skipped_features(self):
+        """
+        List the optional features not required by the target features.
+        """
+        return [feature for feature in self.optional_features() if not self.planned(feature)]
+
+    def planned(self, feature):
+        """
+        Check if an optional feature will be computed, including the ones other required features are derived from.
+        """
+        if feature == 'month':
+            return self.needs('month', 'month_sin', 'month_cos')
+
+        return self.needs(feature)
+
+    def report(self):
+        """
+        Summarise which optional features will be computed and which will be skipped.
+        """
+        return {
+            'computed': [feature for feature in self.optional_features() if self.planned(feature)],
+            'skipped': self.skipped_features(),
+        }
@@ -1,17 +1,59 @@
+from ml.config import config
+from concurrent.futures import ThreadPoolExecutor
 import logging
 import os
 import pandas as pd
 
 class FileIngestionLayer:
 
-    def __init__(self, data_path):
+    # Columns read from the raw files of each format and their types, numbers as floats so missing values fit
+    SCHEMAS = {
+        'weekly': {
+            'product_id': str, 'product_name': str, 'category': str,
+            'monday': 'float64', 'tuesday': 'float64', 'wednesday': 'float64', 'thursday': 'float64',
+            'friday': 'float64', 'saturday': 'float64', 'sunday': 'float64',
+            'value': 'float64', 'in_stock': 'float64', 'year': 'float64', 'week': 'float64',
+        },
+        'daily': {
+            'product_id': str, 'product_name': str, 'category': str,
+            'quantity': 'float64', 'per_item_value': 'float64', 'in_stock': 'float64', 'date': str,
+        },
+    }
+
+    def __init__(self, data_path, data_type=None, workers=None, files=None):
+        """
+        Initialise the ingestion of a file or a directory of files, or only the given files, e.g. the new ones.
+        Given the data type ('weekly' or 'daily'), only the columns of its schema are read, already typed,
+        and the files of a directory are read in parallel.
+        """
         self.data_path = data_path
+        self.files = files
+        self.schema = self.SCHEMAS.get(data_type)
+        self.workers = workers or config.INGESTION_WORKERS or os.cpu_count()
+
+    def read_typed_file(self, file_path):
+        """
+        Read the schema's columns of a CSV file with their types, leaving the numbers as text if some can't be parsed.
+        """
+        usecols = lambda column: column in self.schema
+
+        try:
+            return pd.read_csv(file_path, usecols=usecols, dtype=self.schema)
+        except pd.errors.EmptyDataError:
+            raise
+        except ValueError as e:
+            # The cleaning coerces the text columns to numbers, as for untyped files
+            logging.warning(f"Values that are not numbers in {file_path}, reading them as text: {e}")
+            return pd.read_csv(file_path, usecols=usecols, dtype={column: str for column in self.schema})
 
     def read_file(self, file_path):
         """
         Read a single CSV file into a DataFrame.
         """
         try:
+            if self.schema is not None:
+                return self.read_typed_file(file_path)
+
             df = pd.read_csv(file_path, dtype={'product_id': str})
 
             return df
@@ -23,24 +65,35 @@ class FileIngestionLayer:
             raise IOError(f"Error reading file {file_path}: {e}")
 
 
+    def read_file_or_skip(self, file_path):
+        """
+        Read a single CSV file into a DataFrame, or None if it can't be read.
+        """
+        try:
+            return self.read_file(file_path)
+        except Exception as e:
+            logging.error(f"Skipping file {file_path} due to error: {e}")
+            return None
+
     def combine_files(self, files):
         """
         Combine multiple CSV files into a single DataFrame.
+        Typed files are read in parallel threads, as the CSV parser releases the GIL while parsing.
         """
-        combined_data = []
-        for file_path in files:
-            try:
-                df = self.read_file(file_path)
-                combined_data.append(df)
-            except Exception as e:
-                logging.error(f"Skipping file {file_path} due to error: {e}")
+        if self.schema is not None and self.workers > 1:
+            with ThreadPoolExecutor(max_workers=min(self.workers, len(files))) as executor:
+                frames = list(executor.map(self.read_file_or_skip, files))
+        else:
+            frames = [self.read_file_or_skip(file_path) for file_path in files]
+
+        combined_data = [df for df in frames if df is not None]
 
         # Ensure we have data to combine
         if not combined_data:
             logging.error("No valid data from the files to combine.")
             raise IOError("No valid data from the files to combine.")
 
-        # Concatenate the DataFrames
+        # Concatenate the DataFrames once, with the same types if typed so no column is converted
         try:
             df = pd.concat(combined_data, ignore_index=True)
             return df
@@ -48,10 +101,13 @@ class FileIngestionLayer:
             logging.error(f"Error combining DataFrames: {e}")
             raise ValueError(f"Error combining DataFrames: {e}")
 
-    def load_files(self):
+    def list_files(self):
         """
-        Load all valid CSV files from a directory or read a single file if it's not a directory.
+        List the CSV files to read: the ones given, the valid ones of a directory or a single file if it's not a directory.
         """
+        if self.files is not None:
+            return list(self.files)
+
         logging.info(f"Checking full path of directory: {self.data_path}")
 
         # If the path is a directory, process files in the directory
@@ -67,21 +123,29 @@ class FileIngestionLayer:
                 logging.error("No valid CSV files found in the directory.")
                 raise IOError("No valid CSV files found in the directory.")
 
-            # If there's only one file, return that DataFrame
-            if len(files) == 1:
-                return self.read_file(files[0])
-
-            # If there are multiple files, combine them
-            return self.combine_files(files)
+            return files
 
         # If it's a single file, read it directly
         elif os.path.isfile(self.data_path):  # Check if it's a valid file
-            return self.read_file(self.data_path)
+            return [self.data_path]
 
         else:
             logging.error(f"The provided path {self.data_path} is neither a file nor a directory.")
             raise FileNotFoundError(f"The provided path {self.data_path} is neither a file nor a directory.")
 
+    def load_files(self):
+        """
+        Load all valid CSV files from a directory or read a single file if it's not a directory.
+        """
+        files = self.list_files()
+
+        # If there's only one file, return that DataFrame
+        if len(files) == 1:
+            return self.read_file(files[0])
+
+        # If there are multiple files, combine them
+        return self.combine_files(files)
+
     def process(self):
         """
         Main method to load data (single file or directory) and return the DataFrame.
@@ -0,0 +1,19 @@
+from contextlib import contextmanager
+import fcntl
+import os
+
+@contextmanager
+def file_lock(path):
+    """
+    Hold an exclusive lock on a lock file while reading, merging and replacing the files it guards,
+    so processes sharing them, e.g. the app's workers and the background jobs, don't overwrite each other's changes.
+    The lock is released when the process exits, even if it crashes.
+    """
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+
+    with open(path, 'a') as file:
+        fcntl.flock(file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(file, fcntl.LOCK_UN)
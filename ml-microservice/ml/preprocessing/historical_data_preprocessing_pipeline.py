@@ -3,22 +3,102 @@ from ml.preprocessing.file_ingestion_layer import FileIngestionLayer
 from ml.preprocessing.cleaning_layer import CleaningLayer
 from ml.preprocessing.feature_engineering_layer import FeatureEngineeringLayer
 from ml.preprocessing.time_series_engineering_layer import TimeSeriesEngineeringLayer
+from ml.preprocessing.feature_history_store import feature_history_store
+from ml.preprocessing.processed_data_store import ProcessedDataStore
+from ml.preprocessing.raw_file_manifest import RawFileManifest
+from ml.preprocessing.stage_cache import stage_cache
+from ml.preprocessing.backup_store import BackupStore, backup_store
+from ml.preprocessing.file_lock import file_lock
 from ml.config import config
+import pandas as pd
+import hashlib
 import logging
-from datetime import datetime
 import os
 
 class HistoricalDataPreprocessingPipeline(PreprocessingPipeline):
 
-    def __init__(self, data_path=None, output_path=None, data_type='daily'):
+    STAGE_LAYERS = {
+        'ingest_data': [FileIngestionLayer],
+        'clean_data': [CleaningLayer],
+        'engineer_features': [FeatureEngineeringLayer],
+        'engineer_time_series': [TimeSeriesEngineeringLayer],
+    }
+
+    def __init__(self, data_path=None, output_path=None, data_type='daily', features=None, incremental=False, resume=False, cache=None, backups=None):
+        """
+        Initialise the preprocessing of raw historical data, saved as the processed data.
+        If `incremental`, only the raw files not preprocessed yet are read and their rows added to the processed data,
+        recomputing the time series features of only the days they change.
+        If `resume`, stages already run on raw files with the same content are read from their checkpoints.
+        The processed data is backed up to `backups`, by default the configured backups, or a 'backup' directory next to the output path if given.
+        """
         super().__init__(
             data_path or config.HISTORICAL_DATA_RAW,
-            output_path or config.HISTORICAL_DATA_PROCESSED
+            output_path or config.HISTORICAL_DATA_PROCESSED,
+            features,
+            resume=resume,
+            cache=cache or (stage_cache if config.STAGE_CHECKPOINTS else None),
         )
         self.data_type = data_type
+        self.store = ProcessedDataStore(os.path.join(self.output_path, 'processed_data'))
+        self.manifest = RawFileManifest(os.path.join(self.output_path, 'raw_file_manifest.json'))
+        self.lock_path = os.path.join(self.output_path, 'processed_data.lock')  # Held by the run changing the processed data
+        self.backups = backups or (backup_store if output_path is None else BackupStore(os.path.join(os.path.dirname(os.path.normpath(output_path)), 'backup')))
+        self.raw_files = None  # Raw files to read and their hashes, once listed: the new ones if incremental
+
+        # Weekly data is cleaned as a whole, e.g. filling the missing weeks of all products
+        if incremental and data_type != 'daily':
+            logging.warning(f"Incremental preprocessing not supported for {data_type} data, preprocessing all of it")
+            incremental = False
+        self.incremental = incremental
+        self.appending = False  # Whether the rows are added to saved processed data
+
+    def list_raw_files(self):
+        """
+        List the raw files to read with the hashes of their content, only the ones not preprocessed yet if incremental.
+        """
+        if self.raw_files is None:
+            files = FileIngestionLayer(self.data_path).list_files()
+            self.raw_files = self.manifest.new_files(files) if self.incremental else self.manifest.hash_files(files)
+
+        return self.raw_files
+
+    def input_fingerprint(self):
+        """
+        Fingerprint the raw files by their content, so checkpoints are found however the files are named.
+        """
+        return hashlib.sha256(' '.join(sorted(file_hash for _, file_hash in self.list_raw_files())).encode()).hexdigest()
+
+    def stage_settings(self):
+        return {**super().stage_settings(), 'data_type': self.data_type}
+
+    def checkpoint_key(self, stage):
+        # Features of rows appended to the saved data depend on that data too
+        if stage == 'engineer_time_series' and self.appending:
+            return None
+
+        return super().checkpoint_key(stage)
+
+    def run(self, on_stage=None):
+        """
+        Run the pipeline, doing nothing if incremental and every raw file was preprocessed already.
+        Runs on the same processed data are serialised by a lock file, so none changes the data or the manifest
+        between another's listing of the new raw files, reading of the saved rows and saving.
+        """
+        with file_lock(self.lock_path):
+            if self.incremental:
+                if not self.list_raw_files():
+                    logging.info("No new raw files to preprocess, the processed data is up to date")
+                    return pd.DataFrame()
+
+                self.appending = self.store.exists()
+
+            return super().run(on_stage)
 
     def ingest_data(self):
-        return FileIngestionLayer(data_path=self.data_path).process()
+        files = None if self.raw_files is None else [file_path for file_path, _ in self.raw_files]
+
+        return FileIngestionLayer(data_path=self.data_path, data_type=self.data_type, files=files).process()
 
     def clean_data(self, ingested_data):
         cleaning = CleaningLayer(ingested_data)
@@ -29,7 +109,7 @@ class HistoricalDataPreprocessingPipeline(PreprocessingPipeline):
             return cleaning.process_historical_weekly_data()
 
     def engineer_features(self, cleaned_data):
-        feature_engineering = FeatureEngineeringLayer(cleaned_data)
+        feature_engineering = FeatureEngineeringLayer(cleaned_data, self.plan)
 
         if self.data_type == 'daily':
             return feature_engineering.process_historical_daily_data()
@@ -37,36 +117,109 @@ class HistoricalDataPreprocessingPipeline(PreprocessingPipeline):
             return feature_engineering.process_historical_weekly_data()
 
     def engineer_time_series(self, engineered_data):
-        return TimeSeriesEngineeringLayer(engineered_data).process_historical_data()
+        if not self.appending:
+            return TimeSeriesEngineeringLayer(engineered_data, self.plan).process_historical_data()
+
+        return self.engineer_appended_time_series(engineered_data)
+
+    def engineer_appended_time_series(self, engineered_data):
+        """
+        Create the time series features of new rows added to the saved processed data, and of the saved rows after them.
+        Returns the rows of every month from the first new date on, to save in place of those months.
+        """
+        missing_columns = set(engineered_data.columns) - set(self.store.dataset().schema.names)
+        if missing_columns:
+            raise ValueError(f"Processed data saved without columns {sorted(missing_columns)}, preprocess all the data instead")
+
+        first_date = engineered_data['date'].min()
+        window = TimeSeriesEngineeringLayer(None, self.plan).planned_window('quantity', config.TIME_SERIES_PERIODS)
+
+        # Saved rows of the months rewritten, the ones before the first new date kept as they are
+        saved = self.store.read(start_date=first_date.replace(day=1))
+        kept = saved[saved['date'] < first_date]
+
+        # Saved rows on or after the first new date, except the ones the new rows replace, get their features again
+        later = saved.loc[saved['date'] >= first_date, engineered_data.columns]
+        replaced = later.set_index(['product_id', 'date']).index.isin(engineered_data.set_index(['product_id', 'date']).index)
+        data = pd.concat([later[~replaced], engineered_data], ignore_index=True)
+
+        data = TimeSeriesEngineeringLayer(data, self.plan).process_appended_data(self.read_history(data, first_date, window))
+
+        logging.info(f"Time series features recomputed for {len(data)} rows from {first_date.date()}")
+
+        return pd.concat([kept, data[kept.columns]], ignore_index=True)
+
+    def read_history(self, data, first_date, window):
+        """
+        Read the saved quantities of the products before the first new date, as far back as the time series features look.
+        """
+        columns = ['product_id', 'date', 'quantity']
+        if window == 0:
+            return pd.DataFrame(columns=columns)
+
+        product_ids = data['product_id'].unique()
+        history = self.store.read(columns=columns, start_date=first_date - pd.Timedelta(days=window),
+                                  end_date=first_date - pd.Timedelta(days=1), product_ids=product_ids)
+
+        # Features look back a number of records, so products with missing days in the window read further back
+        counts = history['product_id'].value_counts()
+        sparse_ids = [product_id for product_id in product_ids if counts.get(product_id, 0) < window]
+        if sparse_ids:
+            earlier = self.store.read(columns=columns, end_date=first_date - pd.Timedelta(days=window + 1), product_ids=sparse_ids)
+            history = pd.concat([earlier, history], ignore_index=True)
+
+        return history
 
     def handle_data(self, data):
         """
-        Save data into a file, creating a backup.
+        Save data into a Parquet dataset, creating a backup.
         """
         logging.info(f"Saving historical data...")
 
-        # Define paths for the backup and main files
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        backup_dir = config.HISTORICAL_DATA_BACKUP
-        backup_file_path = os.path.join(backup_dir, f'processed_data_{timestamp}.csv')
-        main_file_path = os.path.join(self.output_path, 'processed_data.csv')
+        main_path = self.store.path
 
         # Create directories if they don't exist
         try:
             os.makedirs(self.output_path, exist_ok=True)
-            os.makedirs(backup_dir, exist_ok=True)
         except Exception as e:
             logging.error(f"Error creating directories: {e}")
             return
 
-        # Save a main and backup files
+        # Save the main dataset, only the months changed if appending
         try:
-            data.to_csv(main_file_path, index=False)
-            data.to_csv(backup_file_path, index=False)
+            if self.appending:
+                self.store.write_partitions(data)
+            else:
+                self.store.write(data)
 
-            logging.info(f"Data saved at {main_file_path} (backup at: {backup_file_path})")
+            logging.info(f"Data saved at {main_path}")
         except Exception as e:
-            logging.error(f"Error saving data at {main_file_path} (backup at: {backup_file_path}) | Error: {e}")
+            logging.error(f"Error saving data at {main_path} | Error: {e}")
             return
 
+        # Remember the raw files preprocessed, so incremental runs skip them
+        try:
+            self.manifest.record(self.list_raw_files(), replace=not self.incremental)
+        except Exception as e:
+            logging.error(f"Error updating the raw file manifest | Error: {e}")
+
+        # Back up the dataset and the manifest, linking the files unchanged since earlier backups instead of copying them
+        try:
+            snapshot = self.backups.snapshot([main_path, self.manifest.path])
+            self.backups.prune()
+
+            logging.info(f"Data backed up as snapshot {snapshot} at {self.backups.snapshots_path}")
+        except Exception as e:
+            logging.error(f"Error backing up data at {self.backups.directory} | Error: {e}")
+
+        # Keep the latest sales for prediction requests that only send new observations, and the client's product IDs for the batch forecast
+        try:
+            observations = data[['product_id', 'product_name', 'category', 'per_item_value', 'in_stock', 'date', 'quantity']]
+            if 'original_product_id' in data.columns:
+                observations = observations.assign(source_product_id=data['original_product_id'])
+            feature_history_store.update(observations)
+            feature_history_store.flush()
+        except Exception as e:
+            logging.error(f"Error updating the feature history | Error: {e}")
+
         return data
\ No newline at end of file
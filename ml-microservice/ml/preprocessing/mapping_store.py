@@ -0,0 +1,108 @@
+from ml.config import config
+from ml.preprocessing.file_lock import file_lock
+import pandas as pd
+import threading
+import logging
+import os
+
+class MappingStore:
+
+    def __init__(self, directory=None):
+        """
+        Initialise a process-wide cache of the categorical encoding mappings, read from disk only when a file changes.
+        """
+        self.directory = directory or config.MAPPINGS
+        self.mappings = {}  # Feature -> file version and mapping
+        self.lock = threading.Lock()
+
+    def mapping_path(self, feature):
+        """
+        Get the path of a feature's mapping file.
+        """
+        return os.path.join(self.directory, f'{feature}_map.csv')
+
+    def file_version(self, path):
+        """
+        Identify the version of a mapping file by its modification time and size.
+        """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+
+        return stat.st_mtime_ns, stat.st_size
+
+    def get(self, feature):
+        """
+        Get a copy of a feature's mapping, reading its file only if it changed since it was cached, or an empty one if there's no file.
+        """
+        mapping_path = self.mapping_path(feature)
+        version = self.file_version(mapping_path)
+
+        if version is None:
+            logging.warning(f"Mapping file not found for {feature}: {mapping_path}")
+            return {}
+
+        with self.lock:
+            cached = self.mappings.get(feature)
+
+            if cached is None or cached[0] != version:
+                try:
+                    # Load the CSV into a DataFrame and convert it to a dictionary
+                    mapping = pd.read_csv(mapping_path).set_index(feature).to_dict()[f'{feature}_encoded']
+                except Exception as e:
+                    logging.error(f"Error loading mapping for {feature}: {e}")
+                    return {}
+
+                cached = (version, mapping)
+                self.mappings[feature] = cached
+                logging.info(f"Mapping loaded for {feature}")
+
+        # A copy, so callers can add encodings without changing the cache
+        return dict(cached[1])
+
+    def save(self, feature, mapping):
+        """
+        Save a feature's mapping to its CSV file, replacing the previous one in one step, and cache it.
+        The mapping is merged under a file lock with the one saved, e.g. by another worker in the meantime: values already saved keep their codes,
+        and new values whose code is taken get the next free ones. Returns the merged mapping.
+        """
+        mapping_path = self.mapping_path(feature)
+        os.makedirs(self.directory, exist_ok=True)
+
+        with file_lock(f'{mapping_path}.lock'):
+            merged = self.get(feature) if self.file_version(mapping_path) else {}
+
+            # Add the new values, allocating codes from the merged mapping
+            used_codes = set(merged.values())
+            next_code = max(used_codes, default=0) + 1
+            for value, code in mapping.items():
+                if value in merged:
+                    continue
+                if code in used_codes:
+                    code = next_code
+                merged[value] = code
+                used_codes.add(code)
+                next_code = max(next_code, code + 1)
+
+            # Write to a temporary file first so readers never see a partial file
+            temp_path = f'{mapping_path}.{os.getpid()}.{threading.get_ident()}.tmp'
+            mapping_df = pd.DataFrame(list(merged.items()), columns=[feature, f'{feature}_encoded'])
+            mapping_df.to_csv(temp_path, index=False)
+            os.replace(temp_path, mapping_path)
+
+            with self.lock:
+                self.mappings[feature] = (self.file_version(mapping_path), dict(merged))
+
+        logging.info(f"Mapping saved for {feature}")
+
+        return merged
+
+    def preload(self, features):
+        """
+        Cache the mappings of the given features, e.g. before forking workers so they share them.
+        """
+        for feature in features:
+            self.get(feature)
+
+mapping_store = MappingStore()
@@ -1,6 +1,7 @@
 import logging
 import os
 import pandas as pd
+import numpy as np
 
 class PredictionDataIngestionLayer:
 
@@ -10,30 +11,19 @@ class PredictionDataIngestionLayer:
 
     def process(self):
         """
-        Process the prediction data using a dictionary of lists to create a DataFrame.
+        Process the prediction data by cross joining the products with the prediction dates.
         """
         logging.info("Starting ingestion of prediction data process...")
 
-        prediction_data = []
-
         # Get a record per product from the historical sales
         products = self.historical_data[['source_product_id', 'product_name', 'category', 'per_item_value', 'in_stock']].drop_duplicates()
 
-        # For each unique product, append the prediction dates
-        for _, product in products.iterrows():
-            for date in self.prediction_dates:
-                prediction_data.append({
-                    'source_product_id': product['source_product_id'],
-                    'product_name': product['product_name'],
-                    'category': product['category'],
-                    'per_item_value': product['per_item_value'],
-                    'in_stock': product['in_stock'],
-                    'date': date,
-                    'quantity': None  # No sales data for future prediction dates
-                })
-
-        # Convert the prediction data to a DataFrame
-        df_prediction = pd.DataFrame(prediction_data)
+        # Type the prediction dates like the historical ones
+        dates = pd.DataFrame({'date': pd.Series(self.prediction_dates, dtype=self.historical_data['date'].dtype)})
+
+        # Pair each unique product with every prediction date
+        df_prediction = products.merge(dates, how='cross')
+        df_prediction['quantity'] = np.nan  # No sales data for future prediction dates
 
         # Combine historical and prediction data into a DataFrames
         df = pd.concat([self.historical_data, df_prediction], ignore_index=True)
@@ -8,8 +8,9 @@ import logging
 
 class PredictionDataPreprocessingPipeline(PreprocessingPipeline):
 
-    def __init__(self, historical_data, prediction_dates, output_path=None):
-        super().__init__(output_path=output_path)
+    def __init__(self, historical_data, prediction_dates, output_path=None, features=None):
+        self.features = features or config.MAIN_FEATURES
+        super().__init__(output_path=output_path, features=self.features)
         self.historical_data = historical_data
         self.prediction_dates = prediction_dates
 
@@ -20,16 +21,16 @@ class PredictionDataPreprocessingPipeline(PreprocessingPipeline):
         return CleaningLayer(ingested_data).process_prediction_data()
 
     def engineer_features(self, cleaned_data):
-        return FeatureEngineeringLayer(cleaned_data).process_prediction_data()
+        return FeatureEngineeringLayer(cleaned_data, self.plan).process_prediction_data()
 
     def engineer_time_series(self, engineered_data):
-        return TimeSeriesEngineeringLayer(engineered_data).process_prediction_data()
+        return TimeSeriesEngineeringLayer(engineered_data, self.plan).process_prediction_data()
 
     def handle_data(self, preprocessed_data):
         logging.info("Handling prediction data...")
 
         # Drop any columns that are not in the required features list, keep ones necessary for identifying predictions
-        required_columns = config.MAIN_FEATURES + ['source_product_id', 'date']
+        required_columns = self.features + ['source_product_id', 'date']
         prediction_data = preprocessed_data[required_columns]
 
         return prediction_data
\ No newline at end of file
@@ -1,31 +1,155 @@
 from ml.config import config
+from ml.preprocessing.feature_plan import FeaturePlan
+import hashlib
+import inspect
 import logging
+import time
 import os
 from datetime import datetime
 
 class PreprocessingPipeline:
 
-    def __init__(self, data_path=None, output_path=None):
+    # Stages run in order, each taking the previous one's output
+    STAGES = ['ingest_data', 'clean_data', 'engineer_features', 'engineer_time_series', 'handle_data']
+
+    # Stages whose output can be checkpointed, the last one saving or returning the data
+    CHECKPOINTED_STAGES = STAGES[:-1]
+
+    # Layers run by each stage, their code being part of the stage's version
+    STAGE_LAYERS = {}
+
+    def __init__(self, data_path=None, output_path=None, features=None, resume=False, cache=None):
+        """
+        Initialise a pipeline. With a cache, the output of each stage is checkpointed under a key fingerprinting its input
+        and the stage's code and settings, and if resuming, stages with a checkpoint are read back instead of run.
+        """
         self.data_path = data_path
         self.output_path = output_path
+        self.plan = FeaturePlan(features)  # Only the features needed by the target list are computed
+        self.resume = resume
+        self.cache = cache
+        self.fingerprint = None  # Fingerprint of the next stage's input, checkpoints not used if None
+
+    def dry_run(self):
+        """
+        Report which optional features would be computed and which skipped, without running the pipeline.
+        """
+        report = self.plan.report()
+
+        logging.info(f"Features computed: {report['computed']}")
+        logging.info(f"Features skipped: {report['skipped']}")
+
+        return report
+
+    def input_fingerprint(self):
+        """
+        Fingerprint the pipeline's input, None if it can't be, so no stage is checkpointed.
+        """
+        return None
+
+    def stage_settings(self):
+        """
+        Get the settings changing the output of the stages, part of their version.
+        """
+        return {
+            'pipeline': type(self).__name__,
+            'features': None if self.plan.features is None else sorted(self.plan.features),
+            'periods': self.plan.periods,
+        }
+
+    def stage_version(self, stage):
+        """
+        Fingerprint a stage's code, the stage itself and the modules of its layers, and the pipeline's settings.
+        """
+        digest = hashlib.sha256(repr(self.stage_settings()).encode())
+        digest.update(inspect.getsource(getattr(type(self), stage)).encode())
+
+        for layer in self.STAGE_LAYERS.get(stage, []):
+            digest.update(inspect.getsource(inspect.getmodule(layer)).encode())
+
+        return digest.hexdigest()
 
-    def run(self):
+    def checkpoint_key(self, stage):
+        """
+        Get the key of a stage's checkpoint, from the fingerprint of its input and its version, None if it's not checkpointed.
+        The input is fingerprinted by the key of the previous stage's output, so the chain of keys goes back to the pipeline's input.
+        """
+        if self.cache is None or self.fingerprint is None or stage not in self.CHECKPOINTED_STAGES:
+            return None
+
+        return hashlib.sha256(f'{self.fingerprint}:{stage}:{self.stage_version(stage)}'.encode()).hexdigest()
+
+    def run_checkpointed(self, stage, *args):
+        """
+        Run a stage and checkpoint its output, or read it from its checkpoint if resuming.
+        """
+        key = self.checkpoint_key(stage)
+        if key is None:
+            self.fingerprint = None
+            return getattr(self, stage)(*args)
+
+        self.fingerprint = key
+
+        if self.resume:
+            result = self.cache.get(key)
+            if result is not None:
+                logging.info(f"Stage {stage} read from checkpoint {key}")
+                return result
+
+        result = getattr(self, stage)(*args)
+
+        try:
+            self.cache.put(key, result)
+        except Exception as e:
+            logging.error(f"Error checkpointing stage {stage}: {e}")
+
+        return result
+
+    def run_stage(self, stage, on_stage, *args):
+        """
+        Run one stage, reporting its start and duration to the optional `on_stage(stage, status, seconds)` callback.
+        """
+        if on_stage:
+            on_stage(stage, 'running')
+
+        start = time.perf_counter()
+        result = self.run_checkpointed(stage, *args)
+        seconds = time.perf_counter() - start
+
+        logging.info(f"Stage {stage} completed in {seconds:.2f}s")
+        if on_stage:
+            on_stage(stage, 'completed', seconds)
+
+        return result
+
+    def run(self, on_stage=None):
         logging.info("Starting preprocessing pipeline...")
 
+        skipped_features = self.plan.skipped_features()
+        if skipped_features:
+            logging.info(f"Skipping features not required: {skipped_features}")
+
+        # Fingerprint the input to find or save the stages' checkpoints
+        try:
+            self.fingerprint = self.input_fingerprint() if self.cache is not None else None
+        except Exception as e:
+            logging.warning(f"Stages not checkpointed, the input can't be fingerprinted: {e}")
+            self.fingerprint = None
+
         # Step 1: Ingest the data
-        ingested_data = self.ingest_data()
+        ingested_data = self.run_stage('ingest_data', on_stage)
 
         # Step 2: Call the specific cleaning process
-        cleaned_data = self.clean_data(ingested_data)
+        cleaned_data = self.run_stage('clean_data', on_stage, ingested_data)
 
         # Step 3: Engineer features as required
-        engineered_data = self.engineer_features(cleaned_data)
+        engineered_data = self.run_stage('engineer_features', on_stage, cleaned_data)
 
         # Step 4: Engineer the time series
-        time_series_data = self.engineer_time_series(engineered_data)
+        time_series_data = self.run_stage('engineer_time_series', on_stage, engineered_data)
 
         # Step 5: Save or handle the preprocessed data
-        final_data = self.handle_data(time_series_data)
+        final_data = self.run_stage('handle_data', on_stage, time_series_data)
 
         logging.info("Preprocessing pipeline completed successfully")
 
@@ -0,0 +1,171 @@
+from ml.config import config
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+import pandas as pd
+import tempfile
+import logging
+import shutil
+import os
+
+class ProcessedDataStore:
+
+    PARTITION = 'year_month'  # Partition key, e.g. '2024-01', named apart from the 'year' and 'month' features
+    SCHEMA_FILE = '_common_metadata'  # Schema of the whole dataset, read before the partitions
+
+    def __init__(self, path=None, compression=None):
+        """
+        Initialise a store of processed historical data, saved as a Parquet dataset partitioned by the month of the 'date' column,
+        so readers only decode the columns and months they need.
+        """
+        self.path = path or config.PROCESSED_DATASET
+        self.compression = compression or config.PROCESSED_DATA_COMPRESSION
+
+    def to_table(self, data):
+        """
+        Convert processed data to an Arrow table, with the dates as timestamps and the partition key of each row.
+        Rows are ordered by date, so they're read back in the order of the partitions.
+        """
+        if 'date' not in data.columns:
+            return pa.Table.from_pandas(data, preserve_index=False)
+
+        data = data.assign(date=pd.to_datetime(data['date'])).sort_values('date', kind='stable')
+        dates = data['date']
+        table = pa.Table.from_pandas(data, preserve_index=False)
+
+        return table.append_column(self.PARTITION, pa.array(dates.dt.strftime('%Y-%m'), type=pa.string()))
+
+    def write(self, data):
+        """
+        Save processed data in place of the previous data, readers never seeing a partial dataset.
+        """
+        table = self.to_table(data)
+        partitioned = self.PARTITION in table.column_names
+
+        # Write to a temporary directory first, then swap it in, deleting it if anything fails
+        temp_path = self.temp_path()
+        try:
+            ds.write_dataset(
+                table,
+                temp_path,
+                format='parquet',
+                partitioning=ds.partitioning(pa.schema([(self.PARTITION, pa.string())]), flavor='hive') if partitioned else None,
+                file_options=ds.ParquetFileFormat().make_write_options(compression=self.compression),
+                basename_template='part-{i}.parquet',
+            )
+            pq.write_metadata(table.schema, os.path.join(temp_path, self.SCHEMA_FILE))
+
+            self.swap_in(temp_path)
+        except Exception:
+            shutil.rmtree(temp_path, ignore_errors=True)
+            raise
+
+        logging.info(f"Processed data saved at {self.path} ({len(table)} rows)")
+
+    def temp_path(self):
+        """
+        Create an empty temporary directory next to the dataset, to write a new version of it.
+        Its name is unique, so writers in other threads or processes never share it.
+        """
+        parent_path = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(parent_path, exist_ok=True)
+
+        temp_path = tempfile.mkdtemp(prefix=f'{os.path.basename(self.path)}.', suffix='.tmp', dir=parent_path)
+        os.chmod(temp_path, 0o755)  # Readable like a directory made as usual, once swapped in
+
+        return temp_path
+
+    def swap_in(self, temp_path):
+        """
+        Replace the dataset with the one written to a temporary directory.
+        """
+        old_path = f'{temp_path}.old'
+        if os.path.exists(self.path):
+            os.rename(self.path, old_path)
+        os.rename(temp_path, self.path)
+        shutil.rmtree(old_path, ignore_errors=True)
+
+    def exists(self):
+        """
+        Check whether a dataset has been saved.
+        """
+        return os.path.exists(os.path.join(self.path, self.SCHEMA_FILE))
+
+    def write_partitions(self, data):
+        """
+        Save the data of some months in place of the saved rows of those months, keeping the other months' files as they are.
+        The kept files are hard linked into the new version of the dataset, so only the months given are written.
+        """
+        schema = self.dataset().schema
+        table = self.to_table(data)
+
+        # Same columns and types as the saved data, so the months are read as one dataset
+        table = table.select(schema.names).cast(schema)
+        months = set(table.column(self.PARTITION).to_pylist())
+
+        temp_path = self.temp_path()
+        try:
+            ds.write_dataset(
+                table,
+                temp_path,
+                format='parquet',
+                partitioning=ds.partitioning(pa.schema([(self.PARTITION, pa.string())]), flavor='hive'),
+                file_options=ds.ParquetFileFormat().make_write_options(compression=self.compression),
+                basename_template='part-{i}.parquet',
+            )
+            pq.write_metadata(schema, os.path.join(temp_path, self.SCHEMA_FILE))
+
+            # Link the files of the months not given
+            for name in os.listdir(self.path):
+                partition_path = os.path.join(self.path, name)
+                if not os.path.isdir(partition_path) or name.split('=', 1)[-1] in months:
+                    continue
+
+                os.makedirs(os.path.join(temp_path, name))
+                for file_name in os.listdir(partition_path):
+                    os.link(os.path.join(partition_path, file_name), os.path.join(temp_path, name, file_name))
+
+            self.swap_in(temp_path)
+        except Exception:
+            shutil.rmtree(temp_path, ignore_errors=True)
+            raise
+
+        logging.info(f"Processed data saved at {self.path} ({len(table)} rows in {len(months)} months replaced)")
+
+    def dataset(self):
+        """
+        Open the saved dataset with its schema, without reading any rows.
+        """
+        schema = pq.read_schema(os.path.join(self.path, self.SCHEMA_FILE))
+        partitioning = ds.partitioning(pa.schema([(self.PARTITION, pa.string())]), flavor='hive') if self.PARTITION in schema.names else None
+
+        return ds.dataset(self.path, schema=schema, format='parquet', partitioning=partitioning)
+
+    def read(self, columns=None, start_date=None, end_date=None, product_ids=None):
+        """
+        Read the processed data, only the given columns (all by default) and the rows between two dates (included)
+        and of the given products if given.
+        Months outside the dates are skipped without opening their files.
+        """
+        dataset = self.dataset()
+        columns = columns or [name for name in dataset.schema.names if name != self.PARTITION]
+
+        # Filter the partitions by month, then the rows by date
+        row_filter = None
+        if start_date is not None:
+            start_date = pd.Timestamp(start_date)
+            row_filter = (ds.field(self.PARTITION) >= start_date.strftime('%Y-%m')) & (ds.field('date') >= start_date)
+        if end_date is not None:
+            end_date = pd.Timestamp(end_date)
+            end_filter = (ds.field(self.PARTITION) <= end_date.strftime('%Y-%m')) & (ds.field('date') <= end_date)
+            row_filter = end_filter if row_filter is None else row_filter & end_filter
+        if product_ids is not None:
+            product_filter = ds.field('product_id').isin(list(product_ids))
+            row_filter = product_filter if row_filter is None else row_filter & product_filter
+
+        table = dataset.to_table(columns=columns, filter=row_filter)
+        logging.info(f"Processed data read from {self.path} ({len(table)} rows, {len(columns)} columns)")
+
+        return table.to_pandas()
+
+processed_data_store = ProcessedDataStore()
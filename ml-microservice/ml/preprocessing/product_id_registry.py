@@ -0,0 +1,85 @@
+from ml.config import config
+from ml.preprocessing.file_lock import file_lock
+import pandas as pd
+import numpy as np
+import threading
+import hashlib
+import logging
+import os
+
+class ProductIdRegistry:
+
+    def __init__(self, path=None):
+        """
+        Initialise the registry of product IDs generated from product names and categories, persisted on disk.
+        """
+        self.path = path or os.path.join(config.MAPPINGS, 'product_ids.csv')
+        self.ids = None  # Loaded on first use, '{name}_{category}' -> product ID
+        self.lock = threading.Lock()
+
+    def read_file(self):
+        """
+        Read the saved product IDs, if any.
+        """
+        if not os.path.exists(self.path):
+            return {}
+
+        try:
+            saved = pd.read_csv(self.path, dtype=str, keep_default_na=False)
+            return dict(zip(saved['key'], saved['product_id']))
+        except Exception as e:
+            logging.error(f"Error loading product IDs from {self.path}: {e}")
+            return {}
+
+    def save(self):
+        """
+        Save the product IDs, merged under a file lock with any saved by other processes in the meantime.
+        """
+        try:
+            with file_lock(f'{self.path}.lock'):
+                ids = {**self.read_file(), **self.ids}
+
+                # Write to a temporary file first so readers never see a partial file
+                temp_path = f'{self.path}.{os.getpid()}.tmp'
+                pd.DataFrame({'key': list(ids.keys()), 'product_id': list(ids.values())}).to_csv(temp_path, index=False)
+                os.replace(temp_path, self.path)
+
+            self.ids = ids
+            logging.info(f"Product IDs saved at {self.path}")
+        except Exception as e:
+            logging.error(f"Error saving product IDs at {self.path}: {e}")
+
+    def generate_unique_id(self, unique_string):
+        """
+        Generate a unique product ID by hashing the '{name}_{category}' string.
+        """
+        return hashlib.md5(unique_string.encode()).hexdigest()[:8]  # Return an 8-character hash
+
+    def get_ids(self, names, categories):
+        """
+        Get the product IDs for a column of names and categories, hashing each distinct pair only the first time it's seen.
+        """
+        # Build the same '{name}_{category}' strings the IDs have always been hashed from
+        keys = names.astype(str) + '_' + categories.astype(str)
+
+        # Work on the distinct pairs only
+        codes, unique_keys = pd.factorize(keys)
+
+        with self.lock:
+            if self.ids is None:
+                self.ids = self.read_file()
+
+            # Hash the pairs not seen before
+            new_keys = [key for key in unique_keys if key not in self.ids]
+            if new_keys:
+                self.ids.update({key: self.generate_unique_id(key) for key in new_keys})
+                self.save()
+
+            unique_ids = np.array([self.ids[key] for key in unique_keys], dtype=object)
+
+        logging.info(f"{len(new_keys)} new product IDs generated for {len(unique_keys)} products")
+
+        # Map the IDs back to every row
+        return pd.Series(unique_ids[codes], index=names.index)
+
+product_id_registry = ProductIdRegistry()
@@ -0,0 +1,85 @@
+from ml.config import config
+from datetime import datetime
+import hashlib
+import logging
+import json
+import os
+
+class RawFileManifest:
+
+    CHUNK_BYTES = 1 << 20  # Bytes of a file hashed at a time
+
+    def __init__(self, path=None):
+        """
+        Initialise the manifest of the raw files already preprocessed, a JSON file keyed by the SHA-256 of each file's content,
+        so a file is recognised however it's named or uploaded.
+        """
+        self.path = path or config.RAW_FILE_MANIFEST
+
+    def hash_file(self, file_path):
+        """
+        Hash a file's content, reading it in chunks.
+        """
+        digest = hashlib.sha256()
+
+        with open(file_path, 'rb') as file:
+            for chunk in iter(lambda: file.read(self.CHUNK_BYTES), b''):
+                digest.update(chunk)
+
+        return digest.hexdigest()
+
+    def load(self):
+        """
+        Load the recorded files, content hash -> file name, size and time ingested, none if there's no manifest.
+        """
+        try:
+            with open(self.path) as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return {}
+
+    def hash_files(self, files):
+        """
+        Hash files, returning each content once with the first file having it.
+        """
+        hashed = {}
+
+        for file_path in files:
+            hashed.setdefault(self.hash_file(file_path), file_path)
+
+        return [(file_path, file_hash) for file_hash, file_path in hashed.items()]
+
+    def new_files(self, files):
+        """
+        Get the files not recorded yet, with their hashes.
+        """
+        recorded = self.load()
+        new_files = []
+
+        for file_path, file_hash in self.hash_files(files):
+            if file_hash in recorded:
+                logging.info(f"Skipping {file_path}, already preprocessed")
+                continue
+
+            new_files.append((file_path, file_hash))
+
+        return new_files
+
+    def record(self, files, replace=False):
+        """
+        Record files, given with their hashes, as preprocessed, replacing the recorded ones if `replace`, e.g. after a full preprocessing.
+        """
+        entries = {} if replace else self.load()
+        ingested_at = datetime.now().isoformat(timespec='seconds')
+
+        for file_path, file_hash in files:
+            entries[file_hash] = {'file': os.path.basename(file_path), 'bytes': os.path.getsize(file_path), 'ingested_at': ingested_at}
+
+        # Write to a temporary file first so readers never see a partial manifest
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        temp_path = f'{self.path}.{os.getpid()}.tmp'
+        with open(temp_path, 'w') as file:
+            json.dump(entries, file, indent=2)
+        os.replace(temp_path, self.path)
+
+        logging.info(f"Raw file manifest saved at {self.path} ({len(entries)} files)")
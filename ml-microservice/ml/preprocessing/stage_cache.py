@@ -0,0 +1,94 @@
+from ml.config import config
+import pyarrow as pa
+import pyarrow.parquet as pq
+import logging
+import os
+
+class StageCache:
+
+    def __init__(self, directory=None, max_bytes=None):
+        """
+        Initialise a cache of pipeline stage outputs, each saved as a Parquet file named by its key,
+        so a stage run again on the same input with the same code is read back instead of recomputed.
+        Files are touched when read and the least recently used ones deleted beyond the size budget.
+        """
+        self.directory = directory or config.STAGE_CACHE
+        self.max_bytes = max_bytes or config.STAGE_CACHE_MAX_BYTES
+
+    def checkpoint_path(self, key):
+        """
+        Get the path of the checkpoint saved under a key.
+        """
+        return os.path.join(self.directory, f'{key}.parquet')
+
+    def get(self, key):
+        """
+        Read the output saved under a key, None if there's none.
+        """
+        checkpoint_path = self.checkpoint_path(key)
+
+        try:
+            data = pq.read_table(checkpoint_path).to_pandas()
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logging.error(f"Error reading checkpoint {checkpoint_path}: {e}")
+            return None
+
+        # Mark it as recently used
+        try:
+            os.utime(checkpoint_path)
+        except OSError:
+            pass
+
+        return data
+
+    def put(self, key, data):
+        """
+        Save a stage's output under a key, with its index and types, then evict the oldest outputs beyond the budget.
+        Outputs that can't be saved as columns, e.g. mixing numbers and text in a column, are not cached.
+        """
+        checkpoint_path = self.checkpoint_path(key)
+        os.makedirs(self.directory, exist_ok=True)
+
+        try:
+            table = pa.Table.from_pandas(data, preserve_index=True)
+        except Exception as e:
+            logging.warning(f"Output not checkpointed, it can't be saved as columns: {e}")
+            return
+
+        # Write to a temporary file first so readers never see a partial checkpoint
+        temp_path = f'{checkpoint_path}.{os.getpid()}.tmp'
+        pq.write_table(table, temp_path, compression='zstd')
+        os.replace(temp_path, checkpoint_path)
+
+        logging.info(f"Checkpoint saved at {checkpoint_path} ({len(data)} rows)")
+
+        self.evict(keep=checkpoint_path)
+
+    def evict(self, keep=None):
+        """
+        Delete the least recently used checkpoints until the cache fits the size budget, except the one to keep.
+        """
+        try:
+            entries = [entry for entry in os.scandir(self.directory) if entry.name.endswith('.parquet')]
+        except FileNotFoundError:
+            return
+
+        checkpoints = sorted((entry.stat().st_mtime_ns, entry.stat().st_size, entry.path) for entry in entries)
+        total_bytes = sum(size for _, size, _ in checkpoints)
+
+        for _, size, path in checkpoints:
+            if total_bytes <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+
+            try:
+                os.remove(path)
+                total_bytes -= size
+                logging.info(f"Checkpoint evicted: {path}")
+            except OSError:
+                pass
+
+stage_cache = StageCache()
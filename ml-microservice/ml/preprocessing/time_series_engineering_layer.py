@@ -1,3 +1,6 @@
+from ml.config import config
+from ml.preprocessing.feature_plan import FeaturePlan
+from ml.preprocessing.time_series_panel import TimeSeriesPanel, locate_in_groups
 import logging
 import pandas as pd
 import numpy as np
@@ -5,38 +8,128 @@ from datetime import datetime
 
 class TimeSeriesEngineeringLayer:
 
-    def __init__(self, data):
+    def __init__(self, data, plan=None):
         self.data = data
+        self.plan = plan or FeaturePlan()
 
-    def create_time_series_features(self, df, column, periods=[1, 7, 14, 30, 90, 365]):
+    def create_time_series_features(self, df, column, periods=None):
         """
-        Create lag and rolling average columns for a given feature, e.g., 'quantity' across specified days.
+        Create lag and rolling average columns for a given feature, e.g., 'quantity' across specified days, skipping the ones not planned.
         """
-        # Ensure 'date' is in datetime format, sort it and group it
+        periods = periods or config.TIME_SERIES_PERIODS
+
+        # Ensure 'date' is in datetime format and sort it
         if not pd.api.types.is_datetime64_any_dtype(df['date']):
             df['date'] = pd.to_datetime(df['date'], format='%Y-%m-%d')
         df = df.sort_values(by=['product_id', 'date'])
-        grouped = df.groupby('product_id')
+
+        # Lay the history out as one contiguous array per product, computing every feature from it in one sweep
+        panel = TimeSeriesPanel(df['product_id'].to_numpy(), pd.to_numeric(df[column], errors='coerce'))
 
         # Loop through defined periods of time
         for period in periods:
             # Create lags
             lag_col_name = f'{column}_lag_{period}'
-            df[lag_col_name] = grouped[column].shift(period)
-            df[lag_col_name] = pd.to_numeric(df[lag_col_name], errors='coerce')
+            if self.plan.needs(lag_col_name):
+                df[lag_col_name] = panel.lag(period)
 
             # Create rolling averages, except for 1 day period
-            if period != 1:
-                rolling_col_name = f'{column}_rolling_avg_{period}'
-                df[rolling_col_name] = grouped[column].transform(lambda x: x.rolling(period, min_periods=1).mean())
+            rolling_col_name = f'{column}_rolling_avg_{period}'
+            if period != 1 and self.plan.needs(rolling_col_name):
+                df[rolling_col_name] = panel.rolling_mean(period)
 
         # Clean up the decimal spaces
-        df = df.round(4)
+        float_columns = df.select_dtypes(include='float').columns
+        df[float_columns] = df[float_columns].round(4)
 
         logging.info("Time series features created")
 
         return df
 
+    def planned_window(self, column, periods):
+        """
+        Get the longest history, in days, that the planned lag and rolling average features read.
+        """
+        windows = [
+            period for period in periods
+            if self.plan.needs(f'{column}_lag_{period}') or (period != 1 and self.plan.needs(f'{column}_rolling_avg_{period}'))
+        ]
+
+        return max(windows, default=0)
+
+    def select_prediction_window(self, df, column, window):
+        """
+        Keep the records for prediction (no 'column' value) and, per product, only the `window` days of history before the first of them.
+        """
+        codes, group_start, positions = locate_in_groups(df['product_id'].to_numpy())
+        is_prediction = df[column].isna().to_numpy()
+
+        # Find the first record for prediction of each product
+        first_prediction = np.full(len(df), np.iinfo(np.int64).max)
+        np.minimum.at(first_prediction, group_start[is_prediction], positions[is_prediction])
+
+        # Keep the history window before it and everything after
+        keep = positions >= first_prediction[group_start] - window
+
+        return df[keep]
+
+    def create_prediction_time_series_features(self, df, column, periods=None):
+        """
+        Create lag and rolling average columns only for the records for prediction, reading just the history window each feature needs.
+        """
+        periods = periods or config.TIME_SERIES_PERIODS
+
+        # Ensure 'date' is in datetime format and sort it
+        if not pd.api.types.is_datetime64_any_dtype(df['date']):
+            df['date'] = pd.to_datetime(df['date'], format='%Y-%m-%d')
+        df = df.sort_values(by=['product_id', 'date'])
+
+        # Drop the history that no feature reads
+        df = self.select_prediction_window(df, column, self.planned_window(column, periods))
+
+        # Compute the features at the records for prediction only
+        panel = TimeSeriesPanel(df['product_id'].to_numpy(), pd.to_numeric(df[column], errors='coerce'))
+        rows = np.flatnonzero(df[column].isna().to_numpy())
+        df = df.iloc[rows].copy()
+
+        for period in periods:
+            # Create lags
+            lag_col_name = f'{column}_lag_{period}'
+            if self.plan.needs(lag_col_name):
+                df[lag_col_name] = panel.lag(period, rows)
+
+            # Create rolling averages, except for 1 day period
+            rolling_col_name = f'{column}_rolling_avg_{period}'
+            if period != 1 and self.plan.needs(rolling_col_name):
+                df[rolling_col_name] = panel.rolling_mean(period, rows)
+
+        # Clean up the decimal spaces
+        float_columns = df.select_dtypes(include='float').columns
+        df[float_columns] = df[float_columns].round(4)
+
+        # Drop the target column, not known for prediction
+        df.drop(columns=[column], inplace=True)
+
+        logging.info("Time series features created for prediction records")
+
+        return df
+
+    def create_appended_time_series_features(self, df, history, column):
+        """
+        Create lag and rolling average columns for records appended to a saved history, e.g. a new day of sales,
+        reading their products' records in the history (with 'product_id', 'date' and `column` columns) but computing only the appended ones.
+        """
+        history = history[history['product_id'].isin(df['product_id'])]
+        if not pd.api.types.is_datetime64_any_dtype(df['date']):
+            df['date'] = pd.to_datetime(df['date'], format='%Y-%m-%d')
+
+        # Appended records come after the history, so they're told apart by their position
+        combined = self.create_time_series_features(pd.concat([history, df], ignore_index=True), column)
+        appended = combined[combined.index >= len(history)]
+
+        # Restore the types changed by the missing values of the history records
+        return appended.astype(df.dtypes.to_dict())
+
     def remove_historical_data_records(self, df):
         """
         Remove historical data from the dataframe.
@@ -61,13 +154,22 @@ class TimeSeriesEngineeringLayer:
 
         return df
 
+    def process_appended_data(self, history):
+        """
+        Create new features for records appended to the saved history of their products.
+        """
+        logging.info("Starting time series engineering process for appended records...")
+
+        df = self.create_appended_time_series_features(self.data, history, 'quantity')
+
+        return df
+
     def process_prediction_data(self):
         """
         Re-structure a DataFrame with data for prediction and create new features.
         """
         logging.info("Starting time series engineering process...")
 
-        df = self.create_time_series_features(self.data, 'quantity')
-        df = self.remove_historical_data_records(df)
+        df = self.create_prediction_time_series_features(self.data, 'quantity')
 
         return df
\ No newline at end of file
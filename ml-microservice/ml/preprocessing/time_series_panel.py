@@ -0,0 +1,72 @@
+import pandas as pd
+import numpy as np
+
+def locate_in_groups(groups):
+    """
+    Locate each row of a series sorted by group: the group's code (-1 if missing), where the group starts and the row's offset from that start.
+    """
+    codes = pd.factorize(groups)[0]
+    n_rows = len(codes)
+
+    group_starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]]) if n_rows else np.array([], dtype=int)
+    group_start = np.repeat(group_starts, np.diff(np.r_[group_starts, n_rows]))
+
+    return codes, group_start, np.arange(n_rows) - group_start
+
+class TimeSeriesPanel:
+
+    def __init__(self, groups, values):
+        """
+        Lay out a series sorted by group (e.g. product) and date as one contiguous array of each product's records.
+        Each product's records sit next to each other, located by their offset from the product's first record, so missing days are not counted.
+        """
+        self.values = np.asarray(values, dtype=float)
+
+        # Find where each product starts in the contiguous array
+        codes, self.group_start, self.positions = locate_in_groups(groups)
+        self.in_group = codes >= 0  # Rows without a product are left out, as groupby does
+
+        # Cumulative sums and counts of the observed values, to get any window's total in one subtraction
+        observed = ~np.isnan(self.values)
+        self.sums = np.concatenate([[0.0], np.cumsum(np.where(observed, self.values, 0.0))])
+        self.counts = np.concatenate([[0], np.cumsum(observed)])
+
+    def select_rows(self, rows):
+        """
+        Return the requested rows of the array, all of them by default.
+        """
+        if rows is None:
+            return np.arange(len(self.values))
+
+        return np.asarray(rows)
+
+    def lag(self, period, rows=None):
+        """
+        Get the value `period` records before each row within its product, NaN where there's no such record.
+        """
+        rows = self.select_rows(rows)
+        lagged = np.full(len(rows), np.nan)
+
+        valid = (self.positions[rows] >= period) & self.in_group[rows]
+        lagged[valid] = self.values[rows[valid] - period]
+
+        return lagged
+
+    def rolling_mean(self, window, rows=None):
+        """
+        Get the mean of the observed values in the `window` records up to each row within its product, NaN where there are none.
+        """
+        rows = self.select_rows(rows)
+
+        # Window bounds, never reaching into the previous product
+        end = rows + 1
+        start = np.maximum(end - window, self.group_start[rows])
+
+        totals = self.sums[end] - self.sums[start]
+        counts = self.counts[end] - self.counts[start]
+
+        means = np.full(len(rows), np.nan)
+        valid = (counts > 0) & self.in_group[rows]
+        means[valid] = totals[valid] / counts[valid]
+
+        return means
@@ -0,0 +1,115 @@
+import tempfile
+import logging
+import shutil
+import os
+import pandas as pd
+
+class UnsupportedUploadFormat(ValueError):
+    """
+    Raised when an upload's format is not supported or its reader is not installed.
+    """
+
+class UploadIngestionLayer:
+
+    # Upload formats by content type and by file extension, CSV being the fallback
+    CONTENT_TYPES = {
+        'application/vnd.apache.arrow.file': 'arrow',
+        'application/vnd.apache.arrow.stream': 'arrow_stream',
+        'application/vnd.apache.parquet': 'parquet',
+        'application/x-parquet': 'parquet',
+        'text/csv': 'csv',
+    }
+    EXTENSIONS = {
+        '.arrow': 'arrow',
+        '.feather': 'arrow',
+        '.arrows': 'arrow_stream',
+        '.parquet': 'parquet',
+        '.csv': 'csv',
+    }
+
+    def __init__(self, file):
+        """
+        Initialise the layer with an uploaded file, e.g. a Flask FileStorage with 'stream', 'mimetype' and 'filename'.
+        """
+        self.file = file
+
+    def detect_format(self):
+        """
+        Negotiate the upload's format from its content type, then its file extension, falling back to CSV.
+        """
+        content_type = (getattr(self.file, 'mimetype', None) or '').lower()
+        if content_type in self.CONTENT_TYPES:
+            return self.CONTENT_TYPES[content_type]
+
+        extension = os.path.splitext(getattr(self.file, 'filename', None) or '')[1].lower()
+
+        return self.EXTENSIONS.get(extension, 'csv')
+
+    def import_pyarrow(self):
+        """
+        Import pyarrow, only needed for the columnar formats.
+        """
+        try:
+            import pyarrow
+            import pyarrow.ipc
+            import pyarrow.parquet
+        except ImportError:
+            raise UnsupportedUploadFormat("Arrow and Parquet uploads require pyarrow to be installed")
+
+        return pyarrow
+
+    def read_table(self, data_format):
+        """
+        Read a columnar upload into an Arrow table, wrapping the uploaded bytes without copying them.
+        """
+        pa = self.import_pyarrow()
+        buffer = pa.py_buffer(self.file.stream.read())
+
+        if data_format == 'arrow':
+            return pa.ipc.open_file(buffer).read_all()
+        elif data_format == 'arrow_stream':
+            return pa.ipc.open_stream(buffer).read_all()
+        elif data_format == 'parquet':
+            return pa.parquet.read_table(pa.BufferReader(buffer))
+
+        raise UnsupportedUploadFormat(f"Unsupported upload format: {data_format}")
+
+    def read_csv(self):
+        """
+        Read a CSV upload straight from its stream, in one pass so the rows are only held once.
+        """
+        return pd.read_csv(self.file.stream)
+
+    def spool(self, directory=None):
+        """
+        Save the upload to a new, uniquely named temporary file for a background job, which must delete it once done.
+        """
+        extension = os.path.splitext(getattr(self.file, 'filename', None) or '')[1].lower() or '.csv'
+
+        with tempfile.NamedTemporaryFile('wb', prefix='upload_', suffix=extension, dir=directory, delete=False) as spool_file:
+            shutil.copyfileobj(self.file.stream, spool_file)
+
+        logging.info(f"Upload spooled at {spool_file.name}")
+
+        return spool_file.name
+
+    def process(self):
+        """
+        Read the upload into a DataFrame, keeping the column types it was sent with.
+        """
+        data_format = self.detect_format()
+        logging.info(f"Reading {data_format} upload...")
+
+        if data_format == 'csv':
+            return self.read_csv()
+
+        try:
+            table = self.read_table(data_format)
+        except UnsupportedUploadFormat:
+            raise
+        except Exception as e:
+            logging.error(f"Error reading {data_format} upload: {e}")
+            raise IOError(f"Error reading {data_format} upload: {e}")
+
+        # Dates as datetime64 like the rest of the pipeline, releasing Arrow memory as columns are converted
+        return table.to_pandas(date_as_object=False, split_blocks=True, self_destruct=True)
@@ -0,0 +1,35 @@
+from ml.modeling.model_backends import model_backends
+from ml.modeling.tree_ensemble import export_model
+from ml.config import config
+import argparse
+import logging
+import os
+
+def main(model_path, output_path=None):
+
+    try:
+        # Export the model's trees to flat arrays
+        model = model_backends.load(model_path)
+        ensemble = export_model(model)
+
+        output_path = output_path or f'{os.path.splitext(model_path)[0]}.npz'
+        ensemble.save(output_path)
+
+        logging.info(f"Model {model_path} exported to {output_path} ({len(ensemble.roots)} trees, {len(ensemble.feature)} nodes)")
+
+        return output_path
+    except Exception as e:
+        logging.error(f"An error occurred during model export: {str(e)}")
+        raise
+
+if __name__ == "__main__":
+    logging.info("Starting model export script...")
+
+    # Get the arguments
+    parser = argparse.ArgumentParser(description='Export an XGBoost or LightGBM model to a tree ensemble predicted with NumPy alone')
+    parser.add_argument('--model_path', required=False, default=config.MAIN_MODEL, help='Path to the pickled model')
+    parser.add_argument('--output_path', required=False, help='Path to save the exported .npz file, next to the model by default')
+
+    args = parser.parse_args()
+
+    main(args.model_path, args.output_path)
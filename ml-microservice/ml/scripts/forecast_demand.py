@@ -0,0 +1,100 @@
+from ml.preprocessing.prediction_data_preprocessing_pipeline import PredictionDataPreprocessingPipeline
+from ml.preprocessing.feature_history_store import feature_history_store
+from ml.modeling.predictor import Predictor
+from ml.modeling.forecast_store import forecast_store
+from ml.config import config
+import numpy as np
+import argparse
+import logging
+import time
+
+# Stages reported to background jobs, after the preprocessing pipeline's
+STAGES = PredictionDataPreprocessingPipeline.STAGES + ['predict', 'publish']
+
+def active_products(active_days):
+    """
+    Get the client IDs of the products with sales observed in the last days of the feature history.
+    """
+    feature_history_store.refresh()
+
+    with feature_history_store.lock:
+        recent = feature_history_store.quantities[:, -active_days:]
+        active_ids = set(feature_history_store.products.index[~np.isnan(recent).all(axis=1)])
+
+        return [source_id for source_id, product_id in feature_history_store.source_ids.items() if product_id in active_ids]
+
+def run_stage(stage, on_stage, func, *args):
+    """
+    Run a stage outside the preprocessing pipeline, reporting it like the pipeline's stages.
+    """
+    if on_stage:
+        on_stage(stage, 'running')
+
+    start = time.perf_counter()
+    result = func(*args)
+    seconds = time.perf_counter() - start
+
+    logging.info(f"Stage {stage} completed in {seconds:.2f}s")
+    if on_stage:
+        on_stage(stage, 'completed', seconds)
+
+    return result
+
+def run_forecast(on_stage=None, start_date=None, horizon=None, active_days=None, model_path=None):
+    """
+    Forecast the demand of all the active products over the horizon, and publish it to the forecast store.
+    Forecasts start today by default.
+    """
+    horizon = horizon or config.FORECAST_HORIZON_DAYS
+    start_date = np.datetime64(start_date or 'today', 'D')
+    prediction_dates = np.datetime_as_string(start_date + np.arange(horizon).astype('timedelta64[D]'), unit='D').tolist()
+
+    source_product_ids = active_products(active_days or config.FORECAST_ACTIVE_DAYS)
+    if not source_product_ids:
+        raise RuntimeError("No active products in the feature history to forecast")
+
+    logging.info(f"Forecasting {len(source_product_ids)} products from {prediction_dates[0]} to {prediction_dates[-1]}")
+
+    # Preprocess the stored history of the products like a prediction request
+    preprocessed_data = PredictionDataPreprocessingPipeline(
+        historical_data=feature_history_store.history(source_product_ids),
+        prediction_dates=prediction_dates,
+    ).run(on_stage=on_stage)
+
+    predictor = Predictor(model_path=model_path)
+
+    def predict():
+        """
+        Predict all the rows in one call, as no live request waits on them.
+        """
+        predictor.load_model()
+        predictions = predictor.make_predictions(preprocessed_data.drop(columns=['source_product_id', 'date']))
+
+        return predictor.transform_predictions(predictions, preprocessed_data['source_product_id'].to_numpy(), preprocessed_data['date'])
+
+    predictions_df = run_stage('predict', on_stage, predict)
+
+    return run_stage('publish', on_stage, forecast_store.publish, predictions_df, predictor.model_path)
+
+def main(args):
+    try:
+        run_id = run_forecast(start_date=args.start_date, horizon=args.horizon, active_days=args.active_days, model_path=args.model_path)
+
+        logging.info(f"Batch forecast completed, published as run {run_id}")
+    except Exception as e:
+        logging.error(f"An error occurred during the batch forecast: {str(e)}")
+        raise
+
+if __name__ == "__main__":
+    logging.info("Starting batch forecast script...")
+
+    # Get the arguments
+    parser = argparse.ArgumentParser(description='Forecast the demand of all active products and publish it to the forecast store, e.g. nightly')
+    parser.add_argument('--start_date', required=False, help='First day to forecast (YYYY-MM-DD), today if not provided')
+    parser.add_argument('--horizon', required=False, type=int, help='Days to forecast')
+    parser.add_argument('--active_days', required=False, type=int, help='Products with sales in these last days of the history are forecast')
+    parser.add_argument('--model_path', required=False, help='Path to the model, the main one if not provided')
+
+    args = parser.parse_args()
+
+    main(args)
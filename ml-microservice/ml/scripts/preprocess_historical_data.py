@@ -2,14 +2,44 @@ from ml.preprocessing.historical_data_preprocessing_pipeline import HistoricalDa
 import argparse
 import logging
 
+def run_pipeline(on_stage, data_path, data_type, incremental=False, output_path=None, features=None, resume=False):
+    """
+    Run the historical preprocessing pipeline, reporting each stage to the optional callback, e.g. from a background job.
+    """
+    pipeline = HistoricalDataPreprocessingPipeline(
+        data_path=data_path,
+        output_path=output_path,
+        data_type=data_type,
+        features=features,
+        incremental=incremental,
+        resume=resume,
+    )
+
+    if pipeline.run(on_stage=on_stage) is None:
+        raise RuntimeError("Preprocessed data could not be saved")
+
 def main(args):
     try:
-        # Run the pipeline
-        HistoricalDataPreprocessingPipeline(
-            data_path=args.data_path,
+        # Only report the features that would be skipped
+        if getattr(args, 'dry_run', False):
+            HistoricalDataPreprocessingPipeline(
+                data_path=args.data_path,
+                output_path=args.output_path,
+                data_type=args.data_type,
+                features=getattr(args, 'features', None),
+            ).dry_run()
+            return
+
+        # Run the pipeline, as the background jobs do
+        run_pipeline(
+            None,
+            args.data_path,
+            args.data_type,
+            incremental=getattr(args, 'incremental', False),
             output_path=args.output_path,
-            data_type=args.data_type,
-        ).run()
+            features=getattr(args, 'features', None),
+            resume=getattr(args, 'resume', False),
+        )
 
         logging.info("Historical preprocessing script completed")
     except Exception as e:
@@ -23,6 +53,10 @@ if __name__ == "__main__":
     parser.add_argument('--data_path', required=False, help='Path to the data (file or directory)')
     parser.add_argument('--output_path', required=False, help='Path to store the preprocessed data')
     parser.add_argument('--data_type', required=True, choices=['weekly', 'daily'], help='Type of data (weekly or daily)')
+    parser.add_argument('--features', required=False, nargs='+', help='Features to compute, all of them if not provided')
+    parser.add_argument('--incremental', action='store_true', help='Only preprocess the raw files not preprocessed yet, adding their rows to the processed data')
+    parser.add_argument('--resume', action='store_true', help='Read the stages already run on the same raw files from their checkpoints, e.g. after a failed run')
+    parser.add_argument('--dry_run', action='store_true', help='Report the features that would be skipped without running the pipeline')
 
     args = parser.parse_args()
 
@@ -0,0 +1,44 @@
+from ml.preprocessing.backup_store import BackupStore
+from ml.preprocessing.file_lock import file_lock
+from ml.config import config
+import argparse
+import logging
+import os
+
+def main(args):
+    try:
+        # Backups are kept next to the processed data unless configured
+        backup_path = args.backup_path or (os.path.join(os.path.dirname(os.path.normpath(args.output_path)), 'backup') if args.output_path else None)
+        backups = BackupStore(directory=backup_path)
+
+        # Only list the snapshots kept
+        if getattr(args, 'list', False):
+            names = backups.snapshots()
+            logging.info(f"Snapshots kept: {names}")
+            return names
+
+        # Link the snapshot's files back in place of the processed data, while no preprocessing run changes it
+        output_path = args.output_path or config.HISTORICAL_DATA_PROCESSED
+        with file_lock(os.path.join(output_path, 'processed_data.lock')):
+            name = backups.restore(name=args.snapshot, directory=output_path)
+
+        logging.info(f"Processed data restored from snapshot {name}")
+
+        return name
+    except Exception as e:
+        logging.error(f"An error occurred during the restore: {str(e)}")
+        raise
+
+if __name__ == "__main__":
+    logging.info("Starting processed data restore script...")
+
+    # Get the arguments
+    parser = argparse.ArgumentParser(description='Restore the processed historical data and its raw file manifest from a backup snapshot')
+    parser.add_argument('--snapshot', required=False, help='Name of the snapshot to restore, the latest if not provided')
+    parser.add_argument('--backup_path', required=False, help="Path to the backups, the 'backup' directory next to the output path if given, else the configured one")
+    parser.add_argument('--output_path', required=False, help='Path to restore the processed data into, the configured one if not provided')
+    parser.add_argument('--list', action='store_true', help='List the snapshots kept without restoring any')
+
+    args = parser.parse_args()
+
+    main(args)
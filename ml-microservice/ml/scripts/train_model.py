@@ -1,5 +1,6 @@
 from ml.preprocessing.data_splitting_layer import DataSplittingLayer
 from ml.modeling.trainer import Trainer
+from ml.preprocessing.processed_data_store import ProcessedDataStore
 from ml.config import config
 import pandas as pd
 import argparse
@@ -9,9 +10,12 @@ import os
 def main(data_path, model_type, output_path):
 
     try:
-        # Load the preprocessed data from a provided or the default path
-        data_path = data_path or os.path.join(config.HISTORICAL_DATA_PROCESSED, 'processed_data.csv')
-        df = pd.read_csv(data_path)
+        # Load the preprocessed data from a provided CSV file, or only the columns needed from a provided or the default dataset
+        data_path = data_path or config.PROCESSED_DATASET
+        if os.path.isdir(data_path):
+            df = ProcessedDataStore(data_path).read(columns=config.MAIN_FEATURES + [config.TARGET, 'date'])
+        else:
+            df = pd.read_csv(data_path)
         logging.info(f"Data loaded from {data_path}")
     except Exception as e:
         logging.error(f"Error loading data: {e}")
@@ -45,7 +49,7 @@ if __name__ == "__main__":
 
     # Get the arguments
     parser = argparse.ArgumentParser(description='Train a new model')
-    parser.add_argument('--data_path', required=False, help='Path to the preprocessed data CSV file')
+    parser.add_argument('--data_path', required=False, help='Path to the preprocessed dataset directory or CSV file')
     parser.add_argument('--output_path', required=False, help='Path to save the trained model')
     parser.add_argument('--model_type', required=True, help='Type of the model to be trained: xgboost (XGBoost) or ligthgbm (LightGBM)')
 
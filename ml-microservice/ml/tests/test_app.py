@@ -3,7 +3,10 @@ from flask import json
 from io import BytesIO
 from unittest.mock import patch
 from app import app
+from job_engine import JobQueueFull
 import pandas as pd
+import gzip
+import os
 
 class TestApp(unittest.TestCase):
 
@@ -54,11 +57,13 @@ class TestApp(unittest.TestCase):
         self.assertEqual(response.status_code, 400)
         self.assertIn('Invalid metadata format', response.json['error'])
 
-    @patch('app.run_in_background')
-    def test_export_sales_data_success(self, mock_run_in_background):
+    @patch('app.job_engine.submit')
+    def test_export_sales_data_success(self, mock_submit):
         """
         Test successful historical weekly data export.
         """
+        mock_submit.return_value.id = 'job-1'
+
         # Make the request
         data = {
             'file': (BytesIO(b'mock data'), 'mock_file.csv'),
@@ -69,10 +74,103 @@ class TestApp(unittest.TestCase):
         # Check success
         self.assertEqual(response.status_code, 200)
         self.assertIn('Preprocessing started for weekly data', response.json['status'])
+        self.assertEqual(response.json['job_id'], 'job-1')
+
+        # Check the upload was spooled to a unique file for the job
+        file_path = mock_submit.call_args[0][2]
+        self.assertNotEqual(os.path.basename(file_path), 'mock_file.csv')
+        with open(file_path, 'rb') as spooled_file:
+            self.assertEqual(spooled_file.read(), b'mock data')
+        os.remove(file_path)
+
+    @patch('app.job_engine.submit')
+    def test_export_sales_data_incremental(self, mock_submit):
+        """
+        Test that an incremental export queues the pipeline in incremental mode.
+        """
+        mock_submit.return_value.id = 'job-1'
+
+        # Make the request
+        data = {
+            'file': (BytesIO(b'mock data'), 'mock_file.csv'),
+            'metadata': json.dumps({'type': 'historical', 'format': 'daily', 'incremental': True})
+        }
+        response = self.app.post('/export-sales-data', data=data)
+
+        # Check the job runs incrementally
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(mock_submit.call_args[0][3:], ('daily', True))
+        os.remove(mock_submit.call_args[0][2])
+
+    @patch('app.job_engine.submit', side_effect=JobQueueFull('Job queue is full'))
+    def test_export_sales_data_queue_full(self, mock_submit):
+        """
+        Test that exports are rejected while the job queue is full.
+        """
+        data = {
+            'file': (BytesIO(b'mock data'), 'mock_file.csv'),
+            'metadata': json.dumps({'type': 'historical', 'format': 'weekly'})
+        }
+        response = self.app.post('/export-sales-data', data=data)
+
+        # Check the client is told to retry
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('Retry-After', response.headers)
+
+    def test_job_status_not_found(self):
+        """
+        Test the 'jobs' endpoint with an unknown job ID.
+        """
+        response = self.app.get('/jobs/unknown')
+
+        self.assertEqual(response.status_code, 404)
+
+    @patch('app.forecast_store')
+    def test_forecasts(self, mock_store):
+        """
+        Test the 'forecasts' endpoint reads the precomputed forecasts of the requested products.
+        """
+        mock_store.current_run.return_value = {'generated_at': '2024-10-01T02:00:00'}
+        mock_store.lookup.return_value = (pd.DataFrame({
+            'product_id': ['A', 'B'],
+            'date': ['2024-10-02', '2024-10-02'],
+            'value': [3, 4],
+        }), ['C'])
+
+        response = self.app.get('/forecasts?product_ids=A,B&product_ids=C&start_date=2024-10-02&response_format=columnar')
+
+        # Check the products and dates were looked up and the forecasts sent back
+        self.assertEqual(response.status_code, 200)
+        mock_store.lookup.assert_called_once_with(['A', 'B', 'C'], '2024-10-02', None)
+        self.assertEqual(response.json['missing_product_ids'], ['C'])
+        self.assertEqual(response.json['predictions'], {'product_ids': ['A', 'B'], 'dates': ['2024-10-02'], 'values': [[3, 4]]})
+
+    @patch('app.forecast_store')
+    def test_forecasts_not_available(self, mock_store):
+        """
+        Test the 'forecasts' endpoint before any batch forecast, and without product IDs.
+        """
+        mock_store.current_run.return_value = None
+
+        self.assertEqual(self.app.get('/forecasts?product_ids=A').status_code, 404)
+        self.assertEqual(self.app.get('/forecasts').status_code, 400)
 
+    @patch('app.job_engine.submit')
+    def test_refresh_forecasts(self, mock_submit):
+        """
+        Test the batch forecast is started as a background job.
+        """
+        mock_submit.return_value.id = 'job-1'
+
+        response = self.app.post('/forecasts/refresh')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json['job_id'], 'job-1')
+
+    @patch('app.feature_history_store')
     @patch('app.PredictionDataPreprocessingPipeline.run')
     @patch('app.Predictor.run_live_predictions')
-    def test_predict_demand_success(self, mock_predictor_run, mock_pipeline_run):
+    def test_predict_demand_success(self, mock_predictor_run, mock_pipeline_run, mock_store):
         """
         Test the 'predict-demand' endpoint for successful predictions.
         """
@@ -119,6 +217,91 @@ class TestApp(unittest.TestCase):
         self.assertEqual(predictions_list[0]['value'], 150)
         self.assertEqual(predictions_list[1]['value'], 250)
 
+    @patch('app.feature_history_store')
+    @patch('app.PredictionDataPreprocessingPipeline.run')
+    @patch('app.Predictor.run_live_predictions')
+    def test_predict_demand_from_feature_history(self, mock_predictor_run, mock_pipeline_run, mock_store):
+        """
+        Test the 'predict-demand' endpoint with product IDs and no file, using the server's feature history.
+        """
+        # Mock the preprocessed data and prediction result
+        mock_pipeline_run.return_value = pd.DataFrame({
+            'source_product_id': ['A'],
+            'date': ['2023-01-03'],
+            'per_item_value': [100],
+        })
+        mock_predictor_run.return_value = pd.DataFrame({
+            'product_id': ['A'],
+            'date': ['2023-01-03'],
+            'value': [150]
+        })
+
+        # Metadata with the products to predict
+        metadata = json.dumps({
+            "type": "prediction",
+            "prediction_dates": ["2023-01-03"],
+            "product_ids": ["A"]
+        })
+        response = self.app.post('/predict-demand', data={'metadata': metadata}, content_type='multipart/form-data')
+
+        # Check the history was taken from the store
+        self.assertEqual(response.status_code, 200)
+        mock_store.history.assert_called_once_with(["A"])
+        mock_store.record_observations.assert_not_called()
+
+        # Products without a history are rejected
+        mock_store.history.side_effect = KeyError('A')
+        response = self.app.post('/predict-demand', data={'metadata': metadata}, content_type='multipart/form-data')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Missing feature history', response.json['error'])
+
+    @patch('app.feature_history_store')
+    @patch('app.PredictionDataPreprocessingPipeline.run')
+    @patch('app.Predictor.load_model')
+    def test_predict_demand_response_formats(self, mock_load_model, mock_pipeline_run, mock_store):
+        """
+        Test the 'predict-demand' endpoint's columnar, NDJSON and gzip-encoded responses.
+        """
+        # Mock the preprocessed data and the model, predicting the per item value
+        mock_pipeline_run.return_value = pd.DataFrame({
+            'source_product_id': ['A', 'A', 'B', 'B'],
+            'date': pd.to_datetime(['2023-01-03', '2023-01-04', '2023-01-03', '2023-01-04']),
+            'per_item_value': [1, 2, 3, 4],
+        })
+        def make_predictions(data, batched=False, cached=False):
+            return data['per_item_value'].to_numpy() * 100.0
+
+        def predict(response_format, headers=None):
+            metadata = json.dumps({"type": "prediction", "prediction_dates": ["2023-01-03", "2023-01-04"], "response_format": response_format})
+            data = {'file': (BytesIO(b"source_product_id,date,quantity\nA,2023-01-01,1\n"), 'mock_file.csv'), 'metadata': metadata}
+
+            with patch('app.Predictor.make_predictions', side_effect=make_predictions):
+                return self.app.post('/predict-demand', data=data, content_type='multipart/form-data', headers=headers)
+
+        # Columnar: each product and date once, a value per product for each date
+        response = predict('columnar')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json['predictions'], {
+            'product_ids': ['A', 'B'],
+            'dates': ['2023-01-03', '2023-01-04'],
+            'values': [[100, 300], [200, 400]],
+        })
+
+        # NDJSON: a record per line
+        response = predict('ndjson')
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        lines = [json.loads(line) for line in response.data.decode().splitlines()]
+        self.assertEqual(lines[0], {'product_id': 'A', 'date': '2023-01-03', 'value': 100})
+        self.assertEqual(len(lines), 4)
+
+        # Gzip-encoded NDJSON decodes to the same lines
+        response = predict('ndjson', {'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.data).decode().splitlines(), [json.dumps(line, separators=(',', ':')) for line in lines])
+
+        # Unknown formats are rejected
+        self.assertEqual(predict('xml').status_code, 400)
+
     def test_predict_demand_invalid_json(self):
         """
         Test the 'predict-demand' endpoint with invalid JSON.
@@ -0,0 +1,50 @@
+import unittest
+from fork_server import ForkServer
+
+def staged_job(on_stage, stages):
+    """
+    Job reporting the given stages.
+    """
+    for stage in stages:
+        on_stage(stage, 'completed', 0.1)
+
+def failing_job(on_stage):
+    """
+    Job failing after its first stage.
+    """
+    on_stage('ingest_data', 'running')
+    raise ValueError('bad data')
+
+class TestForkServer(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Set up a test ForkServer preloading the config only.
+        """
+        self.server = ForkServer(preload=['ml.config'])
+
+    def test_run_relays_stages(self):
+        """
+        Test that a job runs in a forked child, with its stages relayed to the parent.
+        """
+        events = []
+
+        # Invoke method from the class
+        self.server.run(staged_job, ['ingest_data', 'clean_data'], on_stage=lambda *event: events.append(event))
+
+        self.assertEqual(events, [('ingest_data', 'completed', 0.1), ('clean_data', 'completed', 0.1)])
+
+    def test_run_raises_child_error(self):
+        """
+        Test that a failing job raises an error with the child's exception in the parent.
+        """
+        events = []
+
+        with self.assertRaises(RuntimeError) as context:
+            self.server.run(failing_job, on_stage=lambda *event: events.append(event))
+
+        self.assertIn('ValueError: bad data', str(context.exception))
+        self.assertEqual(events, [('ingest_data', 'running', None)])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import runpy
+import os
+
+CONFIG_PATH = os.path.join(os.path.dirname(__file__), '..', '..', 'gunicorn.conf.py')
+
+class TestGunicornConf(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Set up the gunicorn settings, read like gunicorn does.
+        """
+        self.settings = runpy.run_path(CONFIG_PATH)
+
+    @patch('app_config.app_config.JOB_EXECUTION', 'fork_server')
+    @patch('fork_server.fork_server.start')
+    def test_post_worker_init_starts_fork_server(self, mock_start):
+        """
+        Test that every worker starts its fork server once initialised.
+        """
+        # Invoke the hook
+        self.settings['post_worker_init'](MagicMock())
+
+        mock_start.assert_called_once()
+
+    @patch('app_config.app_config.JOB_EXECUTION', 'thread')
+    @patch('fork_server.fork_server.start')
+    def test_post_worker_init_without_fork_server(self, mock_start):
+        """
+        Test that workers running jobs in threads don't start a fork server.
+        """
+        self.settings['post_worker_init'](MagicMock())
+
+        mock_start.assert_not_called()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,137 @@
+import unittest
+from unittest.mock import patch
+import threading
+import tempfile
+import os
+from job_engine import Job, JobEngine, JobStore, JobQueueFull
+
+class TestJobEngine(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Set up a test JobEngine with one worker and room for one queued job, sharing the jobs' status through a temporary store.
+        """
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.store = JobStore(os.path.join(self.temp_dir.name, 'jobs', 'jobs.sqlite'))
+        self.engine = JobEngine(max_workers=1, max_queued=1, max_history=10, store=self.store)
+        self.release = threading.Event()
+
+    def tearDown(self):
+        self.release.set()
+        self.engine.queue.join()
+        self.temp_dir.cleanup()
+
+    def wait_until_running(self, job):
+        """
+        Wait for a worker to take a job, freeing its place in the queue.
+        """
+        while job.status == 'queued':
+            threading.Event().wait(0.01)
+
+    def blocking_job(self, job):
+        """
+        Job reporting a stage, then waiting until released.
+        """
+        job.record_stage('wait', 'running')
+        self.release.wait(5)
+        job.record_stage('wait', 'completed', 0.5)
+
+    def test_job_completes_with_stages(self):
+        """
+        Test that a job runs, reporting its stages and timings.
+        """
+        self.release.set()
+
+        # Invoke method from the class
+        job = self.engine.submit('test', self.blocking_job, total_stages=1)
+        self.engine.queue.join()
+
+        status = self.engine.get(job.id).to_dict()
+        self.assertEqual(status['status'], 'completed')
+        self.assertEqual(status['stages'], [{'name': 'wait', 'status': 'completed', 'seconds': 0.5}])
+        self.assertEqual(status['progress'], {'completed': 1, 'total': 1})
+        self.assertIsNotNone(status['seconds'])
+
+    def test_queue_full(self):
+        """
+        Test that jobs beyond the running and queued ones are rejected, in first-in, first-out order.
+        """
+        running = self.engine.submit('running', self.blocking_job)
+
+        # Wait for the worker to take the first job, freeing the queue
+        self.wait_until_running(running)
+
+        queued = self.engine.submit('queued', self.blocking_job)
+        with self.assertRaises(JobQueueFull):
+            self.engine.submit('rejected', self.blocking_job)
+
+        self.assertEqual(queued.status, 'queued')
+
+        # Both accepted jobs complete once released
+        self.release.set()
+        self.engine.queue.join()
+        self.assertEqual([running.status, queued.status], ['completed', 'completed'])
+
+    def test_failed_job(self):
+        """
+        Test that a job raising an exception is reported as failed with its error.
+        """
+        def failing_job(job):
+            raise ValueError('bad data')
+
+        job = self.engine.submit('failing', failing_job)
+        self.engine.queue.join()
+
+        self.assertEqual(job.status, 'failed')
+        self.assertEqual(job.to_dict()['error'], 'bad data')
+
+    def test_status_from_other_worker(self):
+        """
+        Test that a job's status is found by another worker process's engine, as it progresses.
+        """
+        other_engine = JobEngine(max_workers=1, max_queued=1, max_history=10, store=JobStore(self.store.path))
+
+        # Invoke methods from the class
+        job = self.engine.submit('test', self.blocking_job, total_stages=1)
+        self.wait_until_running(job)
+        running = other_engine.status(job.id)
+
+        self.release.set()
+        self.engine.queue.join()
+        completed = other_engine.status(job.id)
+
+        self.assertEqual(running['status'], 'running')
+        self.assertEqual(completed['status'], 'completed')
+        self.assertEqual(completed['stages'], [{'name': 'wait', 'status': 'completed', 'seconds': 0.5}])
+        self.assertIsNone(other_engine.status('unknown'))
+
+    def test_queue_shared_by_workers(self):
+        """
+        Test that jobs are rejected by any worker process once the queue shared by them is full.
+        """
+        other_engine = JobEngine(max_workers=1, max_queued=1, max_history=10, store=JobStore(self.store.path))
+
+        running = self.engine.submit('running', self.blocking_job)
+        self.wait_until_running(running)
+        self.engine.submit('queued', self.blocking_job)
+
+        with self.assertRaises(JobQueueFull):
+            other_engine.submit('rejected', self.blocking_job)
+
+    def test_status_of_exited_worker(self):
+        """
+        Test that a job left unfinished by a worker process that exited is reported as failed, and frees its place in the queue.
+        """
+        running = self.engine.submit('running', self.blocking_job)
+        self.wait_until_running(running)
+
+        # Queued by a worker that no longer exists
+        job = Job('orphaned', self.blocking_job)
+        with patch('job_engine.os.getpid', return_value=2 ** 31 - 1):
+            self.store.add(job, max_queued=1, max_history=10)
+
+        self.assertEqual(self.engine.status(job.id)['status'], 'failed')
+        self.engine.submit('queued', self.blocking_job)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import unittest
+import pandas as pd
+import tempfile
+import os
+from ml.modeling.forecast_store import ForecastStore
+
+class TestForecastStore(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Set up a test ForecastStore saving to a temporary directory, and forecasts for two products over 5 days.
+        """
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.directory = os.path.join(self.temp_dir.name, 'forecasts')
+        self.store = ForecastStore(self.directory)
+
+        dates = pd.date_range('2024-10-01', periods=5).strftime('%Y-%m-%d').tolist()
+        self.predictions_df = pd.DataFrame({
+            'product_id': ['A'] * 5 + ['B'] * 4,
+            'date': dates + dates[:4],
+            'value': [1, 2, 3, 4, 5, 10, 20, 30, 40],
+        })
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_lookup_after_publish(self):
+        """
+        Test that published forecasts are looked up by product and date, in the order requested.
+        """
+        # Invoke methods from the class
+        self.store.publish(self.predictions_df, 'model.pkl')
+        forecasts_df, missing_ids = self.store.lookup(['B', 'A', 'C'], '2024-10-04', '2024-12-31')
+
+        self.assertEqual(missing_ids, ['C'])
+        self.assertEqual(forecasts_df.to_dict('records'), [
+            {'product_id': 'B', 'date': '2024-10-04', 'value': 40},
+            {'product_id': 'A', 'date': '2024-10-04', 'value': 4},
+            {'product_id': 'A', 'date': '2024-10-05', 'value': 5},
+        ])
+
+    def test_lookup_outside_horizon(self):
+        """
+        Test that no forecasts are returned for dates before or after the horizon.
+        """
+        self.store.publish(self.predictions_df)
+
+        # Invoke method from the class
+        before_df, missing_ids = self.store.lookup(['A', 'C'], None, '2024-09-28')
+        after_df, _ = self.store.lookup(['A'], '2024-10-10', None)
+
+        self.assertTrue(before_df.empty)
+        self.assertTrue(after_df.empty)
+        self.assertEqual(missing_ids, ['C'])
+
+    def test_lookup_whole_horizon(self):
+        """
+        Test that all the forecast days are returned without dates, from another process' view of the store.
+        """
+        self.store.publish(self.predictions_df)
+
+        forecasts_df, missing_ids = ForecastStore(self.directory).lookup(['A'])
+
+        self.assertEqual(missing_ids, [])
+        self.assertEqual(forecasts_df['value'].tolist(), [1, 2, 3, 4, 5])
+
+    def test_publish_replaces_previous_run(self):
+        """
+        Test that a new run is served in place of the previous one, and only the runs kept stay on disk.
+        """
+        self.store.publish(self.predictions_df)
+        self.store.lookup(['A'])
+
+        for value in [100, 200]:
+            run_id = self.store.publish(self.predictions_df.assign(value=value))
+
+        forecasts_df, _ = self.store.lookup(['A'])
+
+        self.assertEqual(forecasts_df['value'].unique().tolist(), [200])
+        self.assertEqual(self.store.current_run()['run_id'], run_id)
+        self.assertEqual(len([name for name in os.listdir(self.directory) if name != 'CURRENT']), 2)
+
+    def test_no_forecasts(self):
+        """
+        Test that nothing is found before forecasts are published.
+        """
+        forecasts_df, missing_ids = self.store.lookup(['A'])
+
+        self.assertIsNone(self.store.current_run())
+        self.assertTrue(forecasts_df.empty)
+        self.assertEqual(missing_ids, ['A'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+from unittest.mock import MagicMock
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+import numpy as np
+import threading
+from ml.modeling.inference_batcher import InferenceBatcher
+
+class TestInferenceBatcher(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Set up a test model predicting twice the first feature.
+        """
+        self.model = MagicMock()
+        self.model.predict.side_effect = lambda data: data['feature1'].to_numpy() * 2.0
+
+    def test_concurrent_requests_share_a_batch(self):
+        """
+        Test that concurrent requests are predicted in one call, each getting its own predictions back.
+        """
+        batcher = InferenceBatcher(max_latency=0.5, max_batch_rows=9)
+        frames = [pd.DataFrame({'feature1': np.arange(3) + 10 * i}) for i in range(3)]
+
+        # Invoke method from the class from concurrent threads
+        with ThreadPoolExecutor(3) as executor:
+            results = list(executor.map(lambda frame: batcher.predict(self.model, frame), frames))
+
+        # A single predict call for the 9 rows
+        self.model.predict.assert_called_once()
+        for frame, result in zip(frames, results):
+            np.testing.assert_array_equal(result, frame['feature1'].to_numpy() * 2.0)
+
+        metrics = batcher.metrics()
+        self.assertEqual(metrics['batches'], 1)
+        self.assertEqual(metrics['requests_per_batch'], 3)
+        self.assertEqual(metrics['fill_ratio'], 1.0)
+
+    def test_batch_predicted_after_max_latency(self):
+        """
+        Test that a lone request is predicted once the max latency passes.
+        """
+        batcher = InferenceBatcher(max_latency=0.01, max_batch_rows=1000)
+
+        result = batcher.predict(self.model, pd.DataFrame({'feature1': [1, 2]}))
+
+        np.testing.assert_array_equal(result, [2.0, 4.0])
+        self.assertEqual(batcher.metrics()['fill_ratio_histogram']['0-10%'], 1)
+
+    def test_errors_raised_to_every_request(self):
+        """
+        Test that a failed batch raises the error in every request of the batch.
+        """
+        self.model.predict.side_effect = ValueError('bad features')
+        batcher = InferenceBatcher(max_latency=0.5, max_batch_rows=4)
+        errors = []
+
+        def predict():
+            try:
+                batcher.predict(self.model, pd.DataFrame({'feature1': [1, 2]}))
+            except ValueError as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=predict) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(errors), 2)
+
+if __name__ == '__main__':
+    unittest.main()
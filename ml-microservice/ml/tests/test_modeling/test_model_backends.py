@@ -0,0 +1,48 @@
+import unittest
+from unittest.mock import MagicMock
+from ml.modeling.model_backends import ModelBackendRegistry, model_backends
+
+class TestModelBackendRegistry(unittest.TestCase):
+
+    def test_backend_for(self):
+        """
+        Test that model files are matched to the right backend.
+        """
+        test_cases = [
+            ('ml/models/xgboost_model_20241006_223230.pkl', 'xgboost'),
+            ('ml/models/lightgbm_model_20240928_134943.pkl', 'lightgbm'),
+            ('ml/models/lstm_model_20241006_160216.keras', 'keras'),
+            ('ml/models/booster.json', 'xgboost'),
+            ('ml/models/booster.txt', 'lightgbm'),
+            ('ml/models/xgboost_model_20241006_223230.npz', 'tree_ensemble'),
+            ('ml/models/unknown_model.pkl', 'joblib'),
+            ('dummy_path', 'joblib'),
+        ]
+
+        for path, expected_backend in test_cases:
+            self.assertEqual(model_backends.backend_for(path), expected_backend, f"Backend mismatch for {path}")
+
+    def test_load_imports_backend_once(self):
+        """
+        Test that a backend's modules are imported on first use only and the import cost is reported.
+        """
+        loader = MagicMock(return_value='model')
+        registry = ModelBackendRegistry()
+        registry.register('joblib', MagicMock())
+        registry.register('mock', loader, modules=['json'], extensions=['.mock'])
+
+        # Nothing imported before loading
+        self.assertEqual(registry.import_report(), {'joblib': None, 'mock': None})
+
+        # Load two models with the same backend
+        registry.load('first.mock')
+        registry.load('second.mock')
+
+        # The loader was used and the import was timed only for the mock backend
+        self.assertEqual(loader.call_count, 2)
+        report = registry.import_report()
+        self.assertIsNone(report['joblib'])
+        self.assertGreaterEqual(report['mock'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
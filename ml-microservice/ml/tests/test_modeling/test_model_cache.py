@@ -0,0 +1,145 @@
+import unittest
+from unittest.mock import MagicMock
+import threading
+import tempfile
+import time
+import os
+from ml.modeling.model_cache import ModelCache
+
+class TestModelCache(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Set up a test ModelCache and a temporary model artifact.
+        """
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.model_path = self.write_artifact('model.pkl', b'model v1')
+
+        # Initialise the cache
+        self.cache = ModelCache(max_bytes=1024, idle_seconds=60)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write_artifact(self, filename, content):
+        """
+        Write a mock model artifact to the temporary directory.
+        """
+        path = os.path.join(self.temp_dir.name, filename)
+        with open(path, 'wb') as file:
+            file.write(content)
+
+        return path
+
+    def test_get_reuses_loaded_model(self):
+        """
+        Test that a model is loaded once and then served from the cache.
+        """
+        loader = MagicMock(return_value='model')
+
+        # Request the same model twice
+        first = self.cache.get(self.model_path, loader)
+        second = self.cache.get(self.model_path, loader)
+
+        # The model was only loaded once
+        self.assertEqual(first, 'model')
+        self.assertEqual(second, 'model')
+        loader.assert_called_once_with(self.model_path)
+
+    def test_get_reloads_changed_artifact(self):
+        """
+        Test that a model is reloaded when its artifact changes on disk, replacing the stale version.
+        """
+        loader = MagicMock(side_effect=['model v1', 'model v2'])
+        self.cache.get(self.model_path, loader)
+
+        # Overwrite the artifact with a new version
+        self.write_artifact('model.pkl', b'model v2 with more bytes')
+
+        # The new version is loaded and the old one is dropped
+        self.assertEqual(self.cache.get(self.model_path, loader), 'model v2')
+        self.assertEqual(loader.call_count, 2)
+        self.assertEqual(len(self.cache.entries), 1)
+
+    def test_get_does_not_cache_missing_artifact(self):
+        """
+        Test that models without an artifact on disk are loaded every time.
+        """
+        loader = MagicMock(return_value='model')
+
+        # Request a model that doesn't exist on disk twice
+        self.cache.get('/dummy/path/to/model', loader)
+        self.cache.get('/dummy/path/to/model', loader)
+
+        # The loader was called each time and nothing was cached
+        self.assertEqual(loader.call_count, 2)
+        self.assertEqual(len(self.cache.entries), 0)
+
+    def test_evict_idle(self):
+        """
+        Test that models unused for longer than the idle period are evicted.
+        """
+        self.cache.get(self.model_path, MagicMock(return_value='model'))
+
+        # Make the cached model look idle
+        for entry in self.cache.entries.values():
+            entry['last_used'] = time.monotonic() - 120
+
+        # Invoke the method
+        self.cache.evict_idle()
+
+        # The idle model is gone
+        self.assertEqual(len(self.cache.entries), 0)
+
+    def test_enforce_budget(self):
+        """
+        Test that the least recently used models are evicted to fit the memory budget.
+        """
+        # Add two artifacts that don't fit the budget together
+        first_path = self.write_artifact('first.pkl', b'x' * 600)
+        second_path = self.write_artifact('second.pkl', b'x' * 600)
+        self.cache.get(first_path, MagicMock(return_value='first'))
+        self.cache.get(second_path, MagicMock(return_value='second'))
+
+        # Only the most recently loaded model is kept
+        cached_paths = [key[0] for key in self.cache.entries]
+        self.assertEqual(cached_paths, [os.path.abspath(second_path)])
+        self.assertLessEqual(self.cache.size(), 1024)
+
+    def test_slow_load_does_not_block_hits(self):
+        """
+        Test that a model being loaded doesn't block serving another cached one, and is loaded once for concurrent requests.
+        """
+        other_path = self.write_artifact('other.pkl', b'other')
+        self.cache.get(other_path, MagicMock(return_value='other'))
+
+        loading = threading.Event()
+        release = threading.Event()
+
+        def slow_loader(path):
+            loading.set()
+            release.wait(5)
+            return 'model'
+
+        loader = MagicMock(side_effect=slow_loader)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(self.cache.get(self.model_path, loader))) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        loading.wait(5)
+
+        # Invoke method from the class while the first model loads
+        start = time.perf_counter()
+        other = self.cache.get(other_path, MagicMock())
+        self.assertLess(time.perf_counter() - start, 0.5)
+        self.assertEqual(other, 'other')
+
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, ['model', 'model'])
+        loader.assert_called_once()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+from unittest.mock import MagicMock
+import pandas as pd
+import numpy as np
+from ml.config import config
+from ml.modeling.model_backends import model_backends
+from ml.modeling.native_inference import NativeInference, native_inference
+
+class TestNativeInference(unittest.TestCase):
+
+    def sample_features(self, feature_names, n_rows=500):
+        """
+        Build sample feature rows in a shuffled column order, with realistic integer and float values.
+        """
+        rng = np.random.default_rng(42)
+        data = pd.DataFrame({feature: rng.integers(0, 50, n_rows) if 'encoded' in feature or 'lag' in feature else rng.random(n_rows) * 20 for feature in feature_names})
+
+        return data[list(rng.permutation(feature_names))]
+
+    def test_xgboost_matches_wrapper(self):
+        """
+        Test that the native XGBoost path predicts exactly what the scikit-learn wrapper does.
+        """
+        model = model_backends.load(config.XGB_MODEL)
+        data = self.sample_features(model.get_booster().feature_names)
+
+        # Invoke method from the class
+        predictions = NativeInference(model, threads=2).predict(data)
+
+        np.testing.assert_array_equal(predictions, model.predict(data[model.get_booster().feature_names]))
+
+    def test_lightgbm_matches_wrapper(self):
+        """
+        Test that the native LightGBM path predicts exactly what the scikit-learn wrapper does.
+        """
+        model = model_backends.load(config.LGB_MODEL)
+        data = self.sample_features(model.booster_.feature_name())
+
+        predictions = NativeInference(model, threads=2).predict(data)
+
+        np.testing.assert_array_equal(predictions, model.predict(data[model.booster_.feature_name()]))
+
+    def test_other_models_use_their_predict(self):
+        """
+        Test that models without a native path are predicted with their own predict method.
+        """
+        model = MagicMock()
+        model.predict.return_value = np.array([1.0])
+
+        self.assertIsNone(native_inference.path_for(model))
+        np.testing.assert_array_equal(native_inference.predict(model, pd.DataFrame({'feature1': [1]})), [1.0])
+
+if __name__ == '__main__':
+    unittest.main()
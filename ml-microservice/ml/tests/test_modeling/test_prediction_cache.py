@@ -0,0 +1,108 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import pandas as pd
+import numpy as np
+import sys
+from ml.modeling.prediction_cache import PredictionCache
+from ml.modeling.predictor import Predictor
+
+class TestPredictionCache(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Set up a test PredictionCache and a model predicting the sum of the features.
+        """
+        self.cache = PredictionCache(max_bytes=64 * 1024, ttl_seconds=60)
+        self.predict = MagicMock(side_effect=lambda rows: rows.sum(axis=1).to_numpy(dtype=float))
+        self.data = pd.DataFrame({'feature1': [1.0, 2.0, 3.0], 'feature2': [10.0, 20.0, np.nan]})
+
+    def test_only_missed_rows_predicted(self):
+        """
+        Test that rows already predicted for the model version are served from the cache.
+        """
+        # Invoke method from the class
+        self.cache.predict('v1', self.data.iloc[:2], self.predict)
+        predictions = self.cache.predict('v1', self.data, self.predict)
+
+        np.testing.assert_array_equal(predictions, [11.0, 22.0, 3.0])
+        pd.testing.assert_frame_equal(self.predict.call_args.args[0], self.data.iloc[[2]])
+        self.assertEqual(self.cache.metrics()['hits'], 2)
+        self.assertEqual(self.cache.metrics()['misses'], 3)
+
+    def test_model_version_in_key(self):
+        """
+        Test that predictions cached for a model version are not served for another.
+        """
+        self.cache.predict('v1', self.data, self.predict)
+        self.cache.predict('v2', self.data, self.predict)
+
+        self.assertEqual(self.predict.call_count, 2)
+        self.assertEqual(self.cache.metrics()['hits'], 0)
+
+    def test_expired_entries(self):
+        """
+        Test that predictions older than the TTL are predicted again.
+        """
+        self.cache.predict('v1', self.data, self.predict)
+
+        with patch('ml.modeling.prediction_cache.time.monotonic', return_value=float('inf')):
+            self.cache.predict('v1', self.data, self.predict)
+
+        self.assertEqual(self.predict.call_count, 2)
+        self.assertEqual(self.cache.metrics()['expired'], 3)
+
+    def test_memory_budget(self):
+        """
+        Test that the least recently used predictions are evicted beyond the memory budget, measured as they're stored.
+        """
+        data = pd.DataFrame({'feature1': np.arange(1000, dtype=float)})
+
+        self.cache.predict('v1', data, self.predict)
+
+        metrics = self.cache.metrics()
+        self.assertLess(metrics['entries'], 1000)
+        self.assertEqual(metrics['evicted'], 1000 - metrics['entries'])
+        self.assertLessEqual(metrics['bytes'], metrics['max_bytes'])
+
+        # The bytes reported are the entries' measured sizes and the dictionary's
+        measured = sum(self.cache.measure(key, entry) for key, entry in self.cache.entries.items())
+        self.assertEqual(metrics['bytes'], measured + sys.getsizeof(self.cache.entries))
+
+        # The most recent rows are kept
+        self.cache.predict('v1', data.iloc[-metrics['entries']:], self.predict)
+        self.assertEqual(self.predict.call_count, 1)
+
+    def test_bytes_released(self):
+        """
+        Test that expired and replaced entries no longer count towards the memory budget.
+        """
+        self.cache.predict('v1', self.data, self.predict)
+        entry_bytes = self.cache.entry_bytes
+
+        # Storing the same rows again replaces them
+        self.cache.store('v1', self.cache.hash_rows(self.data), np.zeros(3))
+        self.assertEqual(self.cache.entry_bytes, entry_bytes)
+
+        with patch('ml.modeling.prediction_cache.time.monotonic', return_value=float('inf')):
+            self.cache.lookup('v1', self.cache.hash_rows(self.data))
+
+        self.assertEqual(self.cache.entry_bytes, 0)
+
+    @patch('ml.modeling.predictor.prediction_cache')
+    def test_predictor_uses_cache(self, mock_cache):
+        """
+        Test that the predictor goes through the cache only when asked to, keyed by its model artifact.
+        """
+        mock_cache.predict.return_value = np.array([1.0, 2.0, 3.0])
+        predictor = Predictor()
+        predictor.model = MagicMock()
+
+        predictions = predictor.make_predictions(self.data, cached=True)
+        predictor.make_predictions(self.data)
+
+        np.testing.assert_array_equal(predictions, [1.0, 2.0, 3.0])
+        mock_cache.predict.assert_called_once()
+        self.assertEqual(mock_cache.predict.call_args.args[0], predictor.model_version())
+
+if __name__ == '__main__':
+    unittest.main()
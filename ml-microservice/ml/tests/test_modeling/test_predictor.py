@@ -79,6 +79,35 @@ class TestPredictor(unittest.TestCase):
 
         pd.testing.assert_frame_equal(result_df, expected_df)
 
+    def test_transform_predictions_datetime_dates(self):
+        """
+        Test that datetime dates are formatted like date strings, including missing ones.
+        """
+        dates = pd.Series(pd.to_datetime(['2023-01-01', '2023-01-02', '2023-01-01', None]))
+
+        result_df = Predictor().transform_predictions([1, 2, 3, 4], ['A', 'A', 'B', 'B'], dates)
+
+        self.assertEqual(result_df['date'].tolist()[:3], ['2023-01-01', '2023-01-02', '2023-01-01'])
+        self.assertTrue(pd.isna(result_df['date'].iloc[3]))
+
+    @patch('ml.modeling.predictor.Predictor.load_model')
+    def test_iter_live_predictions(self, mock_load_model):
+        """
+        Test that batched live predictions match predicting all rows at once.
+        """
+        data = pd.DataFrame({'feature1': range(5)})
+        predictor = Predictor()
+        predictor.model = MagicMock()
+        predictor.model.predict.side_effect = lambda batch: batch['feature1'].to_numpy() * 10.0
+
+        # Invoke method from the class
+        batches = list(predictor.iter_live_predictions(data, ['A', 'A', 'B', 'B', 'C'], ['2023-01-01'] * 5, batch_rows=2))
+
+        self.assertEqual([len(batch) for batch in batches], [2, 2, 1])
+        result_df = pd.concat(batches, ignore_index=True)
+        self.assertEqual(result_df['value'].tolist(), [0, 10, 20, 30, 40])
+        self.assertEqual(result_df['product_id'].tolist(), ['A', 'A', 'B', 'B', 'C'])
+
     @patch('ml.modeling.predictor.Predictor.load_model')
     def test_run_predictions_for_evaluation(self, mock_load_model):
         """
@@ -105,7 +134,7 @@ class TestPredictor(unittest.TestCase):
         self.assertEqual(len(predictions), len(X_test))
         self.assertListEqual(predictions.tolist(), mock_predictions.tolist())
 
-    @patch('ml.modeling.predictor.joblib.load')
+    @patch('joblib.load')
     @patch.object(Predictor, 'make_predictions')
     def test_run_live_predictions(self, mock_make_predictions, mock_joblib_load):
         """
@@ -124,7 +153,7 @@ class TestPredictor(unittest.TestCase):
 
         # Check the process characteristics
         mock_joblib_load.assert_called_once_with('dummy_path')
-        mock_make_predictions.assert_called_once_with(data)
+        mock_make_predictions.assert_called_once_with(data, batched=True, cached=True)
         self.assertEqual(len(predictions), 3)
 
     def test_sanity_check(self):
@@ -0,0 +1,94 @@
+import unittest
+import tempfile
+import os
+import pandas as pd
+import numpy as np
+from ml.config import config
+from ml.modeling.predictor import Predictor
+from ml.modeling.tree_ensemble import TreeEnsemble, export_model
+
+class TestTreeEnsemble(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Set up a temporary directory for the exported ensembles.
+        """
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        """
+        Remove the temporary directory.
+        """
+        self.temp_dir.cleanup()
+
+    def sample_features(self, feature_names, n_rows=5000):
+        """
+        Build sample feature rows with realistic integer and float values, zeros and missing values.
+        """
+        rng = np.random.default_rng(42)
+        data = pd.DataFrame({feature: rng.integers(0, 50, n_rows).astype(float) if 'encoded' in feature or 'lag' in feature else rng.random(n_rows) * 20 for feature in feature_names})
+
+        # Missing values and zeros take the default directions of the splits
+        data.iloc[::7, 2] = np.nan
+        data.iloc[::5, 3] = 0
+
+        return data
+
+    def export(self, model_path):
+        """
+        Export a model to an .npz file, returning the predictors of the model and of its export.
+        """
+        predictor = Predictor(model_path=model_path)
+        predictor.load_model()
+        ensemble_path = os.path.join(self.temp_dir.name, 'model.npz')
+        export_model(predictor.model).save(ensemble_path)
+
+        ensemble_predictor = Predictor(model_path=ensemble_path)
+        ensemble_predictor.load_model()
+
+        return predictor, ensemble_predictor
+
+    def test_xgboost_matches_predictor(self):
+        """
+        Test that the exported XGBoost model predicts exactly what the predictor does.
+        """
+        predictor, ensemble_predictor = self.export(config.XGB_MODEL)
+        data = self.sample_features(predictor.model.get_booster().feature_names)
+
+        # Invoke method from the class
+        predictions = ensemble_predictor.make_predictions(data)
+
+        np.testing.assert_array_equal(predictions, predictor.make_predictions(data))
+
+    def test_lightgbm_matches_predictor(self):
+        """
+        Test that the exported LightGBM model predicts exactly what the predictor does.
+        """
+        predictor, ensemble_predictor = self.export(config.LGB_MODEL)
+        data = self.sample_features(predictor.model.booster_.feature_name())
+
+        predictions = ensemble_predictor.make_predictions(data)
+
+        np.testing.assert_array_equal(predictions, predictor.make_predictions(data))
+
+    def test_save_and_load(self):
+        """
+        Test that a saved ensemble loads back with the same trees and settings.
+        """
+        ensemble = TreeEnsemble(
+            feature=[0, 0, 0], threshold=[1.5, 0, 0], left=[1, 1, 2], right=[2, 1, 2],
+            default_left=[True, False, False], missing_type=[TreeEnsemble.MISSING_NAN] * 3,
+            value=[0, -1, 1], roots=[0], feature_names=['feature1'], base_score=0.5, comparison='<=', dtype='float64', max_depth=1,
+        )
+        path = os.path.join(self.temp_dir.name, 'ensemble.npz')
+
+        ensemble.save(path)
+        loaded = TreeEnsemble.load(path)
+
+        self.assertEqual(loaded.feature_names, ['feature1'])
+        self.assertEqual(loaded.comparison, '<=')
+        self.assertEqual(loaded.dtype, np.float64)
+        np.testing.assert_array_equal(loaded.predict(pd.DataFrame({'feature1': [1.0, 1.5, 2.0, np.nan]})), [-0.5, -0.5, 1.5, -0.5])
+
+if __name__ == '__main__':
+    unittest.main()
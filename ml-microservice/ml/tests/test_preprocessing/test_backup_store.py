@@ -0,0 +1,111 @@
+import unittest
+import pandas as pd
+import numpy as np
+import tempfile
+import os
+from ml.preprocessing.backup_store import BackupStore
+from ml.preprocessing.processed_data_store import ProcessedDataStore
+
+class TestBackupStore(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Set up a test BackupStore saving to a temporary directory, and processed data over three months with its manifest.
+        """
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.backups = BackupStore(os.path.join(self.temp_dir.name, 'backup'), keep_last=2, keep_daily=3, keep_weekly=2)
+        self.output_path = os.path.join(self.temp_dir.name, 'processed')
+        self.store = ProcessedDataStore(os.path.join(self.output_path, 'processed_data'))
+        self.manifest_path = os.path.join(self.output_path, 'raw_file_manifest.json')
+
+        dates = pd.date_range('2024-01-15', '2024-03-15', freq='D')
+        self.data = pd.DataFrame({
+            'product_id': 'A',
+            'date': dates,
+            'quantity': np.arange(len(dates)),
+        })
+        self.store.write(self.data)
+        with open(self.manifest_path, 'w') as file:
+            file.write('{}')
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def count_objects(self):
+        """
+        Count the files stored in the backups.
+        """
+        return sum(len(files) for _, _, files in os.walk(self.backups.objects_path))
+
+    def test_snapshot_and_restore(self):
+        """
+        Test that the data and manifest restored from a snapshot are the ones backed up.
+        """
+        # Invoke methods from the class
+        name = self.backups.snapshot([self.store.path, self.manifest_path])
+        self.store.write(self.data.iloc[:5])
+        os.remove(self.manifest_path)
+        restored = self.backups.restore(directory=self.output_path)
+
+        self.assertEqual(restored, name)
+        pd.testing.assert_frame_equal(self.store.read(), self.data)
+        self.assertTrue(os.path.exists(self.manifest_path))
+        self.assertEqual(sorted(os.listdir(self.output_path)), ['processed_data', 'raw_file_manifest.json'])
+
+    def test_snapshot_deduplicates_files(self):
+        """
+        Test that files unchanged since an earlier snapshot are linked, not stored again.
+        """
+        self.backups.snapshot([self.store.path], name='20240301_000000')
+        objects = self.count_objects()
+
+        # Replace March only, then rewrite the same data in new files
+        march = self.data[self.data['date'] >= '2024-03-01'].assign(quantity=0)
+        self.store.write_partitions(march)
+        self.backups.snapshot([self.store.path], name='20240302_000000')
+        self.assertEqual(self.count_objects(), objects + 1)
+
+        self.store.write(self.store.read())
+        self.backups.snapshot([self.store.path], name='20240303_000000')
+        self.assertEqual(self.count_objects(), objects + 1)
+
+    def test_retained(self):
+        """
+        Test that the last snapshots are kept, and the latest of each of the last days and weeks.
+        """
+        names = ['20240101_120000', '20240108_120000', '20240115_090000', '20240115_120000', '20240116_120000', '20240117_080000', '20240117_120000', 'manual']
+
+        # Invoke method from the class
+        retained = self.backups.retained(names)
+
+        self.assertEqual(retained, {
+            '20240117_120000', '20240117_080000',  # Last two
+            '20240116_120000', '20240115_120000',  # Latest of the last three days
+            '20240108_120000',  # Latest of the last two weeks
+            'manual',  # Not named by its time
+        })
+
+    def test_prune(self):
+        """
+        Test that pruning deletes the snapshots not retained and the files only they used.
+        """
+        for day in range(1, 6):
+            self.store.write(self.data.assign(quantity=day))
+            self.backups.snapshot([self.store.path], name=f'2024010{day}_120000')
+
+        # Invoke method from the class
+        deleted = self.backups.prune()
+
+        self.assertEqual(deleted, ['20240101_120000', '20240102_120000'])
+        self.assertEqual(self.backups.snapshots(), ['20240103_120000', '20240104_120000', '20240105_120000'])
+        self.assertEqual(self.count_objects(), 3 * 3 + 1)  # The months of each snapshot kept, and the schema they share
+
+    def test_restore_missing_snapshot(self):
+        """
+        Test that restoring a snapshot that doesn't exist raises an error.
+        """
+        with self.assertRaises(FileNotFoundError):
+            self.backups.restore('20240101_000000', self.output_path)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,8 +1,12 @@
 import unittest
+from unittest.mock import patch
 import pandas as pd
 import numpy as np
 import hashlib
+import tempfile
+import os
 from ml.preprocessing.cleaning_layer import CleaningLayer
+from ml.preprocessing.product_id_registry import ProductIdRegistry
 
 class TestCleaningLayer(unittest.TestCase):
 
@@ -29,8 +33,13 @@ class TestCleaningLayer(unittest.TestCase):
             'week': [1, 1, 2, 3, 3, 4, 5, 6, 7, 8]
         })
 
-        # Initialise the layer
-        self.layer = CleaningLayer(self.data)
+        # Initialise the layer, keeping generated product IDs in a temporary directory
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.id_registry = ProductIdRegistry(os.path.join(self.temp_dir.name, 'product_ids.csv'))
+        self.layer = CleaningLayer(self.data, self.id_registry)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
 
     def test_validate_columns(self):
         """
@@ -148,6 +157,10 @@ class TestCleaningLayer(unittest.TestCase):
         # There should be 3 unique product IDs
         self.assertEqual(len(df['product_id'].unique()), 3)
 
+        # IDs are the same as hashing each row's name and category
+        expected_ids = [self.layer.generate_unique_id(name, category) for name, category in zip(self.data['product_name'], self.data['category'])]
+        self.assertEqual(df['product_id'].tolist(), expected_ids)
+
     def test_calculate_cutoff_date(self):
         """
         Test that the correct cut off year and week are calculated accurately.
@@ -198,6 +211,23 @@ class TestCleaningLayer(unittest.TestCase):
         # The product '1234' is still in the dataset
         self.assertIn('1234', df['product_id'].values)
 
+    def test_numeric_columns_not_parsed_again(self):
+        """
+        Test that columns already read as numbers are not coerced again, and text ones still are.
+        """
+        df = self.data.copy()
+        df['value'] = df['value'].astype(str)
+
+        with patch('ml.preprocessing.cleaning_layer.pd.to_numeric', wraps=pd.to_numeric) as mock_to_numeric:
+            df = self.layer.clean_sales_columns(df)
+            df = self.layer.standardise_in_stock(df)
+            df = self.layer.clean_price_column(df)
+
+        # Only the text 'value' column was parsed
+        mock_to_numeric.assert_called_once()
+        self.assertEqual(df['value'].iloc[1], 12.30)
+        self.assertEqual(df['monday'].iloc[2], 130)
+
     def test_clean_sales_columns(self):
         """
         Test that sales columns 'monday' to 'sunday' are cleaned.
@@ -29,8 +29,9 @@ class TestFeatureEngineeringLayer(unittest.TestCase):
             'category': ['pet_food', 'homebaking', 'pet_food', 'general_grocery', 'homebaking']
         })
 
-        # Mock the 'load_mapping' method to return a mapping for 'category'
+        # Mock the 'load_mapping' method to return a mapping for 'category', saved without other changes
         mock_load_mapping.return_value = {'pet_food': 1, 'general_grocery': 2}
+        mock_save_mapping.side_effect = lambda feature, mapping: mapping
 
         # Invoke method from the class, for the 'category' feature
         df = self.layer.encode_categorical_feature(test_data, 'category')
@@ -121,6 +122,23 @@ class TestFeatureEngineeringLayer(unittest.TestCase):
         self.assertEqual(df['year'].tolist(), expected_data['year'].tolist(), "Mismatch in 'year' values")
         self.assertEqual(df['week'].tolist(), expected_data['week'].tolist(), "Mismatch in 'month' values")
 
+    def test_calculate_per_item_value(self):
+        """
+        Test that per item values are rounded exactly like Python's round, including ties.
+        """
+        # Sample weekly values and quantities, with values that NumPy alone would round differently
+        test_data = pd.DataFrame({
+            'value': [213.0, 1.115, 2.675, 10.0, 0.285],
+            'quantity': [213, 1, 1, 0, 1]
+        })
+
+        # Invoke method from the class
+        per_item_value = self.layer.calculate_per_item_value(test_data)
+
+        # Values match the row by row calculation
+        expected_values = [round(value / quantity, 2) if quantity > 0 else 0 for value, quantity in zip(test_data['value'], test_data['quantity'])]
+        self.assertEqual(per_item_value.tolist(), expected_values)
+
     def test_cyclic_encoding(self):
         """
         Test cyclic encoding of periodic features.
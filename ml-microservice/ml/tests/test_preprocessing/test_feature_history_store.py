@@ -0,0 +1,127 @@
+import unittest
+import pandas as pd
+import numpy as np
+import tempfile
+import os
+from ml.preprocessing.feature_history_store import FeatureHistoryStore
+from ml.preprocessing.product_id_registry import ProductIdRegistry
+
+class TestFeatureHistoryStore(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Set up a test FeatureHistoryStore keeping 30 days, saving to a temporary directory.
+        """
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, 'history', 'feature_history.npz')
+        self.registry = ProductIdRegistry(os.path.join(self.temp_dir.name, 'mappings', 'product_ids.csv'))
+        self.store = FeatureHistoryStore(self.path, days=30, id_registry=self.registry)
+
+        # Sample observations in the prediction upload format
+        dates = pd.date_range('2023-01-01', periods=10).strftime('%Y-%m-%d').tolist()
+        self.observations = pd.DataFrame({
+            'source_product_id': [1] * 10 + [2] * 10,
+            'product_name': ['Product A'] * 10 + ['Product B'] * 10,
+            'category': ['Category 1'] * 10 + ['Category 2'] * 10,
+            'per_item_value': [1.5] * 10 + [2.0] * 10,
+            'in_stock': [1] * 20,
+            'date': dates * 2,
+            'quantity': list(range(10)) + list(range(10, 20)),
+        })
+
+    def tearDown(self):
+        self.store.flush()
+        self.temp_dir.cleanup()
+
+    def test_history_after_full_upload(self):
+        """
+        Test that the history of recorded products matches what was sent.
+        """
+        # Invoke methods from the class
+        self.store.record_observations(self.observations)
+        history = self.store.history([2, 1])
+
+        # Products come back in the requested order, with their observed days
+        expected = pd.concat([self.observations.iloc[10:], self.observations.iloc[:10]], ignore_index=True)
+        self.assertEqual(history['source_product_id'].tolist(), ['2'] * 10 + ['1'] * 10)
+        self.assertEqual(history['date'].tolist(), expected['date'].tolist())
+        self.assertEqual(history['quantity'].tolist(), expected['quantity'].tolist())
+        self.assertEqual(history['product_name'].tolist(), expected['product_name'].tolist())
+
+    def test_delta_upload(self):
+        """
+        Test that a new observation is added to the saved history, shared with other store instances.
+        """
+        self.store.record_observations(self.observations)
+
+        # Send only the next day for one product
+        delta = self.observations.iloc[[9]].assign(date='2023-01-11', quantity=42)
+        self.store.record_observations(delta)
+        self.store.flush()
+
+        # A new store loads the same history from disk
+        store = FeatureHistoryStore(self.path, days=30, id_registry=self.registry)
+        history = store.history([1])
+
+        self.assertEqual(len(history), 11)
+        self.assertEqual(history['date'].iloc[-1], '2023-01-11')
+        self.assertEqual(history['quantity'].iloc[-1], 42)
+
+    def test_window_drops_old_days(self):
+        """
+        Test that only the configured number of days up to the latest observation are kept.
+        """
+        self.store.record_observations(self.observations)
+
+        # An observation 25 days later moves the window past the first 5 days
+        delta = self.observations.iloc[[0]].assign(date='2023-02-04', quantity=7)
+        self.store.record_observations(delta)
+
+        history = self.store.history([2])
+        self.assertEqual(history['date'].iloc[0], '2023-01-06')
+        self.assertTrue(np.array_equal(history['quantity'], np.arange(15, 20)))
+
+    def test_saved_by_flush(self):
+        """
+        Test that observations are kept in memory until flushed, then saved.
+        """
+        # Invoke methods from the class
+        self.store.record_observations(self.observations)
+
+        self.assertFalse(os.path.exists(self.path))
+        self.assertEqual(len(self.store.history([1])), 10)
+
+        self.store.flush()
+
+        self.assertTrue(os.path.exists(self.path))
+        self.assertEqual(self.store.pending, [])
+
+    def test_flush_merges_other_processes(self):
+        """
+        Test that flushing keeps the observations another store saved in the meantime, as another worker would.
+        """
+        other_store = FeatureHistoryStore(self.path, days=30, id_registry=self.registry)
+
+        # Each store records a different product, and saves after the other loaded
+        self.store.record_observations(self.observations.iloc[:10])
+        other_store.record_observations(self.observations.iloc[10:])
+        self.store.flush()
+        other_store.flush()
+
+        store = FeatureHistoryStore(self.path, days=30, id_registry=self.registry)
+        self.assertEqual(len(store.history([1, 2])), 20)
+
+        # The first store picks up the other's product when it's next used
+        self.assertEqual(len(self.store.history([2])), 10)
+
+    def test_unknown_products(self):
+        """
+        Test that requesting products without a history raises a KeyError.
+        """
+        self.store.record_observations(self.observations)
+
+        with self.assertRaises(KeyError):
+            self.store.history([1, 3])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+import unittest
+from ml.preprocessing.feature_plan import FeaturePlan
+from ml.config import config
+
+class TestFeaturePlan(unittest.TestCase):
+
+    def test_needs_all_without_features(self):
+        """
+        Test that every feature is planned when no target features are given.
+        """
+        plan = FeaturePlan()
+
+        self.assertTrue(plan.needs('day_of_month'))
+        self.assertTrue(plan.needs('quantity_lag_365'))
+        self.assertEqual(plan.skipped_features(), [])
+
+    def test_report(self):
+        """
+        Test that only the features required by the target list are computed.
+        """
+        plan = FeaturePlan(config.LEAST_FEATURES)
+
+        # Invoke method from the class
+        report = plan.report()
+
+        # Required features and the month they are derived from are computed
+        self.assertEqual(report['computed'], [
+            'weekday_sin', 'weekday_cos', 'month', 'month_sin', 'month_cos',
+            'quantity_lag_1', 'quantity_lag_7', 'quantity_rolling_avg_7', 'quantity_rolling_avg_30'
+        ])
+
+        # Everything else is skipped
+        self.assertIn('day_of_month', report['skipped'])
+        self.assertIn('year', report['skipped'])
+        self.assertIn('quantity_lag_365', report['skipped'])
+        self.assertIn('quantity_rolling_avg_90', report['skipped'])
+        self.assertNotIn('quantity_rolling_avg_30', report['skipped'])
+
+if __name__ == '__main__':
+    unittest.main()
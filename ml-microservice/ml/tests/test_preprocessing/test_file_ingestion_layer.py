@@ -1,6 +1,8 @@
 import unittest
 from unittest.mock import patch
 import pandas as pd
+import tempfile
+import os
 from ml.preprocessing.file_ingestion_layer import FileIngestionLayer
 
 class TestFileIngestionLayer(unittest.TestCase):
@@ -95,5 +97,45 @@ class TestFileIngestionLayer(unittest.TestCase):
         expected_df = pd.concat([mock_df1, mock_df2], ignore_index=True)
         pd.testing.assert_frame_equal(df, expected_df)
 
+    def test_typed_files_read_in_parallel(self):
+        """
+        Test that the files of a directory are read with the schema's columns and types, in parallel, in the order listed.
+        """
+        with tempfile.TemporaryDirectory() as temp_dir:
+            for index in range(4):
+                pd.DataFrame({
+                    'product_id': ['007', '008'],
+                    'product_name': ['Product A', 'Product B'],
+                    'category': ['Category 1', 'Category 2'],
+                    'quantity': [index, None],
+                    'per_item_value': [1.5, 2.0],
+                    'in_stock': [1, 0],
+                    'date': ['2024-01-01', '2024-01-02'],
+                    'notes': ['not read', 'not read'],
+                }).to_csv(os.path.join(temp_dir, f'file{index}.csv'), index=False)
+
+            # Invoke method from the class
+            ingestion_layer = FileIngestionLayer(data_path=temp_dir, data_type='daily', workers=4)
+            files = [os.path.join(temp_dir, f'file{index}.csv') for index in range(4)]
+            df = ingestion_layer.combine_files(files)
+
+        self.assertEqual(list(df.columns), ['product_id', 'product_name', 'category', 'quantity', 'per_item_value', 'in_stock', 'date'])
+        self.assertEqual(df['product_id'].iloc[0], '007')
+        self.assertEqual(df['quantity'].dtype, 'float64')
+        self.assertEqual(df['quantity'].iloc[::2].tolist(), [0.0, 1.0, 2.0, 3.0])
+
+    def test_typed_file_with_text_values(self):
+        """
+        Test that a file with values that are not numbers is read as text, for the cleaning to coerce.
+        """
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_path = os.path.join(temp_dir, 'file.csv')
+            pd.DataFrame({'product_id': ['1'], 'quantity': ['unknown'], 'in_stock': [1]}).to_csv(file_path, index=False)
+
+            df = FileIngestionLayer(data_path=file_path, data_type='daily').read_file(file_path)
+
+        self.assertEqual(df['quantity'].iloc[0], 'unknown')
+        self.assertEqual(df['in_stock'].iloc[0], '1')
+
 if __name__ == '__main__':
     unittest.main()
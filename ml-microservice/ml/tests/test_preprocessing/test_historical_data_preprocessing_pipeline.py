@@ -1,9 +1,18 @@
 import unittest
+import tempfile
 import os
 import pandas as pd
+import numpy as np
 from unittest.mock import patch
 import logging
+import threading
 from ml.preprocessing.historical_data_preprocessing_pipeline import HistoricalDataPreprocessingPipeline
+from ml.preprocessing.processed_data_store import ProcessedDataStore
+from ml.preprocessing.stage_cache import StageCache
+from ml.preprocessing.backup_store import BackupStore
+from ml.preprocessing.product_id_registry import ProductIdRegistry
+from ml.preprocessing.mapping_store import MappingStore
+from ml.preprocessing.file_lock import file_lock
 
 class TestHistoricalDataPreprocessingPipelineIntegration(unittest.TestCase):
 
@@ -38,11 +47,12 @@ class TestHistoricalDataPreprocessingPipelineIntegration(unittest.TestCase):
         mock_feature_engineer.return_value = mock_ingest_data.return_value
         mock_ts_engineer.return_value = mock_ingest_data.return_value
 
-        # Initialise the pipeline for historical weekly data preprocessing
-        pipeline = HistoricalDataPreprocessingPipeline(data_path='/dummy/path', data_type='weekly')
+        # Initialise the pipeline for historical weekly data preprocessing, saving to a temporary directory
+        with tempfile.TemporaryDirectory() as temp_dir, patch('ml.preprocessing.historical_data_preprocessing_pipeline.feature_history_store'):
+            pipeline = HistoricalDataPreprocessingPipeline(data_path='/dummy/path', output_path=os.path.join(temp_dir, 'processed'), data_type='weekly')
 
-        # Run the pipeline
-        final_data = pipeline.run()
+            # Run the pipeline
+            final_data = pipeline.run()
 
         # Check if data was processed correctly
         self.assertIsNotNone(final_data, "Pipeline should return a DataFrame")
@@ -69,16 +79,190 @@ class TestHistoricalDataPreprocessingPipelineIntegration(unittest.TestCase):
         mock_feature_engineer.return_value = mock_ingest_data.return_value
         mock_ts_engineer.return_value = mock_ingest_data.return_value
 
-        # Initialise the pipeline for historical daily data preprocessing
-        pipeline = HistoricalDataPreprocessingPipeline(data_path='/dummy/path', data_type='daily')
+        # Initialise the pipeline for historical daily data preprocessing, saving to a temporary directory
+        with tempfile.TemporaryDirectory() as temp_dir, patch('ml.preprocessing.historical_data_preprocessing_pipeline.feature_history_store'):
+            pipeline = HistoricalDataPreprocessingPipeline(data_path='/dummy/path', output_path=os.path.join(temp_dir, 'processed'), data_type='daily')
 
-        # Run the pipeline
-        final_data = pipeline.run()
+            # Run the pipeline
+            final_data = pipeline.run()
 
         # Check if data was processed correctly
         self.assertIsNotNone(final_data, "Pipeline should return a DataFrame")
         self.assertEqual(len(final_data), 2, "Final data should have two rows")
         self.assertIn('product_id', final_data.columns, "Final data should contain 'product_id' column")
 
+class TestHistoricalDataPreprocessingPipelineReruns(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Set up raw daily sales of three products over more than a year, one of them with missing days, split into three files.
+        """
+        self.temp_dir = tempfile.TemporaryDirectory()
+        rng = np.random.default_rng(0)
+
+        frames = []
+        for product in range(3):
+            dates = pd.date_range('2023-01-01', '2024-03-10')
+            if product == 2:
+                dates = dates[rng.random(len(dates)) > 0.3]
+
+            frames.append(pd.DataFrame({
+                'product_id': f'P{product}',
+                'product_name': f'Incremental product {product}',
+                'category': 'Incremental',
+                'quantity': rng.integers(0, 20, len(dates)),
+                'per_item_value': 2.5,
+                'in_stock': 1,
+                'date': dates.strftime('%Y-%m-%d'),
+            }))
+        data = pd.concat(frames, ignore_index=True)
+
+        self.files = []
+        for name, (start, end) in {'old': ('2023-01-01', '2024-03-04'), 'new_1': ('2024-03-05', '2024-03-08'), 'new_2': ('2024-03-09', '2024-03-10')}.items():
+            file_path = os.path.join(self.temp_dir.name, f'{name}.csv')
+            data[(data['date'] >= start) & (data['date'] <= end)].to_csv(file_path, index=False)
+            self.files.append(file_path)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def run_pipeline(self, name, files, incremental=False, resume=False, features=None):
+        """
+        Run the daily pipeline on some of the raw files, copied to the raw directory of a run, checkpointing its stages.
+        """
+        raw_path = os.path.join(self.temp_dir.name, name, 'raw')
+        os.makedirs(raw_path, exist_ok=True)
+        for file_path in files:
+            os.link(file_path, os.path.join(raw_path, os.path.basename(file_path)))
+
+        # Leave the feature history and the mappings of the app as they are, the runs sharing their own product IDs and mappings
+        output_path = os.path.join(self.temp_dir.name, name, 'processed')
+        mappings_path = os.path.join(self.temp_dir.name, 'mappings')
+        with patch('ml.preprocessing.historical_data_preprocessing_pipeline.feature_history_store') as mock_history_store, \
+                patch('ml.preprocessing.cleaning_layer.product_id_registry', ProductIdRegistry(os.path.join(mappings_path, 'product_ids.csv'))), \
+                patch('ml.preprocessing.feature_engineering_layer.mapping_store', MappingStore(mappings_path)):
+            self.mock_history_store = mock_history_store
+            HistoricalDataPreprocessingPipeline(
+                data_path=raw_path, output_path=output_path, data_type='daily', features=features,
+                incremental=incremental, resume=resume, cache=StageCache(os.path.join(self.temp_dir.name, 'cache')),
+            ).run()
+
+        return ProcessedDataStore(os.path.join(output_path, 'processed_data')).read()
+
+    def test_incremental_matches_full(self):
+        """
+        Test that adding new files incrementally saves the same processed data as preprocessing all of them.
+        """
+        expected = self.run_pipeline('full', self.files)
+
+        # Invoke the pipeline incrementally, a file at a time
+        self.run_pipeline('incremental', self.files[:1])
+        self.run_pipeline('incremental', self.files[1:2], incremental=True)
+        df = self.run_pipeline('incremental', self.files[2:], incremental=True)
+
+        pd.testing.assert_frame_equal(df, expected)
+
+    @patch('ml.preprocessing.historical_data_preprocessing_pipeline.TimeSeriesEngineeringLayer.process_appended_data')
+    def test_incremental_skips_preprocessed_files(self, mock_process_appended_data):
+        """
+        Test that an incremental run with no new files leaves the processed data as it is.
+        """
+        self.run_pipeline('incremental', self.files[:1])
+
+        # Invoke the pipeline with the same file
+        df = self.run_pipeline('incremental', [], incremental=True)
+
+        mock_process_appended_data.assert_not_called()
+        self.assertEqual(df['date'].max(), pd.Timestamp('2024-03-04'))
+
+    def test_runs_serialised(self):
+        """
+        Test that an incremental run waits for the one holding the lock on the processed data, then adds its rows to that run's.
+        """
+        self.run_pipeline('incremental', self.files[:1])
+        lock_path = os.path.join(self.temp_dir.name, 'incremental', 'processed', 'processed_data.lock')
+        results = []
+
+        # Invoke the pipeline while another run holds the lock
+        with file_lock(lock_path):
+            thread = threading.Thread(target=lambda: results.append(self.run_pipeline('incremental', self.files[1:], incremental=True)))
+            thread.start()
+            thread.join(0.5)
+            self.assertTrue(thread.is_alive())
+
+        thread.join()
+        self.assertEqual(results[0]['date'].max(), pd.Timestamp('2024-03-10'))
+
+    def test_resume_reads_checkpoints(self):
+        """
+        Test that a resumed run on files with the same content reads the stages from their checkpoints, saving the same data.
+        """
+        expected = self.run_pipeline('first', self.files)
+
+        # Invoke the pipeline again, on the same files under another directory
+        with patch('ml.preprocessing.historical_data_preprocessing_pipeline.CleaningLayer.process_historical_daily_data') as mock_clean_data:
+            df = self.run_pipeline('resumed', self.files, resume=True)
+
+        mock_clean_data.assert_not_called()
+        pd.testing.assert_frame_equal(df, expected)
+
+    def test_resume_after_failure(self):
+        """
+        Test that a run resumed after a failed one reads the stages completed from their checkpoints and runs the others.
+        """
+        with patch('ml.preprocessing.historical_data_preprocessing_pipeline.TimeSeriesEngineeringLayer.process_historical_data', side_effect=RuntimeError('Stage failed')):
+            with self.assertRaises(RuntimeError):
+                self.run_pipeline('failed', self.files)
+
+        # Invoke the pipeline again
+        with patch('ml.preprocessing.historical_data_preprocessing_pipeline.CleaningLayer.process_historical_daily_data') as mock_clean_data:
+            df = self.run_pipeline('resumed', self.files, resume=True)
+
+        mock_clean_data.assert_not_called()
+        pd.testing.assert_frame_equal(df, self.run_pipeline('not_resumed', self.files))
+
+    def test_feature_history_source_ids(self):
+        """
+        Test that the feature history is given the client's product IDs with the observations, so the batch forecast knows them.
+        """
+        # Invoke the pipeline
+        df = self.run_pipeline('full', self.files)
+
+        observations = self.mock_history_store.update.call_args.args[0]
+        self.assertEqual(sorted(observations['source_product_id'].unique()), ['P0', 'P1', 'P2'])
+        self.assertEqual(observations.groupby('source_product_id')['product_id'].nunique().tolist(), [1, 1, 1])
+        self.assertEqual(len(observations), len(df))
+
+    def test_backups_next_to_output(self):
+        """
+        Test that the processed data saved to an output path is backed up next to it, not to the configured backups.
+        """
+        # Invoke the pipeline
+        expected = self.run_pipeline('full', self.files)
+
+        backups = BackupStore(os.path.join(self.temp_dir.name, 'full', 'backup'))
+        self.assertEqual(len(backups.snapshots()), 1)
+
+        restore_path = os.path.join(self.temp_dir.name, 'restored')
+        backups.restore(directory=restore_path)
+        pd.testing.assert_frame_equal(ProcessedDataStore(os.path.join(restore_path, 'processed_data')).read(), expected)
+
+    def test_checkpoint_key(self):
+        """
+        Test that the checkpoint keys change with the pipeline's settings, and the last stage is not checkpointed.
+        """
+        cache = StageCache(os.path.join(self.temp_dir.name, 'cache'))
+        pipeline = HistoricalDataPreprocessingPipeline(data_path=self.temp_dir.name, data_type='daily', cache=cache)
+        other_pipeline = HistoricalDataPreprocessingPipeline(data_path=self.temp_dir.name, data_type='daily', cache=cache, features=['quantity_lag_1'])
+        pipeline.fingerprint = other_pipeline.fingerprint = 'input'
+
+        # Invoke method from the class
+        key = pipeline.checkpoint_key('clean_data')
+
+        self.assertEqual(len(key), 64)
+        self.assertNotEqual(key, other_pipeline.checkpoint_key('clean_data'))
+        self.assertNotEqual(key, pipeline.checkpoint_key('engineer_features'))
+        self.assertIsNone(pipeline.checkpoint_key('handle_data'))
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,97 @@
+import unittest
+from unittest.mock import patch
+import pandas as pd
+import tempfile
+import os
+from ml.preprocessing.mapping_store import MappingStore
+from ml.preprocessing.feature_engineering_layer import FeatureEngineeringLayer
+
+class TestMappingStore(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Set up a test MappingStore saving to a temporary directory.
+        """
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.directory = os.path.join(self.temp_dir.name, 'mappings')
+        self.store = MappingStore(self.directory)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_save_and_get(self):
+        """
+        Test that a saved mapping is read back, as a copy callers can change.
+        """
+        # Invoke methods from the class
+        self.store.save('category', {'pet_food': 1, 'homebaking': 2})
+        mapping = self.store.get('category')
+
+        self.assertEqual(mapping, {'pet_food': 1, 'homebaking': 2})
+        self.assertTrue(os.path.exists(os.path.join(self.directory, 'category_map.csv')))
+
+        mapping['general_grocery'] = 3
+        self.assertNotIn('general_grocery', self.store.get('category'))
+
+    def test_get_reads_file_once(self):
+        """
+        Test that the file is only read again when it changes, e.g. when saved by another process.
+        """
+        self.store.save('category', {'pet_food': 1})
+
+        store = MappingStore(self.directory)
+        with patch('pandas.read_csv', wraps=pd.read_csv) as mock_read_csv:
+            store.get('category')
+            store.get('category')
+            self.assertEqual(mock_read_csv.call_count, 1)
+
+            # Another store changes the file
+            self.store.save('category', {'pet_food': 1, 'homebaking': 2})
+            self.assertEqual(store.get('category'), {'pet_food': 1, 'homebaking': 2})
+            self.assertEqual(mock_read_csv.call_count, 2)
+
+    def test_save_merges_saved_mapping(self):
+        """
+        Test that saving keeps the values another store saved meanwhile, giving the new values taking their codes the next free ones.
+        """
+        store = MappingStore(self.directory)
+        self.store.save('category', {'pet_food': 1})
+
+        # Both stores encode a new value with the same code
+        store.save('category', {'pet_food': 1, 'homebaking': 2})
+        mapping = self.store.save('category', {'pet_food': 1, 'general_grocery': 2})
+
+        self.assertEqual(mapping, {'pet_food': 1, 'homebaking': 2, 'general_grocery': 3})
+        self.assertEqual(MappingStore(self.directory).get('category'), mapping)
+
+    def test_feature_engineering_uses_merged_codes(self):
+        """
+        Test that values encoded by the feature engineering layer get the codes saved, not ones another process took meanwhile.
+        """
+        self.store.save('category', {'pet_food': 1})
+        df = pd.DataFrame({'category': ['pet_food', 'homebaking', 'general_grocery']})
+
+        # Another store saves a value after this layer loaded the mapping
+        with patch.object(self.store, 'get', side_effect=[{'pet_food': 1}, {'pet_food': 1, 'general_grocery': 2}]):
+            FeatureEngineeringLayer(df, mappings=self.store).encode_categorical_feature(df, 'category')
+
+        self.assertEqual(df['category_encoded'].tolist(), [1, 3, 2])
+
+    def test_missing_mapping(self):
+        """
+        Test that a feature without a mapping file gets an empty mapping.
+        """
+        self.assertEqual(self.store.get('product_id'), {})
+
+    def test_feature_engineering_saves_new_encodings(self):
+        """
+        Test that new values encoded by the feature engineering layer are saved to the store.
+        """
+        df = pd.DataFrame({'category': ['pet_food', 'homebaking', 'pet_food']})
+
+        FeatureEngineeringLayer(df, mappings=self.store).encode_categorical_feature(df, 'category')
+
+        self.assertEqual(MappingStore(self.directory).get('category'), {'pet_food': 1, 'homebaking': 2})
+
+if __name__ == '__main__':
+    unittest.main()
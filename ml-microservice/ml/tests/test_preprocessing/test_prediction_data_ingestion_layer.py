@@ -51,5 +51,22 @@ class TestPredictionDataIngestionLayer(unittest.TestCase):
         # Check that the data has been re-structured correctly during ingestion
         pd.testing.assert_frame_equal(df.reset_index(drop=True), expected_df)
 
+    def test_process_ingestion_typed_columns(self):
+        """
+        Test that the prediction rows are typed like the historical data.
+        """
+        # Use datetime dates in the historical data
+        historical_data = self.historical_data.copy()
+        historical_data['date'] = pd.to_datetime(historical_data['date'])
+
+        # Invoke the class method
+        df = PredictionDataIngestionLayer(historical_data=historical_data, prediction_dates=self.prediction_dates).process()
+
+        # Dates keep their datetime type and future quantities are missing floats
+        self.assertTrue(pd.api.types.is_datetime64_any_dtype(df['date']))
+        self.assertTrue(pd.api.types.is_float_dtype(df['quantity']))
+        self.assertEqual(df['quantity'].isna().sum(), 4)
+        self.assertEqual(df['date'].iloc[-1], pd.Timestamp('2023-01-04'))
+
 if __name__ == '__main__':
     unittest.main()
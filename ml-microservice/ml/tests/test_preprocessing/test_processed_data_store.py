@@ -0,0 +1,140 @@
+import unittest
+from unittest.mock import patch
+import pandas as pd
+import numpy as np
+import tempfile
+import os
+from ml.preprocessing.processed_data_store import ProcessedDataStore
+from ml.preprocessing.backup_store import BackupStore
+
+class TestProcessedDataStore(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Set up a test ProcessedDataStore saving to a temporary directory, and processed data over three months.
+        """
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, 'processed_data')
+        self.store = ProcessedDataStore(self.path)
+
+        dates = pd.date_range('2024-01-15', '2024-03-15', freq='D')
+        self.data = pd.DataFrame({
+            'product_id': np.where(np.arange(len(dates)) % 2, 'A', 'B'),
+            'date': dates,
+            'quantity': np.arange(len(dates)),
+            'month': dates.month,
+            'quantity_lag_1': np.arange(len(dates)) / 2,
+        })
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_write_and_read(self):
+        """
+        Test that the data is read back as written, partitioned by month.
+        """
+        # Invoke methods from the class
+        self.store.write(self.data)
+        df = self.store.read()
+
+        pd.testing.assert_frame_equal(df, self.data)
+        self.assertEqual(sorted(name for name in os.listdir(self.path) if not name.startswith('_')),
+                         ['year_month=2024-01', 'year_month=2024-02', 'year_month=2024-03'])
+
+    def test_read_columns_and_dates(self):
+        """
+        Test that only the requested columns and the rows between the dates are read.
+        """
+        self.store.write(self.data)
+
+        df = self.store.read(columns=['date', 'quantity'], start_date='2024-02-10', end_date='2024-03-01')
+
+        self.assertEqual(list(df.columns), ['date', 'quantity'])
+        self.assertEqual(df['date'].min(), pd.Timestamp('2024-02-10'))
+        self.assertEqual(df['date'].max(), pd.Timestamp('2024-03-01'))
+        self.assertEqual(len(df), 21)
+
+    def test_write_replaces_previous_data(self):
+        """
+        Test that writing again replaces the previous dataset and leaves no temporary files.
+        """
+        self.store.write(self.data)
+        self.store.write(self.data.iloc[:5])
+
+        self.assertEqual(len(self.store.read()), 5)
+        self.assertEqual(os.listdir(self.temp_dir.name), ['processed_data'])
+
+    def test_read_products(self):
+        """
+        Test that only the rows of the requested products are read.
+        """
+        self.store.write(self.data)
+
+        df = self.store.read(start_date='2024-03-01', product_ids=['A'])
+
+        self.assertEqual(set(df['product_id']), {'A'})
+        self.assertEqual(len(df), 7)
+
+    def test_write_partitions(self):
+        """
+        Test that writing some months replaces only their rows, linking the other months' files.
+        """
+        self.store.write(self.data)
+        january_file = os.path.join(self.path, 'year_month=2024-01', 'part-0.parquet')
+        january_inode = os.stat(january_file).st_ino
+
+        # Invoke method from the class, with March's rows changed and a day added
+        dates = pd.date_range('2024-03-01', '2024-03-16', freq='D')
+        march = pd.DataFrame({
+            'product_id': 'A',
+            'date': dates,
+            'quantity': np.arange(len(dates)) * 10,
+            'month': dates.month,
+            'quantity_lag_1': np.arange(len(dates)) / 4,
+        })
+        self.store.write_partitions(march)
+
+        expected = pd.concat([self.data[self.data['date'] < '2024-03-01'], march], ignore_index=True)
+        pd.testing.assert_frame_equal(self.store.read(), expected)
+        self.assertEqual(os.stat(january_file).st_ino, january_inode)
+        self.assertEqual(os.listdir(self.temp_dir.name), ['processed_data'])
+
+    def test_data_without_dates(self):
+        """
+        Test that data without a 'date' column is saved unpartitioned, and can be backed up and restored.
+        """
+        data = self.data.drop(columns=['date'])
+        backups = BackupStore(os.path.join(self.temp_dir.name, 'backup'))
+        restore_path = os.path.join(self.temp_dir.name, 'restored')
+
+        self.store.write(data)
+        backups.restore(backups.snapshot([self.path]), restore_path)
+
+        pd.testing.assert_frame_equal(ProcessedDataStore(os.path.join(restore_path, 'processed_data')).read(), data)
+
+    def test_temp_paths_unique(self):
+        """
+        Test that every write gets its own temporary directory, even in the same process.
+        """
+        # Invoke method from the class
+        temp_paths = [self.store.temp_path() for _ in range(2)]
+
+        self.assertNotEqual(temp_paths[0], temp_paths[1])
+        self.assertTrue(all(os.path.basename(temp_path).startswith('processed_data.') for temp_path in temp_paths))
+
+    def test_failed_write_keeps_data(self):
+        """
+        Test that a failed write leaves the saved data as it was, without a temporary directory.
+        """
+        self.store.write(self.data)
+
+        # Fail once the new version's files are written
+        with patch('ml.preprocessing.processed_data_store.pq.write_metadata', side_effect=OSError('Disk full')):
+            with self.assertRaises(OSError):
+                self.store.write(self.data.iloc[:5])
+
+        pd.testing.assert_frame_equal(self.store.read(), self.data)
+        self.assertEqual(os.listdir(self.temp_dir.name), ['processed_data'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+from unittest.mock import patch
+import pandas as pd
+import numpy as np
+import tempfile
+import hashlib
+import threading
+import os
+from ml.preprocessing.product_id_registry import ProductIdRegistry
+from ml.preprocessing.file_lock import file_lock
+
+class TestProductIdRegistry(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Set up a test ProductIdRegistry saving to a temporary directory.
+        """
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, 'mappings', 'product_ids.csv')
+        self.registry = ProductIdRegistry(self.path)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_get_ids(self):
+        """
+        Test that IDs are the 8-character MD5 hashes of '{name}_{category}', including missing names.
+        """
+        names = pd.Series(['Product A', 'Product B', 'Product A', np.nan, None])
+        categories = pd.Series(['cat_1', 'cat_2', 'cat_1', 'cat_3', 'cat_3'])
+
+        # Invoke method from the class
+        ids = self.registry.get_ids(names, categories)
+
+        # IDs match hashing the formatted strings row by row
+        expected_ids = [hashlib.md5(f"{name}_{category}".encode()).hexdigest()[:8] for name, category in zip(names, categories)]
+        self.assertEqual(ids.tolist(), expected_ids)
+
+    def test_get_ids_hashes_each_pair_once(self):
+        """
+        Test that each distinct name and category pair is hashed once, and not at all once saved.
+        """
+        names = pd.Series(['Product A', 'Product B'] * 50)
+        categories = pd.Series(['cat_1', 'cat_2'] * 50)
+
+        # Hash the pairs in a first run
+        with patch.object(ProductIdRegistry, 'generate_unique_id', wraps=self.registry.generate_unique_id) as mock_generate:
+            first_ids = self.registry.get_ids(names, categories)
+            self.assertEqual(mock_generate.call_count, 2)
+
+        # A new registry reads the saved IDs instead of hashing again
+        registry = ProductIdRegistry(self.path)
+        with patch.object(ProductIdRegistry, 'generate_unique_id') as mock_generate:
+            second_ids = registry.get_ids(names, categories)
+            mock_generate.assert_not_called()
+
+        pd.testing.assert_series_equal(first_ids, second_ids)
+
+    def test_registries_sharing_a_file(self):
+        """
+        Test that registries saving to the same file, as other workers do, wait for each other and keep each other's IDs.
+        """
+        other_registry = ProductIdRegistry(self.path)
+        other_registry.get_ids(pd.Series(['Product A']), pd.Series(['cat_1']))
+        self.registry.get_ids(pd.Series(['Product C']), pd.Series(['cat_3']))
+
+        # Invoke method from the class while another registry holds the file
+        with file_lock(f'{self.path}.lock'):
+            thread = threading.Thread(target=self.registry.get_ids, args=(pd.Series(['Product B']), pd.Series(['cat_2'])))
+            thread.start()
+            thread.join(0.5)
+            self.assertTrue(thread.is_alive())
+
+        thread.join()
+
+        saved = ProductIdRegistry(self.path).read_file()
+        self.assertEqual(sorted(saved), ['Product A_cat_1', 'Product B_cat_2', 'Product C_cat_3'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+import tempfile
+import json
+import os
+from ml.preprocessing.raw_file_manifest import RawFileManifest
+
+class TestRawFileManifest(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Set up a test RawFileManifest saving to a temporary directory, and three raw files, two with the same content.
+        """
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.manifest = RawFileManifest(os.path.join(self.temp_dir.name, 'processed', 'raw_file_manifest.json'))
+
+        self.files = []
+        for name, content in [('day_1.csv', 'date,quantity\n2024-01-01,1\n'), ('day_2.csv', 'date,quantity\n2024-01-02,2\n'), ('day_2_copy.csv', 'date,quantity\n2024-01-02,2\n')]:
+            file_path = os.path.join(self.temp_dir.name, name)
+            with open(file_path, 'w') as file:
+                file.write(content)
+            self.files.append(file_path)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_new_files(self):
+        """
+        Test that all files are new without a manifest, each content once.
+        """
+        # Invoke method from the class
+        new_files = self.manifest.new_files(self.files)
+
+        self.assertEqual([file_path for file_path, _ in new_files], self.files[:2])
+        self.assertEqual(new_files[0][1], self.manifest.hash_file(self.files[0]))
+
+    def test_record(self):
+        """
+        Test that recorded files are not new anymore, however they're named.
+        """
+        # Invoke methods from the class
+        self.manifest.record(self.manifest.new_files(self.files[:1]))
+        self.manifest.record(self.manifest.new_files(self.files[1:2]))
+
+        self.assertEqual(self.manifest.new_files(self.files), [])
+        with open(self.manifest.path) as file:
+            self.assertEqual(sorted(entry['file'] for entry in json.load(file).values()), ['day_1.csv', 'day_2.csv'])
+
+    def test_record_replace(self):
+        """
+        Test that recording with `replace` forgets the files recorded before.
+        """
+        self.manifest.record(self.manifest.hash_files(self.files[:1]))
+
+        # Invoke method from the class
+        self.manifest.record(self.manifest.hash_files(self.files[1:2]), replace=True)
+
+        self.assertEqual([file_path for file_path, _ in self.manifest.new_files(self.files)], self.files[:1])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import unittest
+import pandas as pd
+import numpy as np
+import tempfile
+import os
+from ml.preprocessing.stage_cache import StageCache
+
+class TestStageCache(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Set up a test StageCache saving to a temporary directory, and a stage output with a shuffled index.
+        """
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache = StageCache(self.temp_dir.name, max_bytes=1024 * 1024)
+
+        dates = pd.date_range('2024-01-01', periods=10, freq='D')
+        self.data = pd.DataFrame({
+            'product_id': ['A', 'B'] * 5,
+            'date': dates,
+            'quantity': np.arange(10, dtype=float),
+            'week': pd.array(dates.isocalendar().week, dtype='UInt32'),
+        }, index=np.arange(10)[::-1])
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_put_and_get(self):
+        """
+        Test that an output is read back as saved, with its index and types.
+        """
+        # Invoke methods from the class
+        self.cache.put('key', self.data)
+        df = self.cache.get('key')
+
+        pd.testing.assert_frame_equal(df, self.data)
+
+    def test_get_missing(self):
+        """
+        Test that there's no output for a key never saved.
+        """
+        self.assertIsNone(self.cache.get('missing'))
+
+    def test_put_not_columnar(self):
+        """
+        Test that an output mixing numbers and text in a column is not cached.
+        """
+        self.cache.put('key', pd.DataFrame({'value': [1, 'a']}))
+
+        self.assertIsNone(self.cache.get('key'))
+
+    def test_evict_least_recently_used(self):
+        """
+        Test that the least recently used outputs are evicted beyond the size budget.
+        """
+        self.cache.put('first', self.data)
+        self.cache.put('second', self.data)
+        os.utime(self.cache.checkpoint_path('first'), ns=(1, 1))
+        os.utime(self.cache.checkpoint_path('second'), ns=(2, 2))
+
+        # Reading the first output makes the second the least recently used
+        self.cache.get('first')
+        self.cache.max_bytes = os.path.getsize(self.cache.checkpoint_path('first')) * 2
+        self.cache.put('third', self.data)
+
+        self.assertIsNotNone(self.cache.get('first'))
+        self.assertIsNone(self.cache.get('second'))
+        self.assertIsNotNone(self.cache.get('third'))
+
+if __name__ == '__main__':
+    unittest.main()
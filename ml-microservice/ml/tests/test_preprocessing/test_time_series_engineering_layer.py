@@ -4,6 +4,7 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 from ml.preprocessing.time_series_engineering_layer import TimeSeriesEngineeringLayer
+from ml.preprocessing.feature_plan import FeaturePlan
 import numpy.testing as npt
 
 class TestTimeSeriesEngineeringLayer(unittest.TestCase):
@@ -116,6 +117,57 @@ class TestTimeSeriesEngineeringLayer(unittest.TestCase):
         actual_rolling_avg_30 = df[df['product_id'] == 'B']['quantity_rolling_avg_30'].tolist()
         self.assertEqual(actual_rolling_avg_30, expected_rolling_avg_30)
 
+    def test_create_time_series_features_planned(self):
+        """
+        Test that only the lag and rolling average columns in the plan are created.
+        """
+        # Initialise the layer with a plan for a few features
+        layer = TimeSeriesEngineeringLayer(self.data, FeaturePlan(['quantity_lag_1', 'quantity_rolling_avg_7']))
+
+        # Invoke method from the class
+        df = layer.create_time_series_features(self.data, 'quantity', [1, 7, 30])
+
+        # Only the planned columns exist
+        time_series_columns = [col for col in df.columns if col.startswith('quantity_')]
+        self.assertEqual(time_series_columns, ['quantity_lag_1', 'quantity_rolling_avg_7'])
+
+    def test_create_prediction_time_series_features(self):
+        """
+        Test that features created only for the records for prediction match the ones created over the full history.
+        """
+        # Add a week of records for prediction per product, with no quantity
+        prediction_data = pd.DataFrame({
+            'product_id': ['A'] * 7 + ['B'] * 7,
+            'date': list(pd.date_range(start='2024-09-16', periods=7)) * 2,
+            'quantity': [np.nan] * 14,
+            'value': [np.nan] * 14,
+        })
+        test_data = pd.concat([self.data, prediction_data], ignore_index=True)
+
+        # Invoke methods from the class
+        expected = self.layer.remove_historical_data_records(self.layer.create_time_series_features(test_data.copy(), 'quantity', [1, 7, 14]))
+        df = self.layer.create_prediction_time_series_features(test_data.copy(), 'quantity', [1, 7, 14])
+
+        # Only the records for prediction remain, with the same features
+        self.assertEqual(len(df), 14)
+        pd.testing.assert_frame_equal(df, expected)
+
+    def test_create_appended_time_series_features(self):
+        """
+        Test that features created only for records appended to a history match the ones created over the full history.
+        """
+        is_appended = self.data['date'] >= '2024-09-10'
+        history = self.data.loc[~is_appended, ['product_id', 'date', 'quantity']]
+        appended = self.data[is_appended].reset_index(drop=True)
+
+        # Invoke methods from the class
+        expected = self.layer.create_time_series_features(self.data.copy(), 'quantity')
+        df = self.layer.create_appended_time_series_features(appended.copy(), history, 'quantity')
+
+        # Only the appended records remain, with the same features and types
+        self.assertEqual(len(df), 6)
+        pd.testing.assert_frame_equal(df.reset_index(drop=True), expected[expected['date'] >= '2024-09-10'].reset_index(drop=True))
+
     def test_remove_historical_data_records(self):
         """
         Test the removal of historical data based on the presence of the column 'quantity'.
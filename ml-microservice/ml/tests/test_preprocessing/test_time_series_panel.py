@@ -0,0 +1,50 @@
+import unittest
+import pandas as pd
+import numpy as np
+import numpy.testing as npt
+from ml.preprocessing.time_series_panel import TimeSeriesPanel
+
+class TestTimeSeriesPanel(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Set up sample sorted sales for products with different history lengths and missing quantities.
+        """
+        rng = np.random.default_rng(42)
+        self.data = pd.DataFrame({
+            'product_id': ['A'] * 40 + ['B'] * 3 + ['C'] * 25,
+            'quantity': rng.integers(0, 20, 68).astype(float),
+        })
+        self.data.loc[[5, 6, 41, 60, 61, 62], 'quantity'] = np.nan
+
+        # Initialise the panel
+        self.panel = TimeSeriesPanel(self.data['product_id'].to_numpy(), self.data['quantity'])
+        self.grouped = self.data.groupby('product_id')['quantity']
+
+    def test_lag(self):
+        """
+        Test that lags match shifting each product's series.
+        """
+        for period in [1, 2, 7, 30]:
+            expected = self.grouped.shift(period).to_numpy()
+            npt.assert_array_equal(self.panel.lag(period), expected, f"Lag mismatch for period {period}")
+
+    def test_rolling_mean(self):
+        """
+        Test that rolling means match a rolling window over each product's series.
+        """
+        for window in [2, 7, 14, 30]:
+            expected = self.grouped.transform(lambda x: x.rolling(window, min_periods=1).mean()).to_numpy()
+            npt.assert_array_equal(self.panel.rolling_mean(window), expected, f"Rolling mean mismatch for window {window}")
+
+    def test_selected_rows(self):
+        """
+        Test that features computed for selected rows match the ones computed for all rows.
+        """
+        rows = np.array([0, 39, 42, 60, 67])
+
+        npt.assert_array_equal(self.panel.lag(7, rows), self.panel.lag(7)[rows])
+        npt.assert_array_equal(self.panel.rolling_mean(7, rows), self.panel.rolling_mean(7)[rows])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+from io import BytesIO
+from werkzeug.datastructures import FileStorage
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pandas as pd
+import tempfile
+from ml.preprocessing.upload_ingestion_layer import UploadIngestionLayer
+
+class TestUploadIngestionLayer(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Set up sample prediction uploads.
+        """
+        self.data = pd.DataFrame({
+            'source_product_id': ['1', '1', '2'],
+            'product_name': ['Product A', 'Product A', 'Product B'],
+            'per_item_value': [1.5, 1.5, 2.0],
+            'date': pd.to_datetime(['2023-01-01', '2023-01-02', '2023-01-01']),
+            'quantity': [3, 4, 5],
+        })
+
+    def upload(self, content, filename, content_type=None):
+        """
+        Wrap bytes as an uploaded file.
+        """
+        return FileStorage(stream=BytesIO(content), filename=filename, content_type=content_type)
+
+    def test_detect_format(self):
+        """
+        Test that the format is taken from the content type, then the extension, then defaults to CSV.
+        """
+        self.assertEqual(UploadIngestionLayer(self.upload(b'', 'data.bin', 'application/vnd.apache.parquet')).detect_format(), 'parquet')
+        self.assertEqual(UploadIngestionLayer(self.upload(b'', 'data.arrow', 'application/octet-stream')).detect_format(), 'arrow')
+        self.assertEqual(UploadIngestionLayer(self.upload(b'', 'data.txt')).detect_format(), 'csv')
+
+    def test_read_columnar_formats(self):
+        """
+        Test that Arrow IPC files and streams and Parquet uploads are read with their column types.
+        """
+        table = pa.Table.from_pandas(self.data, preserve_index=False)
+
+        # Write the table in each format
+        arrow_file, arrow_stream, parquet = pa.BufferOutputStream(), pa.BufferOutputStream(), pa.BufferOutputStream()
+        with pa.ipc.new_file(arrow_file, table.schema) as writer:
+            writer.write_table(table)
+        with pa.ipc.new_stream(arrow_stream, table.schema) as writer:
+            writer.write_table(table)
+        pq.write_table(table, parquet)
+
+        uploads = [
+            self.upload(arrow_file.getvalue().to_pybytes(), 'data', 'application/vnd.apache.arrow.file'),
+            self.upload(arrow_stream.getvalue().to_pybytes(), 'data.arrows'),
+            self.upload(parquet.getvalue().to_pybytes(), 'data.parquet'),
+        ]
+
+        # Invoke method from the class
+        for upload in uploads:
+            df = UploadIngestionLayer(upload).process()
+            pd.testing.assert_frame_equal(df, self.data, check_dtype=False)
+            self.assertTrue(pd.api.types.is_datetime64_any_dtype(df['date']))
+
+    def test_read_csv(self):
+        """
+        Test that CSV uploads are still read as before.
+        """
+        content = self.data.to_csv(index=False).encode()
+
+        df = UploadIngestionLayer(self.upload(content, 'data.csv', 'text/csv')).process()
+
+        pd.testing.assert_frame_equal(df, pd.read_csv(BytesIO(content)))
+
+    def test_spool(self):
+        """
+        Test that uploads are spooled to unique files with their extension.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            paths = [UploadIngestionLayer(self.upload(b'a,b\n1,2\n', 'data.csv')).spool(directory) for _ in range(2)]
+
+            self.assertNotEqual(paths[0], paths[1])
+            for path in paths:
+                self.assertTrue(path.endswith('.csv'))
+                with open(path, 'rb') as spooled_file:
+                    self.assertEqual(spooled_file.read(), b'a,b\n1,2\n')
+
+    def test_invalid_columnar_upload(self):
+        """
+        Test that a corrupted Parquet upload raises an IOError.
+        """
+        with self.assertRaises(IOError):
+            UploadIngestionLayer(self.upload(b'not parquet', 'data.parquet')).process()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import unittest
+from unittest.mock import patch, MagicMock, ANY
+import pandas as pd
+import numpy as np
+import tempfile
+import os
+from ml.preprocessing.feature_history_store import FeatureHistoryStore
+from ml.preprocessing.product_id_registry import ProductIdRegistry
+from ml.modeling.forecast_store import ForecastStore
+from ml.scripts import forecast_demand
+
+class TestForecastDemand(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Set up a feature history with a product sold recently and one not sold for months, and an empty forecast store.
+        """
+        self.temp_dir = tempfile.TemporaryDirectory()
+        registry = ProductIdRegistry(os.path.join(self.temp_dir.name, 'mappings', 'product_ids.csv'))
+        self.history_store = FeatureHistoryStore(os.path.join(self.temp_dir.name, 'feature_history.npz'), days=365, id_registry=registry, flush_seconds=0)
+        self.forecast_store = ForecastStore(os.path.join(self.temp_dir.name, 'forecasts'))
+
+        self.history_store.record_observations(pd.DataFrame({
+            'source_product_id': ['A', 'A', 'B'],
+            'product_name': ['Product A', 'Product A', 'Product B'],
+            'category': ['Category 1', 'Category 1', 'Category 2'],
+            'per_item_value': [1.5, 1.5, 2.0],
+            'in_stock': [1, 1, 1],
+            'date': ['2024-09-29', '2024-09-30', '2024-01-15'],
+            'quantity': [3, 4, 5],
+        }))
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_active_products(self):
+        """
+        Test that only the products sold in the last days are active.
+        """
+        with patch.object(forecast_demand, 'feature_history_store', self.history_store):
+            self.assertEqual(forecast_demand.active_products(90), ['A'])
+
+    @patch('ml.scripts.forecast_demand.Predictor.load_model')
+    @patch('ml.scripts.forecast_demand.PredictionDataPreprocessingPipeline')
+    def test_run_forecast(self, mock_pipeline, mock_load_model):
+        """
+        Test that the active products are forecast over the horizon and published.
+        """
+        dates = pd.date_range('2024-10-01', periods=3)
+        mock_pipeline.STAGES = []
+        mock_pipeline.return_value.run.return_value = pd.DataFrame({
+            'source_product_id': ['A'] * 3,
+            'date': dates,
+            'feature1': [1.0, 2.0, 3.0],
+        })
+        on_stage = MagicMock()
+
+        with patch.object(forecast_demand, 'feature_history_store', self.history_store), \
+                patch.object(forecast_demand, 'forecast_store', self.forecast_store), \
+                patch('ml.scripts.forecast_demand.Predictor.make_predictions', return_value=np.array([1.2, 2.6, -1.0])):
+            # Invoke function from the script
+            forecast_demand.run_forecast(on_stage, start_date='2024-10-01', horizon=3)
+
+        # Check the pipeline was given the horizon's dates
+        self.assertEqual(mock_pipeline.call_args.kwargs['prediction_dates'], ['2024-10-01', '2024-10-02', '2024-10-03'])
+
+        # Check the forecasts were published, rounded and without negatives
+        forecasts_df, _ = self.forecast_store.lookup(['A'])
+        self.assertEqual(forecasts_df['value'].tolist(), [1, 3, 0])
+        on_stage.assert_any_call('publish', 'completed', ANY)
+
+    @patch('ml.scripts.forecast_demand.Predictor.load_model')
+    @patch('ml.scripts.forecast_demand.PredictionDataPreprocessingPipeline')
+    def test_run_forecast_after_historical_import(self, mock_pipeline, mock_load_model):
+        """
+        Test that products only imported from historical data, never sent to a prediction request, are forecast.
+        """
+        registry = ProductIdRegistry(os.path.join(self.temp_dir.name, 'mappings', 'historical_product_ids.csv'))
+        history_store = FeatureHistoryStore(os.path.join(self.temp_dir.name, 'historical_feature_history.npz'), days=365, id_registry=registry, flush_seconds=0)
+
+        # Processed historical data, with internal product IDs and the client's ones kept alongside
+        history_store.update(pd.DataFrame({
+            'product_id': registry.get_ids(pd.Series(['Product C', 'Product C']), pd.Series(['Category 1', 'Category 1'])),
+            'source_product_id': ['C', 'C'],
+            'product_name': ['Product C', 'Product C'],
+            'category': ['Category 1', 'Category 1'],
+            'per_item_value': [1.5, 1.5],
+            'in_stock': [1, 1],
+            'date': pd.to_datetime(['2024-09-29', '2024-09-30']),
+            'quantity': [3, 4],
+        }))
+
+        mock_pipeline.STAGES = []
+        mock_pipeline.return_value.run.return_value = pd.DataFrame({
+            'source_product_id': ['C'],
+            'date': pd.to_datetime(['2024-10-01']),
+            'feature1': [1.0],
+        })
+
+        with patch.object(forecast_demand, 'feature_history_store', history_store), \
+                patch.object(forecast_demand, 'forecast_store', self.forecast_store), \
+                patch('ml.scripts.forecast_demand.Predictor.make_predictions', return_value=np.array([2.0])):
+            # Invoke function from the script
+            forecast_demand.run_forecast(start_date='2024-10-01', horizon=1)
+
+        # Check the product's history was preprocessed and its forecast published
+        self.assertEqual(mock_pipeline.call_args.kwargs['historical_data']['source_product_id'].unique().tolist(), ['C'])
+        forecasts_df, missing_ids = self.forecast_store.lookup(['C'])
+        self.assertEqual(forecasts_df['value'].tolist(), [2])
+        self.assertEqual(missing_ids, [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -41,5 +41,48 @@ class TestHistoricalDataPreprocessingScript(unittest.TestCase):
         # Assert that the pipeline run method was called once
         mock_run.assert_called_once()
 
+    @patch('ml.scripts.preprocess_historical_data.HistoricalDataPreprocessingPipeline')
+    def test_main_resume(self, mock_pipeline):
+        """
+        Test that the historical preprocessing script resumes from the checkpoints and runs incrementally when asked.
+        """
+        # Mock arguments with the flags set
+        args = argparse.Namespace(
+            data_path='/dummy/data/path',
+            output_path=None,
+            data_type='daily',
+            incremental=True,
+            resume=True
+        )
+
+        # Call the main function
+        main(args)
+
+        # Assert that the pipeline was set up with the flags and run
+        self.assertTrue(mock_pipeline.call_args.kwargs['resume'])
+        self.assertTrue(mock_pipeline.call_args.kwargs['incremental'])
+        mock_pipeline.return_value.run.assert_called_once()
+
+    @patch('ml.scripts.preprocess_historical_data.run_pipeline')
+    @patch('ml.scripts.preprocess_historical_data.HistoricalDataPreprocessingPipeline')
+    def test_main_dry_run(self, mock_pipeline, mock_run_pipeline):
+        """
+        Test that the historical preprocessing script only reports the skipped features in a dry run.
+        """
+        # Mock arguments with the dry run flag set
+        args = argparse.Namespace(
+            data_path='/dummy/data/path',
+            output_path=None,
+            data_type='daily',
+            dry_run=True
+        )
+
+        # Call the main function
+        main(args)
+
+        # Assert that the pipeline was not run
+        mock_pipeline.return_value.dry_run.assert_called_once()
+        mock_run_pipeline.assert_not_called()
+
 if __name__ == '__main__':
     unittest.main()
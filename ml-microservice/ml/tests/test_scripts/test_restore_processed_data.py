@@ -0,0 +1,79 @@
+import unittest
+from unittest.mock import patch
+from ml.scripts.restore_processed_data import main
+import argparse
+
+class TestRestoreProcessedDataScript(unittest.TestCase):
+
+    @patch('ml.scripts.restore_processed_data.file_lock')
+    @patch('ml.scripts.restore_processed_data.BackupStore')
+    def test_main_restore(self, mock_backup_store, mock_file_lock):
+        """
+        Test that the restore script restores the snapshot given into the output path.
+        """
+        mock_backup_store.return_value.restore.return_value = '20240101_120000'
+
+        # Mock arguments
+        args = argparse.Namespace(
+            snapshot='20240101_120000',
+            backup_path='/dummy/backup/path',
+            output_path='/dummy/output/path',
+            list=False
+        )
+
+        # Call the main function
+        name = main(args)
+
+        # Assert that the snapshot was restored
+        mock_backup_store.assert_called_once_with(directory='/dummy/backup/path')
+        mock_backup_store.return_value.restore.assert_called_once_with(name='20240101_120000', directory='/dummy/output/path')
+        self.assertEqual(name, '20240101_120000')
+
+        # Assert that it was restored under the processed data's lock
+        mock_file_lock.assert_called_once_with('/dummy/output/path/processed_data.lock')
+
+    @patch('ml.scripts.restore_processed_data.file_lock')
+    @patch('ml.scripts.restore_processed_data.BackupStore')
+    def test_main_backups_next_to_output(self, mock_backup_store, mock_file_lock):
+        """
+        Test that the restore script reads the backups next to the output path given, like the pipeline saving there.
+        """
+        args = argparse.Namespace(snapshot=None, backup_path=None, output_path='/dummy/output/processed', list=False)
+
+        # Call the main function
+        main(args)
+
+        mock_backup_store.assert_called_once_with(directory='/dummy/output/backup')
+
+    @patch('ml.scripts.restore_processed_data.BackupStore')
+    def test_main_list(self, mock_backup_store):
+        """
+        Test that the restore script only lists the snapshots when asked.
+        """
+        mock_backup_store.return_value.snapshots.return_value = ['20240101_120000']
+
+        # Mock arguments
+        args = argparse.Namespace(snapshot=None, backup_path=None, output_path=None, list=True)
+
+        # Call the main function
+        names = main(args)
+
+        # Assert that nothing was restored
+        self.assertEqual(names, ['20240101_120000'])
+        mock_backup_store.return_value.restore.assert_not_called()
+
+    @patch('ml.scripts.restore_processed_data.file_lock')
+    @patch('ml.scripts.restore_processed_data.BackupStore')
+    def test_main_error(self, mock_backup_store, mock_file_lock):
+        """
+        Test that the restore script raises the error of a failed restore.
+        """
+        mock_backup_store.return_value.restore.side_effect = FileNotFoundError('No snapshot')
+
+        args = argparse.Namespace(snapshot='missing', backup_path=None, output_path=None, list=False)
+
+        with self.assertRaises(FileNotFoundError):
+            main(args)
+
+if __name__ == '__main__':
+    unittest.main()
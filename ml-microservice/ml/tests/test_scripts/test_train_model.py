@@ -1,9 +1,12 @@
 import unittest
 from unittest.mock import patch, MagicMock
 import pandas as pd
+import tempfile
 import os
 from ml.scripts.train_model import main as train_main
 from ml.preprocessing.data_splitting_layer import DataSplittingLayer
+from ml.preprocessing.processed_data_store import ProcessedDataStore
+from ml.config import config
 
 class TestTrainModel(unittest.TestCase):
 
@@ -58,6 +61,28 @@ class TestTrainModel(unittest.TestCase):
         pd.testing.assert_frame_equal(X_test_output, X_test)
         pd.testing.assert_series_equal(y_test_output, y_test)
 
+    @patch('ml.scripts.train_model.Trainer.run')
+    @patch('ml.scripts.train_model.DataSplittingLayer')
+    def test_main_reads_needed_columns_from_dataset(self, mock_splitter, mock_trainer_run):
+        """
+        Test that only the features, target and date are loaded from a processed dataset.
+        """
+        columns = config.MAIN_FEATURES + [config.TARGET, 'date']
+        data = pd.DataFrame({column: [1.0, 2.0] for column in config.MAIN_FEATURES + [config.TARGET, 'product_name']})
+        data['date'] = pd.to_datetime(['2023-01-01', '2023-02-01'])
+        mock_splitter.return_value.split_timeline_in_two_halves.return_value = (None, None, None, None)
+        mock_trainer_run.return_value = ('mock_model', 'mock_model_path.pkl')
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            ProcessedDataStore(temp_dir).write(data)
+
+            # Run the train model function
+            train_main(temp_dir, 'xgboost', 'mock_output_path')
+
+        loaded = mock_splitter.call_args.args[0]
+        self.assertEqual(list(loaded.columns), columns)
+        self.assertEqual(len(loaded), 2)
+
     @patch('pandas.read_csv')
     def test_main_file_not_found(self, mock_read_csv):
         """
@@ -0,0 +1,95 @@
+from flask import Response, json
+import pandas as pd
+import numpy as np
+import gzip
+import zlib
+
+# Response formats of the predictions, 'records' being the original one
+RESPONSE_FORMATS = ['records', 'columnar', 'ndjson']
+
+GZIP_MIN_BYTES = 1024  # Smaller bodies are sent uncompressed
+GZIP_LEVEL = 5  # Faster than the default 9, for a similar size on repetitive JSON
+
+def select_format(request, metadata):
+    """
+    Select the response format from the metadata's 'response_format', then the Accept header, defaulting to 'records'.
+    """
+    response_format = metadata.get('response_format')
+    if response_format:
+        return response_format
+
+    if request.accept_mimetypes.best == 'application/x-ndjson':
+        return 'ndjson'
+
+    return 'records'
+
+def accepts_gzip(request):
+    """
+    Check if the client accepts gzip-encoded responses.
+    """
+    return 'gzip' in request.accept_encodings
+
+def columnar_predictions(predictions_df):
+    """
+    Lay out the predictions with each product ID and date once, and one array of values per date, in the product IDs' order.
+    """
+    product_codes, product_ids = pd.factorize(predictions_df['product_id'])
+    date_codes, dates = pd.factorize(predictions_df['date'])
+
+    # Dates x products, None where a product has no prediction for a date
+    values = np.full((len(dates), len(product_ids)), None, dtype=object)
+    values[date_codes, product_codes] = predictions_df['value'].to_numpy().tolist()
+
+    return {
+        'product_ids': product_ids.tolist(),
+        'dates': dates.tolist(),
+        'values': values.tolist(),
+    }
+
+def json_response(payload, status=200, compress=False):
+    """
+    Build a JSON response, gzip-encoded if requested and large enough to benefit.
+    """
+    body = json.dumps(payload).encode()
+    response = Response(body, status=status, mimetype='application/json')
+
+    if compress and len(body) >= GZIP_MIN_BYTES:
+        response.set_data(gzip.compress(body, compresslevel=GZIP_LEVEL))
+        response.headers['Content-Encoding'] = 'gzip'
+        response.headers['Vary'] = 'Accept-Encoding'
+
+    return response
+
+def ndjson_lines(batches):
+    """
+    Yield the predictions as one JSON object per line, a batch at a time, ending with an error line if a batch fails.
+    """
+    try:
+        for predictions_df in batches:
+            yield predictions_df.to_json(orient='records', lines=True).rstrip('\n').encode() + b'\n'
+    except Exception as e:
+        yield json.dumps({'error': str(e)}).encode() + b'\n'
+
+def gzip_stream(chunks):
+    """
+    Gzip-encode a stream of chunks, flushing after each so the client receives them as they're produced.
+    """
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)  # 16 for the gzip header
+
+    for chunk in chunks:
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    yield compressor.flush()
+
+def ndjson_response(batches, compress=False):
+    """
+    Stream the predictions as newline-delimited JSON while the batches are predicted.
+    """
+    lines = ndjson_lines(batches)
+    response = Response(gzip_stream(lines) if compress else lines, mimetype='application/x-ndjson')
+
+    if compress:
+        response.headers['Content-Encoding'] = 'gzip'
+        response.headers['Vary'] = 'Accept-Encoding'
+
+    return response
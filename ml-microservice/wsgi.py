@@ -0,0 +1,13 @@
+from logging_config import setup_logging
+from app import app, warm_up
+import gc
+
+# Production entry point, imported once by the gunicorn master before it forks the workers (see gunicorn.conf.py)
+setup_logging()
+
+# Load the model and mappings in the master, so the workers share them copy-on-write
+warm_up()
+
+# Move everything loaded so far out of the garbage collector's reach,
+# so collections in the workers don't write to the shared pages and copy them
+gc.freeze()